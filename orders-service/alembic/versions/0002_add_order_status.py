@@ -0,0 +1,25 @@
+"""add order status
+
+Revision ID: 0002_add_order_status
+Revises: 0001_create_orders_table
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002_add_order_status'
+down_revision = '0001_create_orders_table'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'order',
+        sa.Column('status', sa.String(), nullable=False, server_default='confirmed'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('order', 'status')
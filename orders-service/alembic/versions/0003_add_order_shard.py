@@ -0,0 +1,31 @@
+"""add order_shard and widen order.id
+
+Revision ID: 0003_add_order_shard
+Revises: 0002_add_order_status
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0003_add_order_shard'
+down_revision = '0002_add_order_status'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'order_shard',
+        sa.Column('shard_id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('next_seq', sa.BigInteger(), nullable=False),
+    )
+    if op.get_bind().dialect.name != 'sqlite':
+        # sharded ids are seq << 10 | shard id; SQLite integers are already 64-bit
+        op.alter_column('order', 'id', type_=sa.BigInteger())
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'sqlite':
+        op.alter_column('order', 'id', type_=sa.Integer())
+    op.drop_table('order_shard')
@@ -0,0 +1,29 @@
+"""add order_rollup
+
+Revision ID: 0004_add_order_rollup
+Revises: 0003_add_order_shard
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0004_add_order_rollup'
+down_revision = '0003_add_order_shard'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # fill it afterwards with `python -m app.scripts.backfill_order_rollup`
+    op.create_table(
+        'order_rollup',
+        sa.Column('bucket_start', sa.DateTime(), primary_key=True),
+        sa.Column('item_name', sa.String(), primary_key=True),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.Column('total_quantity', sa.BigInteger(), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('order_rollup')
@@ -0,0 +1,29 @@
+"""add owner_order_stats
+
+Revision ID: 0005_add_owner_order_stats
+Revises: 0004_add_order_rollup
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005_add_owner_order_stats'
+down_revision = '0004_add_order_rollup'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # fill it afterwards with `python -m app.scripts.rebuild_owner_order_stats`
+    op.create_table(
+        'owner_order_stats',
+        sa.Column('owner_id', sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.Column('total_quantity', sa.BigInteger(), nullable=False),
+        sa.Column('last_order_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('owner_order_stats')
@@ -1,9 +1,27 @@
-from typing import AsyncGenerator
+import hmac
+from typing import AsyncGenerator, Optional
 
-from app.db.session import get_session
+from fastapi import Header, HTTPException
+
+from app.core.config import settings
+from app.db.session import get_primary_session, get_session
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
 async def provide_session() -> AsyncGenerator[AsyncSession, None]:
     async for s in get_session():
         yield s
+
+
+async def provide_primary_session() -> AsyncGenerator[AsyncSession, None]:
+    # For write endpoints: every read sees the primary, not a possibly lagging replica
+    async for s in get_primary_session():
+        yield s
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    # orders-service has no user accounts; operator endpoints share one configured token
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
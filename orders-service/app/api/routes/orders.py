@@ -1,69 +1,277 @@
-from typing import List
+import asyncio
+from datetime import datetime
+from functools import partial
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import provide_session
-from app.schemas.order import OrderCreateSchema, OrderResponse
+from app.api.deps import provide_primary_session, provide_session
+from app.core.config import settings
+from app.core.deadline import bounded_gather
+from app.core.etag import etag_matches, make_etag, not_modified
+from app.db.session import replica_set, shard_set
+from app.schemas.order import (
+    OrderAnalyticsResponse,
+    OrderCreateDBSchema,
+    OrderCreateSchema,
+    OrderResponse,
+    OwnerOrderStatsResponse,
+)
+from app.services import order_rollup, owner_order_stats
+from app.services.order_batcher import order_batcher
 from app.services.order_service import crud_order
-from app.services.user_client import get_user, safe_get_user
-from app.services.user_snapshot_service import get_snapshot
-import asyncio
+from app.services.owner_validation import confirm_pending_order
+from app.services.response_cache import (
+    LIST_TAG,
+    CachedResponse,
+    cache_key,
+    order_tag,
+    owner_tag,
+    response_cache,
+)
+from app.services.user_client import get_user, safe_get_user, user_service_breaker
+from app.services.user_directory import user_directory
+from app.services.user_snapshot_service import get_snapshot, get_snapshots
 
 
 orders_router = APIRouter(prefix="/orders", tags=["Orders"])
 
+# render cached bodies exactly as the response_model would (RESPONSE_CACHE_ENABLED)
+_ORDER = TypeAdapter(OrderResponse)
+_ORDER_LIST = TypeAdapter(List[OrderResponse])
+
+
+def _order_out(order, owner: Optional[dict]) -> dict:
+    return {
+        "id": order.id,
+        "item_name": order.item_name,
+        "quantity": order.quantity,
+        "owner_id": order.owner_id,
+        "status": order.status,
+        "owner": {"id": owner.get("id"), "email": owner.get("email"), "full_name": owner.get("full_name")} if owner else None,
+    }
+
+
+def _order_version(order, owner: Optional[dict]) -> tuple:
+    # everything _order_out renders; hashed into the ETag without building the body
+    owner_part = (owner.get("id"), owner.get("email"), owner.get("full_name")) if owner else None
+    return (order.id, order.item_name, order.quantity, order.owner_id, order.status, owner_part)
+
 
 @orders_router.get("/health", status_code=204)
 async def health() -> None:
     return None
 
 
-@orders_router.post("/", response_model=OrderResponse)
-async def create_order(order_in: OrderCreateSchema, session: AsyncSession = Depends(provide_session)):
-    # Validate owner exists in user-service
-    owner = await get_user(order_in.owner_id)
-    new_order = await crud_order.create(session, order_in)
-    # return with owner info
+@orders_router.get("/ready", status_code=204)
+async def ready(request: Request) -> None:
+    # Readiness, unlike /health (liveness): 503 until startup warm-up has finished
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(status_code=503, detail="Warming up")
+    return None
+
+
+@orders_router.get("/health/dependencies")
+async def dependencies_health() -> dict:
+    # Circuit breaker / replica health for outbound dependencies; informational, never fails
     return {
-        "id": new_order.id,
-        "item_name": new_order.item_name,
-        "quantity": new_order.quantity,
-        "owner_id": new_order.owner_id,
-        "owner": {"id": owner.get("id"), "email": owner.get("email"), "full_name": owner.get("full_name")},
+        "user_service": user_service_breaker.snapshot(),
+        "db_replicas": replica_set.snapshot() if replica_set is not None else [],
     }
 
 
-@orders_router.get("/", response_model=List[OrderResponse])
-async def list_orders(offset: int = 0, limit: int = 100, session: AsyncSession = Depends(provide_session)):
+@orders_router.get("/health/directory")
+async def directory_health() -> dict:
+    # Size of the in-memory user directory replica (USER_DIRECTORY_ENABLED)
+    return user_directory.memory_stats()
+
+
+@orders_router.get("/health/admission")
+async def admission_health(request: Request) -> dict:
+    # Per route class limit, in-flight, queued and shed counts (ADMISSION_ENABLED)
+    admission = getattr(request.app.state, "admission", None)
+    return admission.snapshot() if admission is not None else {}
+
+
+@orders_router.get("/health/loop-lag")
+async def loop_lag_health(request: Request) -> dict:
+    # Event-loop scheduling delay histogram (LOOP_LAG_MONITOR_ENABLED); stacks are under /admin
+    monitor = getattr(request.app.state, "loop_monitor", None)
+    return monitor.snapshot() if monitor is not None else {}
+
+
+@orders_router.get("/health/response-cache")
+async def response_cache_health() -> dict:
+    # Entry count and hit/miss counters of the read response cache (RESPONSE_CACHE_ENABLED)
+    return response_cache.stats()
+
+
+async def _resolve_owner(session: AsyncSession, owner_id: int) -> Tuple[Optional[dict], str]:
+    """Validate ``owner_id`` according to OWNER_VALIDATION_MODE; returns (owner, order status)."""
+    mode = settings.OWNER_VALIDATION_MODE
+    if mode in ("snapshot", "async"):
+        owner = await get_snapshot(session, owner_id)
+        if owner:
+            return owner, "confirmed"
+        if mode == "async":
+            return None, "pending"
+    # Validate owner exists in user-service
+    return await get_user(owner_id), "confirmed"
+
+
+@orders_router.post("/", response_model=OrderResponse)
+async def create_order(
+    order_in: OrderCreateSchema,
+    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(provide_primary_session),
+):
+    owner, status = await _resolve_owner(session, order_in.owner_id)
+    order_data = OrderCreateDBSchema(**order_in.dict(), status=status)
+    if settings.ORDER_BATCH_ENABLED:
+        new_order = await order_batcher.create(order_data)
+    else:
+        new_order = await crud_order.create(session, order_data)
+    if status == "pending":
+        background_tasks.add_task(confirm_pending_order, new_order.id, new_order.owner_id)
+    # return with owner info
+    return _order_out(new_order, owner)
+
+
+@orders_router.get("/analytics", response_model=OrderAnalyticsResponse)
+async def order_analytics(
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    by_item: bool = False,
+    session: AsyncSession = Depends(provide_session),
+):
+    # Order counts and quantities per time bucket, read from the hourly rollup: the cost
+    # follows the number of buckets (and items), not the number of orders
+    step = order_rollup.GRANULARITIES[granularity]
+    end = order_rollup.truncate(end or datetime.utcnow(), granularity) + step
+    start = order_rollup.truncate(start, granularity) if start else end - order_rollup.DEFAULT_BUCKETS[granularity] * step
+    if start >= end or (end - start) / step > settings.ANALYTICS_MAX_BUCKETS:
+        raise HTTPException(status_code=400, detail=f"Range must cover 1 to {settings.ANALYTICS_MAX_BUCKETS} buckets")
+    if shard_set is not None:
+        per_shard = await shard_set.gather(lambda s: order_rollup.fetch_hours(s, start, end, by_item))
+        hours = [row for rows in per_shard for row in rows]
+    else:
+        hours = await order_rollup.fetch_hours(session, start, end, by_item)
+    return {"granularity": granularity, "start": start, "end": end, "buckets": order_rollup.merge(hours, granularity)}
+
+
+@orders_router.get("/owner-stats", response_model=List[OwnerOrderStatsResponse])
+async def owner_stats(
+    owner_id: List[int] = Query(..., description="repeat for each owner"),
+    session: AsyncSession = Depends(provide_session),
+):
+    # Order count, total quantity and last order time per owner, one primary-key read each
+    # from owner_order_stats; owners without orders come back with zeros, in request order
+    owner_ids = list(dict.fromkeys(owner_id))
+    if len(owner_ids) > settings.OWNER_STATS_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.OWNER_STATS_MAX_IDS} owner ids per request")
+    if shard_set is not None:
+        by_shard: Dict[Any, List[int]] = {}
+        for uid in owner_ids:
+            by_shard.setdefault(shard_set.for_owner(uid), []).append(uid)
+
+        async def on_shard(shard, uids: List[int]) -> List[dict]:
+            async with shard.session() as shard_session:
+                return await owner_order_stats.fetch(shard_session, uids)
+
+        per_shard = await asyncio.gather(*(on_shard(shard, uids) for shard, uids in by_shard.items()))
+        rows = [row for shard_rows in per_shard for row in shard_rows]
+    else:
+        rows = await owner_order_stats.fetch(session, owner_ids)
+    found = {row["owner_id"]: row for row in rows}
+    empty = {"order_count": 0, "total_quantity": 0, "last_order_at": None}
+    return [found.get(uid) or {"owner_id": uid, **empty} for uid in owner_ids]
+
+
+async def _load_page(session: AsyncSession, offset: int, limit: int) -> Tuple[list, Dict[int, dict]]:
     orders = await crud_order.get_all(session, offset=offset, limit=limit)
     # Enrich orders with owner data when available. Failures to fetch owner do NOT fail the request.
-    async def enrich(o):
-        owner = await get_snapshot(session, o.owner_id)
-        if not owner:
-            owner = await safe_get_user(o.owner_id)
-        return {
-            "id": o.id,
-            "item_name": o.item_name,
-            "quantity": o.quantity,
-            "owner_id": o.owner_id,
-            "owner": {"id": owner.get("id"), "email": owner.get("email"), "full_name": owner.get("full_name")} if owner else None,
-        }
-
-    enriched = await asyncio.gather(*(enrich(o) for o in orders))
-    return enriched
+    owner_ids = {o.owner_id for o in orders}
+    if user_directory.ready:
+        owners = user_directory.get_many(owner_ids)
+    else:
+        owners = await get_snapshots(session, owner_ids)
+    missing = [uid for uid in owner_ids if uid not in owners]
+    # Snapshot misses go to user-service with bounded concurrency; lookups still running when
+    # the request budget is spent are cancelled and leave owner=null (partial enrichment).
+    fetched = await bounded_gather(
+        (partial(safe_get_user, uid) for uid in missing), limit=settings.ENRICH_CONCURRENCY
+    )
+    owners.update({uid: owner for uid, owner in zip(missing, fetched) if owner})
+    return orders, owners
 
 
-@orders_router.get("/{order_id}/", response_model=OrderResponse)
-async def get_order(order_id: int, session: AsyncSession = Depends(provide_session)):
+async def _load_order(session: AsyncSession, order_id: int) -> Tuple[Any, Optional[dict]]:
     order = await crud_order.get(session, id=order_id)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    owner = await safe_get_user(order.owner_id)
-    return {
-        "id": order.id,
-        "item_name": order.item_name,
-        "quantity": order.quantity,
-        "owner_id": order.owner_id,
-        "owner": {"id": owner.get("id"), "email": owner.get("email"), "full_name": owner.get("full_name")} if owner else None,
-    }
+    if user_directory.ready:
+        owner = user_directory.get(order.owner_id)
+    else:
+        owner = await get_snapshot(session, order.owner_id)
+    if not owner:
+        owner = await safe_get_user(order.owner_id)
+    return order, owner
+
+
+def _send_cached(request: Request, cached: CachedResponse) -> Response:
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers={"ETag": cached.etag})
+    return Response(cached.body, media_type="application/json", headers={"ETag": cached.etag})
+
+
+@orders_router.get("/", response_model=List[OrderResponse])
+async def list_orders(
+    request: Request,
+    response: Response,
+    offset: int = 0,
+    limit: int = 100,
+    session: AsyncSession = Depends(provide_session),
+):
+    if settings.RESPONSE_CACHE_ENABLED:
+
+        async def render() -> Tuple[CachedResponse, Set[str]]:
+            orders, owners = await _load_page(session, offset, limit)
+            etag = make_etag(*(_order_version(o, owners.get(o.owner_id)) for o in orders))
+            body = _ORDER_LIST.dump_json(_ORDER_LIST.validate_python([_order_out(o, owners.get(o.owner_id)) for o in orders]))
+            tags = {LIST_TAG} | {order_tag(o.id) for o in orders} | {owner_tag(o.owner_id) for o in orders}
+            return CachedResponse(etag, body), tags
+
+        key = cache_key("/orders/", offset=offset, limit=limit)
+        return _send_cached(request, await response_cache.get_or_compute(key, render))
+
+    orders, owners = await _load_page(session, offset, limit)
+    etag = make_etag(*(_order_version(o, owners.get(o.owner_id)) for o in orders))
+    unchanged = not_modified(request, response, etag)
+    if unchanged is not None:
+        return unchanged
+    return [_order_out(o, owners.get(o.owner_id)) for o in orders]
+
+
+@orders_router.get("/{order_id}/", response_model=OrderResponse)
+async def get_order(
+    request: Request, response: Response, order_id: int, session: AsyncSession = Depends(provide_session)
+):
+    if settings.RESPONSE_CACHE_ENABLED:
+
+        async def render() -> Tuple[CachedResponse, Set[str]]:
+            order, owner = await _load_order(session, order_id)
+            body = _ORDER.dump_json(_ORDER.validate_python(_order_out(order, owner)))
+            tags = {order_tag(order.id), owner_tag(order.owner_id)}
+            return CachedResponse(make_etag(*_order_version(order, owner)), body), tags
+
+        key = cache_key("/orders/{order_id}/", order_id=order_id)
+        return _send_cached(request, await response_cache.get_or_compute(key, render))
+
+    order, owner = await _load_order(session, order_id)
+    unchanged = not_modified(request, response, make_etag(*_order_version(order, owner)))
+    if unchanged is not None:
+        return unchanged
+    return _order_out(order, owner)
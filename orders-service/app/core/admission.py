@@ -0,0 +1,221 @@
+"""Adaptive admission control: shed load at the door instead of timing out deep inside.
+
+Requests are sorted into route classes (``auth``, ``list``, ``write``, ``internal``). Each
+class has its own concurrency limit, tuned by AIMD. A completion within the class's latency
+target grows the limit by about one per round of requests. A slow completion, or a 503/504,
+shrinks it by 10%, at most once per target interval. Latency is measured from arrival, so
+time spent queueing counts: a growing queue pulls the limit down before work piles up.
+
+A request that finds its class full waits up to the queue timeout for a slot, then gets
+503 with ``Retry-After``. Health and readiness probes and admin endpoints (a profile
+holds its request open for its whole run) are never limited. ``internal``
+(service-to-service) requests wait ``PRIORITY_QUEUE_FACTOR`` times longer, and because
+every class has its own limit, a flood of list traffic cannot starve them.
+"""
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+ROUTE_CLASSES = ("auth", "list", "write", "internal")
+PRIORITY_CLASSES = ("internal",)
+PRIORITY_QUEUE_FACTOR = 4
+_WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Route class of a request; None for probes and admin tools, which are always admitted."""
+    trimmed = path.rstrip("/")
+    if trimmed.endswith(("/health", "/ready")) or "/health/" in path or "/admin/" in path:
+        return None
+    if "/internal/" in path:
+        return "internal"
+    if "/login" in path:
+        return "auth"
+    if method in _WRITE_METHODS:
+        return "write"
+    return "list"
+
+
+class AdaptiveLimit:
+    """AIMD concurrency limit for one route class, with a FIFO queue of waiting requests."""
+
+    def __init__(
+        self,
+        target_latency: float,
+        initial: int = 20,
+        min_limit: int = 2,
+        max_limit: int = 200,
+        backoff: float = 0.9,
+    ) -> None:
+        self.target_latency = target_latency
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.latency_ewma = 0.0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+    def _has_slot(self) -> bool:
+        return self.in_flight < max(1, int(self.limit))
+
+    async def acquire(self, timeout: float) -> bool:
+        """Take a slot, waiting up to ``timeout`` seconds; False means shed the request."""
+        if self._has_slot() and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return True
+        if timeout <= 0:
+            self.rejected += 1
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait({waiter}, timeout=timeout)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)  # handed a slot just as the client went away
+            else:
+                self._discard(waiter)
+            raise
+        if waiter.done():
+            self.admitted += 1
+            return True
+        self._discard(waiter)
+        self.rejected += 1
+        return False
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self, latency: float, overloaded: bool = False) -> None:
+        """Free a slot and feed the request's latency (arrival to completion) into the limit."""
+        self.in_flight -= 1
+        if latency > 0:
+            self.latency_ewma = latency if not self.latency_ewma else 0.9 * self.latency_ewma + 0.1 * latency
+        if latency > 0 or overloaded:
+            self._adjust(latency, overloaded)
+        # hand freed slots to queued requests in arrival order
+        while self._waiters and self._has_slot():
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self.in_flight += 1
+            waiter.set_result(True)
+
+    def _adjust(self, latency: float, overloaded: bool) -> None:
+        now = time.monotonic()
+        if overloaded or latency > self.target_latency:
+            if now - self._last_decrease >= self.target_latency:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        elif self.in_flight + 1 >= self.limit / 2:
+            # only grow a limit that is actually being used
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def retry_after(self) -> int:
+        """Seconds a shed client should wait: roughly the time to drain the current queue."""
+        backlog = len(self._waiters) + self.in_flight
+        return max(1, math.ceil(self.latency_ewma * backlog / max(1.0, self.limit)))
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "latency_ewma_ms": round(self.latency_ewma * 1000, 1),
+        }
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        target_latency_ms: Dict[str, float],
+        queue_timeout_ms: float = 50.0,
+        initial: int = 20,
+        min_limit: int = 2,
+        max_limit: int = 200,
+    ) -> None:
+        self.queue_timeout = queue_timeout_ms / 1000
+        self.limits = {
+            name: AdaptiveLimit(target_latency_ms.get(name, 250.0) / 1000, initial, min_limit, max_limit)
+            for name in ROUTE_CLASSES
+        }
+
+    @classmethod
+    def from_settings(cls, settings) -> "AdmissionController":
+        return cls(
+            settings.ADMISSION_TARGET_LATENCY_MS,
+            queue_timeout_ms=settings.ADMISSION_QUEUE_TIMEOUT_MS,
+            initial=settings.ADMISSION_INITIAL_LIMIT,
+            min_limit=settings.ADMISSION_MIN_LIMIT,
+            max_limit=settings.ADMISSION_MAX_LIMIT,
+        )
+
+    def queue_timeout_for(self, route_class: str) -> float:
+        factor = PRIORITY_QUEUE_FACTOR if route_class in PRIORITY_CLASSES else 1
+        return self.queue_timeout * factor
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {name: limit.snapshot() for name, limit in self.limits.items()}
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware applying an ``AdmissionController`` to every HTTP request."""
+
+    def __init__(self, app, controller: AdmissionController) -> None:
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = classify(scope["method"], scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+        limit = self.controller.limits[route_class]
+        arrived = time.monotonic()
+        if not await limit.acquire(self.controller.queue_timeout_for(route_class)):
+            await _shed(send, limit.retry_after())
+            return
+        status = {"code": 500}
+
+        async def send_with_status(message) -> None:
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            limit.release(time.monotonic() - arrived, overloaded=status["code"] in (503, 504))
+
+
+async def _shed(send, retry_after: int) -> None:
+    body = json.dumps({"detail": "Server overloaded, retry later"}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
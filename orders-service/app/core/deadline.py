@@ -0,0 +1,98 @@
+"""Per-request time budgets.
+
+``DeadlineMiddleware`` stores an absolute deadline in a context variable for the
+duration of each request. Outbound calls (``safe_get_user``), database statement
+timeouts and fan-out helpers read the remaining budget from here so a request's
+latency is bounded by its budget rather than by the sum of its dependencies' timeouts.
+"""
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+DEADLINE_HEADER = "x-request-timeout-ms"
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def set_deadline(budget: Optional[float]):
+    """Start a budget of ``budget`` seconds from now; returns a token for :func:`reset_deadline`."""
+    return _deadline.set(None if budget is None else time.monotonic() + budget)
+
+
+def reset_deadline(token) -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current request's budget, or None when no deadline is set."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def clamp(timeout: float) -> float:
+    """Shrink ``timeout`` so it does not outlive the current deadline."""
+    left = remaining()
+    return timeout if left is None else min(timeout, left)
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+async def bounded_gather(
+    factories: Iterable[Callable[[], Awaitable[Any]]], limit: int, default: Any = None
+) -> List[Any]:
+    """Run coroutine factories with at most ``limit`` in flight, stopping at the deadline.
+
+    Results are returned in input order. Work still pending when the budget runs out is
+    cancelled and reported as ``default``; other exceptions propagate as with gather.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(factory):
+        async with semaphore:
+            return await factory()
+
+    tasks = [asyncio.ensure_future(run(factory)) for factory in factories]
+    if not tasks:
+        return []
+    _, pending = await asyncio.wait(tasks, timeout=remaining())
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
+    return [default if task in pending else task.result() for task in tasks]
+
+
+class DeadlineMiddleware:
+    """Pure ASGI middleware assigning every HTTP request a deadline.
+
+    The budget is ``default_budget`` seconds, lowered further when the caller sends an
+    ``X-Request-Timeout-Ms`` header with a smaller value.
+    """
+
+    def __init__(self, app, default_budget: float) -> None:
+        self.app = app
+        self.default_budget = default_budget
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        budget = self.default_budget
+        for name, value in scope.get("headers") or []:
+            if name == DEADLINE_HEADER.encode():
+                try:
+                    budget = min(budget, int(value) / 1000.0)
+                except ValueError:
+                    pass
+                break
+        token = set_deadline(budget)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_deadline(token)
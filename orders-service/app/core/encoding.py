@@ -0,0 +1,64 @@
+"""Wire encodings for service-to-service traffic: JSON (default) and msgpack.
+
+msgpack is optional: if the package is not installed, negotiation always picks JSON and
+``encode(..., MSGPACK)`` raises. Datetimes travel as ISO-8601 strings in both encodings,
+so decoded payloads are the same whichever one was used.
+"""
+import json
+from datetime import date, datetime
+from typing import Any, Optional
+
+JSON = "application/json"
+MSGPACK = "application/x-msgpack"
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except Exception:
+        return None
+    return msgpack
+
+
+def msgpack_available() -> bool:
+    return _msgpack() is not None
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"cannot encode {type(obj).__name__}")
+
+
+def encode(obj: Any, content_type: str = JSON) -> bytes:
+    if content_type == MSGPACK:
+        msgpack = _msgpack()
+        if msgpack is None:
+            raise RuntimeError("msgpack is not installed")
+        return msgpack.packb(obj, default=_default, use_bin_type=True)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+
+def decode(body: bytes, content_type: Optional[str] = None) -> Any:
+    if content_type and content_type.split(";", 1)[0].strip() == MSGPACK:
+        msgpack = _msgpack()
+        if msgpack is None:
+            raise RuntimeError("received msgpack but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """Pick the response encoding for an ``Accept`` header: msgpack only when asked for and available."""
+    if accept and MSGPACK in accept and msgpack_available():
+        return MSGPACK
+    return JSON
+
+
+def accept_header(preferred: str) -> str:
+    """``Accept`` value for a client preferring ``preferred`` but able to take JSON."""
+    if preferred == MSGPACK and msgpack_available():
+        return f"{MSGPACK}, {JSON};q=0.5"
+    return JSON
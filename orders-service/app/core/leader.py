@@ -0,0 +1,163 @@
+"""Leader election for background jobs when several worker processes serve one app.
+
+Every uvicorn/gunicorn worker runs ``on_startup``; only the process holding the leader
+lock starts the RabbitMQ consumer and the snapshot sync. The lock is held for the life of
+the process and dropped by the OS (file lock) or the database (advisory lock) when it
+dies, at which point a follower's next attempt takes over. The leader checks its lock
+every retry interval and stops the jobs as soon as it finds it lost (the advisory lock
+goes with its connection), so a second leader overlaps it by at most one interval.
+"""
+import asyncio
+import contextlib
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+class FileLeaderLock:
+    """``flock`` on a local file: one leader per host/pod, whatever the database."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fd: Optional[int] = None
+
+    @property
+    def held(self) -> bool:
+        return self._fd is not None
+
+    async def check(self) -> bool:
+        # a flock lasts as long as the descriptor
+        return self._fd is not None
+
+    async def try_acquire(self) -> bool:
+        import fcntl
+
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
+
+    async def release(self) -> None:
+        if self._fd is not None:
+            fd, self._fd = self._fd, None
+            os.close(fd)  # closing the descriptor drops the flock
+
+
+class PostgresLeaderLock:
+    """Session-level ``pg_try_advisory_lock``: one leader across every pod sharing the database.
+
+    The lock lives on a connection checked out of the pool for as long as leadership is held.
+    """
+
+    def __init__(self, engine: AsyncEngine, key: int) -> None:
+        self.engine = engine
+        self.key = key
+        self._conn: Optional[AsyncConnection] = None
+
+    @property
+    def held(self) -> bool:
+        return self._conn is not None
+
+    async def check(self) -> bool:
+        """Ping the lock's connection; if it is gone, so is the lock (and ``held`` turns False)."""
+        if self._conn is None:
+            return False
+        try:
+            await self._conn.scalar(text("SELECT 1"))
+            await self._conn.commit()
+            return True
+        except Exception as exc:
+            logger.warning("leader lock connection failed: %s", exc)
+            conn, self._conn = self._conn, None
+            with contextlib.suppress(Exception):
+                await conn.invalidate()
+            return False
+
+    async def try_acquire(self) -> bool:
+        if self._conn is not None:
+            return True
+        conn = await self.engine.connect()
+        try:
+            acquired = await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": self.key})
+            await conn.commit()
+        except Exception:
+            await conn.close()
+            raise
+        if not acquired:
+            await conn.close()
+            return False
+        self._conn = conn
+        return True
+
+    async def release(self) -> None:
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            try:
+                await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": self.key})
+            finally:
+                await conn.close()
+
+
+@asynccontextmanager
+async def host_mutex(path: str):
+    """Blocking ``flock`` held for the body: serialises a step (dev-mode create_all) across local workers."""
+    import fcntl
+
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        await asyncio.to_thread(fcntl.flock, fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+async def campaign(lock, on_elected: Callable[[], None], retry_seconds: float = 5.0) -> None:
+    """Try ``lock`` every ``retry_seconds`` until it is acquired, then call ``on_elected`` once."""
+    while True:
+        try:
+            if await lock.try_acquire():
+                break
+        except Exception as exc:  # database briefly unavailable; keep campaigning
+            logger.warning("leader lock attempt failed: %s", exc)
+        await asyncio.sleep(retry_seconds)
+    logger.info("process %d is the background-job leader", os.getpid())
+    on_elected()
+
+
+async def hold(lock, check_seconds: float = 5.0) -> None:
+    """Return once ``lock`` is found lost, checking it every ``check_seconds``."""
+    while await lock.check():
+        await asyncio.sleep(check_seconds)
+    logger.warning("process %d lost the background-job leader lock", os.getpid())
+
+
+async def lead(
+    lock, on_elected: Callable[[], None], on_deposed: Callable[[], None], retry_seconds: float = 5.0
+) -> None:
+    """Campaign for ``lock``, run as leader while it holds, step down and campaign again when lost."""
+    while True:
+        await campaign(lock, on_elected, retry_seconds)
+        await hold(lock, retry_seconds)
+        on_deposed()
+
+
+def leader_lock_from_settings(settings, engine: AsyncEngine):
+    if settings.LEADER_LOCK_BACKEND == "postgres":
+        if engine.dialect.name == "postgresql":
+            return PostgresLeaderLock(engine, settings.LEADER_LOCK_KEY)
+        logger.warning("LEADER_LOCK_BACKEND=postgres needs a Postgres database; using a file lock")
+    return FileLeaderLock(settings.LEADER_LOCK_PATH)
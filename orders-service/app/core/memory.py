@@ -0,0 +1,150 @@
+"""Memory diagnostics for a running process (MEMORY_DIAGNOSTICS_ENABLED, ``/admin/memory``).
+
+``tracemalloc`` is off until an operator starts it, because tracing every allocation
+slows the process down and costs memory of its own. While it runs, named snapshots can be
+taken and diffed. The diff groups allocations by site (``lineno`` or ``traceback``), and
+its top entries show what grew in between, e.g. before and after a burst of large
+``limit`` list requests.
+
+``report()`` works without tracemalloc. It returns RSS, garbage-collector counts, the
+sizes registered with ``register_size`` (in-process caches, pending buffers), and the
+number of objects held in the identity maps of live SQLAlchemy sessions (see
+``track_sessions``).
+"""
+import gc
+import linecache
+import os
+import resource
+import time
+import tracemalloc
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+_SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, linecache.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+_sizes: Dict[str, Callable[[], Any]] = {}
+_sessions: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def register_size(name: str, fn: Callable[[], Any]) -> None:
+    """Report ``fn()`` (a count or a small dict) under ``name`` in ``report()``."""
+    _sizes[name] = fn
+
+
+def _track(session, transaction, connection) -> None:
+    _sessions.add(session)
+
+
+def track_sessions() -> None:
+    """Remember sessions as they begin, so their identity maps can be measured (idempotent)."""
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    if not event.contains(Session, "after_begin", _track):
+        event.listen(Session, "after_begin", _track)
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class SnapshotStore:
+    """Named tracemalloc snapshots, oldest dropped beyond ``limit``."""
+
+    def __init__(self, limit: int = 10) -> None:
+        self.limit = limit
+        self._snapshots: "OrderedDict[str, tracemalloc.Snapshot]" = OrderedDict()
+        self._taken_at: Dict[str, float] = {}
+        self._counter = 0
+
+    def start(self, frames: int = 1) -> None:
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        tracemalloc.start(frames)
+
+    def stop(self) -> None:
+        tracemalloc.stop()
+        self._snapshots.clear()
+        self._taken_at.clear()
+
+    def take(self, name: Optional[str] = None) -> str:
+        """Snapshot current allocations; raises RuntimeError unless tracemalloc is running."""
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not running")
+        self._counter += 1
+        name = name or str(self._counter)
+        self._snapshots.pop(name, None)
+        self._snapshots[name] = tracemalloc.take_snapshot().filter_traces(_SNAPSHOT_FILTERS)
+        self._taken_at[name] = time.time()
+        while len(self._snapshots) > self.limit:
+            oldest, _ = self._snapshots.popitem(last=False)
+            self._taken_at.pop(oldest, None)
+        return name
+
+    def diff(self, base: str, compare: str, group_by: str = "lineno", limit: int = 25) -> List[Dict[str, Any]]:
+        """Top allocation sites by growth from ``base`` to ``compare``; KeyError for an unknown name."""
+        stats = self._snapshots[compare].compare_to(self._snapshots[base], group_by)
+        return [
+            {
+                "site": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                "size_diff_bytes": stat.size_diff,
+                "count_diff": stat.count_diff,
+                "size_bytes": stat.size,
+                "count": stat.count,
+            }
+            for stat in stats[:limit]
+        ]
+
+    def status(self) -> Dict[str, Any]:
+        current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+        return {
+            "tracing": tracemalloc.is_tracing(),
+            "frames": tracemalloc.get_traceback_limit() if tracemalloc.is_tracing() else 0,
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "snapshots": [{"name": n, "taken_at": self._taken_at[n]} for n in self._snapshots],
+        }
+
+
+def heap_objects() -> int:
+    """Objects tracked by the garbage collector; walks the whole heap, so safe to run in a thread."""
+    return len(gc.get_objects())
+
+
+def report(gc_objects: Optional[int] = None) -> Dict[str, Any]:
+    """Process memory figures. Call it on the event loop: the session set and the registered
+    sizes are loop-owned. Pass ``gc_objects`` from ``heap_objects()`` run elsewhere to keep
+    the heap walk off the loop."""
+    identity_maps = [len(session.identity_map) for session in list(_sessions)]
+    sizes = {}
+    for name, fn in _sizes.items():
+        try:
+            sizes[name] = fn()
+        except Exception as exc:  # a broken reporter must not hide the others
+            sizes[name] = f"error: {exc}"
+    return {
+        "rss_bytes": _rss_bytes(),
+        "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "gc_counts": gc.get_count(),
+        "gc_objects": heap_objects() if gc_objects is None else gc_objects,
+        "caches": sizes,
+        "sessions": {
+            "live": len(identity_maps),
+            "identity_map_objects": sum(identity_maps),
+            "largest_identity_map": max(identity_maps, default=0),
+        },
+    }
+
+
+snapshot_store = SnapshotStore()
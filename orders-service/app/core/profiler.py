@@ -0,0 +1,204 @@
+"""On-demand stack-sampling CPU profiler (PROFILER_ENABLED, ``GET /admin/profile``).
+
+While a profile runs, a background thread wakes every ``interval`` seconds. It reads the
+Python stack of every other thread with ``sys._current_frames()`` and counts identical
+stacks. Nothing is installed in the code being profiled, so the cost is one stack walk
+per thread per sample and stops when the profile ends. Stacks are rooted at ``loop`` for
+the event loop thread and at the thread name (numbering stripped) for executor threads.
+Threads parked in ``select``, a lock wait or an idle executor are skipped unless
+``include_idle`` is set.
+
+Output is collapsed stacks (``root;frame;...;leaf count`` per line), which
+``flamegraph.pl``, speedscope and inferno read directly, or a JSON summary.
+
+With ``header`` set, only requests carrying that header are profiled.
+``ProfileTagMiddleware`` tags their asyncio task. A task factory, installed for the run,
+passes the tag to tasks they spawn, and the sampler keeps only loop-thread samples taken
+while a tagged task is running. Executor threads are not attributed to requests, so they
+are left out of filtered profiles.
+"""
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+import weakref
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+_IDLE_LEAVES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("thread.py", "_worker"),
+    ("queue.py", "get"),
+}
+_THREAD_NUMBER = re.compile(r"[-_]\d+$")
+_CWD = os.getcwd() + os.sep
+
+
+class ProfilerBusy(RuntimeError):
+    """Another profile is already running in this process."""
+
+
+def _label(code) -> str:
+    path = code.co_filename
+    if "site-packages" + os.sep in path:
+        path = path.split("site-packages" + os.sep, 1)[1]
+    elif path.startswith(_CWD):
+        path = path[len(_CWD):]
+    else:
+        path = os.path.basename(path)
+    return f"{path}:{code.co_name}".replace(";", ":").replace(" ", "_")
+
+
+def parse_header_filter(value: Optional[str]) -> Optional[Tuple[str, Optional[str]]]:
+    """``"x-profile"`` matches any value, ``"x-profile=abc"`` only that value."""
+    if not value:
+        return None
+    name, sep, expected = value.partition("=")
+    return name.strip().lower(), expected.strip() if sep else None
+
+
+class SamplingProfiler:
+    def __init__(
+        self,
+        interval: float = 0.005,
+        header: Optional[Tuple[str, Optional[str]]] = None,
+        include_idle: bool = False,
+    ) -> None:
+        self.interval = interval
+        self.header = header
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._tagged: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+        self._previous_factory = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Start sampling; call from the event loop thread."""
+        self._loop = loop
+        self._loop_thread = threading.get_ident()
+        if self.header is not None:
+            self._previous_factory = loop.get_task_factory()
+            loop.set_task_factory(self._task_factory)
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self.header is not None and self._loop is not None:
+            self._loop.set_task_factory(self._previous_factory)
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            if self.header is not None:
+                # filtered: only the loop thread, only while a tagged request's task runs
+                if ident != self._loop_thread or asyncio.current_task(self._loop) not in self._tagged:
+                    continue
+            code = frame.f_code
+            if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                continue
+            labels: List[str] = []
+            while frame is not None:
+                labels.append(_label(frame.f_code))
+                frame = frame.f_back
+            root = "loop" if ident == self._loop_thread else _THREAD_NUMBER.sub("", names.get(ident, "thread"))
+            labels.append(root)
+            self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def _task_factory(self, loop, coro, **kwargs):
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        if asyncio.current_task(loop) in self._tagged:
+            self._tagged.add(task)
+        return task
+
+    def wants(self, headers: List[Tuple[bytes, bytes]]) -> bool:
+        if self.header is None:
+            return False
+        name, expected = self.header
+        for key, value in headers:
+            if key.decode("latin-1").lower() == name:
+                return expected is None or value.decode("latin-1") == expected
+        return False
+
+    def tag_current_task(self) -> None:
+        task = asyncio.current_task()
+        if task is not None:
+            self._tagged.add(task)
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def summary(self, top: int = 25) -> Dict[str, Any]:
+        leaves: Counter = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return {
+            "samples": self.samples,
+            "duration_seconds": round(self.duration, 3),
+            "interval_ms": self.interval * 1000,
+            "filter": "=".join(p for p in self.header if p) if self.header else None,
+            "top_self": [{"frame": f, "samples": n} for f, n in leaves.most_common(top)],
+            "stacks": [{"stack": s, "samples": n} for s, n in self.stacks.most_common(top)],
+        }
+
+
+_active: Optional[SamplingProfiler] = None
+
+
+async def run_profile(
+    seconds: float,
+    interval: float = 0.005,
+    header: Optional[Tuple[str, Optional[str]]] = None,
+    include_idle: bool = False,
+) -> SamplingProfiler:
+    """Profile this process for ``seconds``; one profile at a time (else ``ProfilerBusy``)."""
+    global _active
+    if _active is not None:
+        raise ProfilerBusy("a profile is already running")
+    profiler = SamplingProfiler(interval, header, include_idle)
+    _active = profiler
+    profiler.start(asyncio.get_running_loop())
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+        _active = None
+    return profiler
+
+
+class ProfileTagMiddleware:
+    """Pure ASGI middleware marking requests that match the running profile's header filter."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        profiler = _active
+        if profiler is not None and scope["type"] == "http" and profiler.wants(scope.get("headers") or []):
+            profiler.tag_current_task()
+        await self.app(scope, receive, send)
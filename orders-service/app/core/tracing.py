@@ -0,0 +1,353 @@
+"""Lightweight distributed tracing with W3C ``traceparent`` propagation (TRACING_ENABLED).
+
+Every HTTP request gets a server span (``TracingMiddleware``), continuing the caller's
+trace when it sends ``traceparent``. Outbound calls open client spans and inject the
+header. Published events carry it in their AMQP headers, and the consumer continues the
+trace from there. SQL statements get child spans named after the operation and table
+(``SELECT user_snapshot``). Together these show where a slow request spent its time.
+
+The current span lives in a context variable, so it follows the request through awaits
+and tasks. New traces are sampled at TRACE_SAMPLE_RATE, and continued traces follow the
+caller's sampled flag. Unsampled spans still propagate ids but are not exported.
+Finished spans go to an exporter:
+
+- ``jsonl``: one JSON object per span in TRACE_PATH.
+- ``otlp``: OTLP/HTTP JSON batches posted to TRACE_OTLP_ENDPOINT.
+- ``memory``: kept in a list (tests).
+"""
+import asyncio
+import logging
+import os
+import random
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Mapping, NamedTuple, Optional, Set
+
+from app.core.capture import CaptureWriter
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT = "traceparent"
+_TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_SQL_TABLE_RE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+"?(\w+)', re.IGNORECASE)
+_OTLP_KINDS = {"internal": 1, "server": 2, "client": 3, "producer": 4, "consumer": 5}
+
+
+class SpanContext(NamedTuple):
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+
+def parse_traceparent(value: Optional[str]) -> Optional[SpanContext]:
+    match = _TRACEPARENT_RE.match((value or "").strip().lower())
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return SpanContext(match.group(1), match.group(2), bool(int(match.group(3), 16) & 1))
+
+
+class Span:
+    __slots__ = ("tracer", "name", "kind", "trace_id", "span_id", "parent_id", "sampled", "attributes", "error", "start", "_t0")
+
+    def __init__(self, tracer: "Tracer", name: str, kind: str, parent: Optional[SpanContext], attributes) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.span_id = os.urandom(8).hex()
+        if parent is None:
+            self.trace_id, self.parent_id = os.urandom(16).hex(), None
+            self.sampled = random.random() < tracer.sample_rate
+        else:
+            self.trace_id, self.parent_id, self.sampled = parent.trace_id, parent.span_id, parent.sampled
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.error: Optional[str] = None
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+
+    @property
+    def context(self) -> SpanContext:
+        return SpanContext(self.trace_id, self.span_id, self.sampled)
+
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def finish(self) -> None:
+        if self.sampled and self.tracer.exporter is not None:
+            self.tracer.exporter.export(
+                {
+                    "trace_id": self.trace_id,
+                    "span_id": self.span_id,
+                    "parent_id": self.parent_id,
+                    "service": self.tracer.service,
+                    "name": self.name,
+                    "kind": self.kind,
+                    "start": self.start,
+                    "duration_ms": round((time.perf_counter() - self._t0) * 1000, 3),
+                    "attributes": self.attributes,
+                    "error": self.error,
+                }
+            )
+
+
+class _NoopSpan:
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, exc: BaseException) -> None:
+        pass
+
+
+_NOOP = _NoopSpan()
+_current: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class JsonlExporter:
+    def __init__(self, path: str) -> None:
+        self._writer = CaptureWriter(path)
+
+    def export(self, span: Dict[str, Any]) -> None:
+        self._writer.record(span)
+
+    def flush(self) -> None:
+        self._writer.flush()
+
+
+class MemoryExporter:
+    def __init__(self) -> None:
+        self.spans: List[Dict[str, Any]] = []
+
+    def export(self, span: Dict[str, Any]) -> None:
+        self.spans.append(span)
+
+    def flush(self) -> None:
+        pass
+
+
+def to_otlp(spans: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """OTLP/HTTP JSON body for finished spans, grouped under their service."""
+    by_service: Dict[str, List[Dict[str, Any]]] = {}
+    for span in spans:
+        start_ns = int(span["start"] * 1e9)
+        otlp_span = {
+            "traceId": span["trace_id"],
+            "spanId": span["span_id"],
+            "name": span["name"],
+            "kind": _OTLP_KINDS.get(span["kind"], 1),
+            "startTimeUnixNano": str(start_ns),
+            "endTimeUnixNano": str(start_ns + int(span["duration_ms"] * 1e6)),
+            "attributes": [{"key": k, "value": {"stringValue": str(v)}} for k, v in span["attributes"].items()],
+            "status": {"code": 2, "message": span["error"]} if span["error"] else {"code": 1},
+        }
+        if span["parent_id"]:
+            otlp_span["parentSpanId"] = span["parent_id"]
+        by_service.setdefault(span["service"], []).append(otlp_span)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service}}]},
+                "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": items}],
+            }
+            for service, items in by_service.items()
+        ]
+    }
+
+
+class OtlpExporter:
+    """Buffer spans and POST them as OTLP/HTTP JSON, in the background, every ``batch_size`` spans or ``interval`` seconds.
+
+    ``flush`` (shutdown) posts whatever is still buffered synchronously, so the last spans
+    of a process are not lost; it blocks for at most the request timeout.
+    """
+
+    def __init__(self, endpoint: str, batch_size: int = 100, interval: float = 2.0, timeout: float = 5.0) -> None:
+        self.endpoint = endpoint
+        self.batch_size = batch_size
+        self.interval = interval
+        self.timeout = timeout
+        self._buffer: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        # the loop only keeps weak references to tasks; hold them until they finish
+        self._tasks: Set[asyncio.Task] = set()
+
+    def export(self, span: Dict[str, Any]) -> None:
+        self._buffer.append(span)
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.interval:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.flush()  # no loop in this thread, so nothing to block
+                return
+            batch, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            task = loop.create_task(self._post(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _post(self, batch: List[Dict[str, Any]]) -> None:
+        import httpx
+
+        try:
+            async with httpx.AsyncClient() as client:
+                await client.post(self.endpoint, json=to_otlp(batch), timeout=self.timeout)
+        except Exception as exc:  # collector down: tracing must not affect requests
+            logger.warning("trace export to %s failed: %s", self.endpoint, exc)
+
+    def flush(self) -> None:
+        batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        import httpx
+
+        try:
+            with httpx.Client() as client:
+                client.post(self.endpoint, json=to_otlp(batch), timeout=self.timeout)
+        except Exception as exc:
+            logger.warning("trace export to %s failed: %s", self.endpoint, exc)
+
+
+def exporter_from_settings(settings):
+    kind = settings.TRACE_EXPORTER
+    if kind == "otlp":
+        return OtlpExporter(settings.TRACE_OTLP_ENDPOINT)
+    if kind == "memory":
+        return MemoryExporter()
+    return JsonlExporter(settings.TRACE_PATH)
+
+
+class Tracer:
+    def __init__(self, service: str, sample_rate: float = 1.0, exporter=None, enabled: bool = True) -> None:
+        self.service = service
+        self.sample_rate = sample_rate
+        self.exporter = exporter
+        self.enabled = enabled
+
+    def current(self) -> Optional[Span]:
+        return _current.get()
+
+    def start_span(
+        self, name: str, kind: str = "internal", parent: Optional[SpanContext] = None, attributes=None
+    ) -> Span:
+        """A span that is not made current; the caller must ``finish()`` it."""
+        if parent is None:
+            current = _current.get()
+            parent = current.context if current is not None else None
+        return Span(self, name, kind, parent, attributes)
+
+    @contextmanager
+    def span(
+        self, name: str, kind: str = "internal", parent: Optional[SpanContext] = None, attributes=None
+    ) -> Iterator[Any]:
+        """Run the block as the current span (a child of ``parent`` or of the current span)."""
+        if not self.enabled:
+            yield _NOOP
+            return
+        span = self.start_span(name, kind, parent, attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.set_error(exc)
+            raise
+        finally:
+            _current.reset(token)
+            span.finish()
+
+    def inject(self, headers: Dict[str, str]) -> Dict[str, str]:
+        """Add the current span's ``traceparent`` to ``headers`` (returned for chaining)."""
+        current = _current.get()
+        if self.enabled and current is not None:
+            headers[TRACEPARENT] = current.traceparent()
+        return headers
+
+    def extract(self, headers: Optional[Mapping[str, Any]]) -> Optional[SpanContext]:
+        if not self.enabled or not headers:
+            return None
+        value = headers.get(TRACEPARENT)
+        return parse_traceparent(value.decode() if isinstance(value, bytes) else value)
+
+    def flush(self) -> None:
+        if self.exporter is not None:
+            self.exporter.flush()
+
+
+tracer = Tracer(
+    settings.TRACE_SERVICE_NAME,
+    sample_rate=settings.TRACE_SAMPLE_RATE,
+    exporter=exporter_from_settings(settings) if settings.TRACING_ENABLED else None,
+    enabled=settings.TRACING_ENABLED,
+)
+
+
+class TracingMiddleware:
+    """Pure ASGI middleware opening a server span per HTTP request."""
+
+    def __init__(self, app, tracer: Tracer = tracer) -> None:
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers") or []}
+        parent = self.tracer.extract(headers)
+        with self.tracer.span(f"{scope['method']} {scope['path']}", kind="server", parent=parent) as span:
+
+            async def send_with_status(message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
+            route = scope.get("route")
+            if route is not None and hasattr(span, "name"):
+                # name by route template so /orders/1/ and /orders/2/ aggregate
+                span.name = f"{scope['method']} {route.path}"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is None:
+        return
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    table = _SQL_TABLE_RE.search(statement)
+    span = tracer.start_span(
+        f"{operation} {table.group(1)}" if table else operation,
+        kind="client",
+        attributes={"db.system": conn.dialect.name, "db.statement": statement[:200]},
+    )
+    conn.info.setdefault("_trace_spans", []).append(span)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    spans = conn.info.get("_trace_spans")
+    if spans:
+        spans.pop().finish()
+
+
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    spans = conn.info.get("_trace_spans") if conn is not None else None
+    if spans:
+        span = spans.pop()
+        span.set_error(exception_context.original_exception)
+        span.finish()
+
+
+def instrument_sqlalchemy() -> None:
+    """Trace every SQL statement run inside a traced request (idempotent)."""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
@@ -1,12 +1,57 @@
+from typing import List
+
+from sqlalchemy import inspect, text
+
 from app.db.session import engine
 
+# Alembic head this code expects; bump together with every new migration in alembic/versions.
+SCHEMA_REVISION = "0005_add_owner_order_stats"
+
+
+def _stale_columns(sync_conn, metadata) -> List[str]:
+    # create_all only adds missing tables; columns added by later migrations stay missing
+    inspector = inspect(sync_conn)
+    missing = []
+    for table in metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(f"{table.name}.{column.name}" for column in table.columns if column.name not in existing)
+    return missing
+
+
+async def _create_tables(conn, metadata) -> None:
+    await conn.run_sync(metadata.create_all)
+    missing = await conn.run_sync(_stale_columns, metadata)
+    if missing:
+        raise RuntimeError(
+            f"database {conn.engine.url.render_as_string(hide_password=True)} predates the current models "
+            f"(missing {', '.join(missing)}); delete the dev database or run `alembic upgrade head`"
+        )
+
 
 async def init_db() -> None:
     # simple convenience for dev: create tables
     # ensure all models modules are imported so their tables are registered with metadata
     import app.models.order  # noqa: F401 - register order model
     import app.models.user_snapshot  # noqa: F401 - register snapshot model
+    import app.models.order_shard  # noqa: F401 - register shard metadata model
+    import app.models.order_rollup  # noqa: F401 - register analytics rollup model
+    import app.models.owner_order_stats  # noqa: F401 - register owner stats model
     from app.db.base import Base
 
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await _create_tables(conn, Base.metadata)
+
+
+async def check_schema_revision() -> str:
+    """Production startup: confirm migrations are applied with one query instead of DDL."""
+    try:
+        async with engine.connect() as conn:
+            current = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+    except Exception as exc:
+        raise RuntimeError(f"cannot read alembic_version ({exc}); run `alembic upgrade head`") from exc
+    if current != SCHEMA_REVISION:
+        raise RuntimeError(
+            f"database schema is at revision {current!r}, expected {SCHEMA_REVISION!r}; "
+            "run `alembic upgrade head`"
+        )
+    return current
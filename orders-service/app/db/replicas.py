@@ -0,0 +1,87 @@
+"""Read-replica routing for request sessions.
+
+``RoutingSession`` sends plain SELECTs to a healthy replica, chosen round-robin, and sends
+everything else to the primary: flushes, INSERT/UPDATE/DELETE, ``FOR UPDATE`` reads, and
+every statement after the session's first write (read-your-writes). A background health
+check takes replicas that fail ``SELECT 1`` out of rotation until they answer again. With
+no healthy replica, reads go to the primary.
+"""
+import asyncio
+import logging
+from itertools import count
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaSet:
+    def __init__(self, engines: List[AsyncEngine]) -> None:
+        self.engines = engines
+        self.healthy = {id(engine): True for engine in engines}
+        self._next = count()
+
+    def pick(self) -> Optional[AsyncEngine]:
+        """Next healthy replica in round-robin order, or None if there is none."""
+        for _ in range(len(self.engines)):
+            engine = self.engines[next(self._next) % len(self.engines)]
+            if self.healthy[id(engine)]:
+                return engine
+        return None
+
+    async def check(self, timeout: float = 2.0) -> None:
+        async def probe(engine: AsyncEngine) -> bool:
+            try:
+                async with engine.connect() as conn:
+                    await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout)
+                return True
+            except Exception as exc:
+                logger.warning("replica %s failed its health check: %s", engine.url.render_as_string(), exc)
+                return False
+
+        results = await asyncio.gather(*(probe(engine) for engine in self.engines))
+        for engine, ok in zip(self.engines, results):
+            self.healthy[id(engine)] = ok
+
+    async def run_health_checks(self, interval: float) -> None:
+        while True:
+            await self.check()
+            await asyncio.sleep(interval)
+
+    def snapshot(self) -> List[dict]:
+        return [
+            {"url": engine.url.render_as_string(), "healthy": self.healthy[id(engine)]}
+            for engine in self.engines
+        ]
+
+
+class RoutingSession(Session):
+    """Sync session class for ``sessionmaker(..., sync_session_class=RoutingSession)``.
+
+    ``primary`` and ``replicas`` are set by ``app.db.session`` when replicas are configured.
+    """
+
+    primary: Optional[AsyncEngine] = None
+    replicas: Optional[ReplicaSet] = None
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        is_write = (
+            self._flushing
+            or isinstance(clause, UpdateBase)
+            or getattr(clause, "_for_update_arg", None) is not None
+        )
+        if is_write:
+            self.wrote = True
+        if not self.wrote and self.replicas is not None:
+            replica = self.replicas.pick()
+            if replica is not None:
+                return replica.sync_engine
+        return self.primary.sync_engine
@@ -1,9 +1,14 @@
 from typing import AsyncGenerator
 
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
+from app.core import deadline, memory, tracing
 from app.core.config import settings
+from app.db.replicas import ReplicaSet, RoutingSession
+from app.db.sharding import ShardSet
+from app.db.sqlite import SerializedWriteSession, create_sqlite_engine, is_sqlite
 import os
 
 # Use configured POSTGRES_URI when available; fall back to an in-memory sqlite async DB for tests/environments
@@ -19,10 +24,61 @@ if not settings.POSTGRES_URI:
         )
 
 DATABASE_URL = settings.POSTGRES_URI or "sqlite+aiosqlite:///:memory:"
-engine = create_async_engine(DATABASE_URL, echo=False)
-_async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+if settings.TRACING_ENABLED:
+    # child spans for every SQL statement, on this and the replica/shard engines
+    tracing.instrument_sqlalchemy()
+if settings.MEMORY_DIAGNOSTICS_ENABLED:
+    # lets /admin/memory report identity map sizes
+    memory.track_sessions()
+
+
+def _create_engine(url: str):
+    if is_sqlite(url):
+        # single-node profile: pragmas, shared in-memory pool, serialised writers (app.db.sqlite)
+        return create_sqlite_engine(url, echo=False)
+    return create_async_engine(url, echo=False)
+
+
+engine = _create_engine(DATABASE_URL)
+_session_class = SerializedWriteSession if is_sqlite(DATABASE_URL) else AsyncSession
+# Primary-only sessions: background jobs, startup and write endpoints
+_async_session = sessionmaker(engine, class_=_session_class, expire_on_commit=False)
+
+# Optional read replicas (app.db.replicas); request sessions route plain reads to them
+replica_set = None
+_routing_session = _async_session
+if settings.POSTGRES_REPLICA_URIS:
+    replica_set = ReplicaSet([_create_engine(url) for url in settings.POSTGRES_REPLICA_URIS])
+    RoutingSession.primary, RoutingSession.replicas = engine, replica_set
+    _routing_session = sessionmaker(
+        class_=_session_class, sync_session_class=RoutingSession, expire_on_commit=False
+    )
+
+
+# Optional owner-sharded order storage (app.db.sharding); other tables stay on POSTGRES_URI
+shard_set = None
+if settings.ORDER_SHARD_URIS:
+    shard_set = ShardSet(
+        [_create_engine(url) for url in settings.ORDER_SHARD_URIS],
+        session_class=SerializedWriteSession if is_sqlite(settings.ORDER_SHARD_URIS[0]) else AsyncSession,
+    )
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    async with _routing_session() as session:
+        yield session
+
+
+async def get_primary_session() -> AsyncGenerator[AsyncSession, None]:
     async with _async_session() as session:
         yield session
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session, transaction, connection) -> None:
+    # Bound every statement in a request's transaction by what is left of its budget.
+    left = deadline.remaining()
+    if left is None or connection.dialect.name != "postgresql":
+        return
+    connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(1, int(left * 1000))}")
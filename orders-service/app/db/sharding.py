@@ -0,0 +1,170 @@
+"""Owner-sharded storage for the ``order`` table (ORDER_SHARD_URIS).
+
+Orders live in one of N shard databases, picked by a jump consistent hash of ``owner_id``, so
+every per-owner query touches one shard and growing N moves only ~1/N of the owners.
+
+Ids stay globally unique without coordination between shards: each shard database keeps
+a stable ``shard_id`` and a sequence counter in its ``order_shard`` row, and hands out
+``id = seq << ID_SHARD_BITS | shard_id`` in blocks of ``ID_BLOCK_SIZE``. The low bits name
+the shard that allocated an id, which is where a lookup by id tries first. Rows moved by
+a reshard keep their ids, so lookups then fall back to asking every shard. Counters always
+start above the largest id stored in any shard, or in the legacy unsharded ``order`` table
+passed to ``init`` (and in every reshard source), so copied rows never collide with new ones.
+"""
+import asyncio
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.models.order import Order
+from app.models.order_rollup import OrderRollup
+from app.models.order_shard import OrderShard
+from app.models.owner_order_stats import OwnerOrderStats
+
+ID_SHARD_BITS = 10
+MAX_SHARDS = 1 << ID_SHARD_BITS
+ID_BLOCK_SIZE = 64
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Lamping & Veach jump consistent hash: ``key`` -> bucket in ``[0, buckets)``."""
+    key &= 0xFFFFFFFFFFFFFFFF
+    b, j = -1, 0
+    while j < buckets:
+        b = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((b + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return b
+
+
+def shard_id_of(order_id: int) -> int:
+    return order_id & (MAX_SHARDS - 1)
+
+
+class Shard:
+    def __init__(self, index: int, engine: AsyncEngine, session_class=AsyncSession) -> None:
+        self.index = index
+        self.engine = engine
+        self.session = sessionmaker(engine, class_=session_class, expire_on_commit=False)
+        self.shard_id: Optional[int] = None
+        self._ids: Deque[int] = deque()
+
+    async def allocate_id(self) -> int:
+        if not self._ids:
+            async with self.session() as session:
+                seq_end = (
+                    await session.execute(
+                        update(OrderShard)
+                        .where(OrderShard.shard_id == self.shard_id)
+                        .values(next_seq=OrderShard.next_seq + ID_BLOCK_SIZE)
+                        .returning(OrderShard.next_seq)
+                    )
+                ).scalar_one()
+                await session.commit()
+            # another coroutine may have refilled meanwhile; both blocks are valid
+            self._ids.extend((seq << ID_SHARD_BITS) | self.shard_id for seq in range(seq_end - ID_BLOCK_SIZE, seq_end))
+        return self._ids.popleft()
+
+
+class ShardSet:
+    def __init__(self, engines: List[AsyncEngine], session_class=AsyncSession) -> None:
+        if not 0 < len(engines) <= MAX_SHARDS:
+            raise ValueError(f"need between 1 and {MAX_SHARDS} order shards, got {len(engines)}")
+        self.shards = [Shard(i, engine, session_class) for i, engine in enumerate(engines)]
+        self._by_shard_id: Dict[int, Shard] = {}
+
+    def for_owner(self, owner_id: int) -> Shard:
+        return self.shards[jump_hash(owner_id, len(self.shards))]
+
+    def for_order_id(self, order_id: int) -> Optional[Shard]:
+        """The shard that allocated ``order_id`` (where it lives unless it was resharded)."""
+        return self._by_shard_id.get(shard_id_of(order_id))
+
+    async def init(self, create_tables: bool = False, legacy: Sequence[AsyncEngine] = ()) -> None:
+        """Create tables (dev) and make sure every shard database has its ``order_shard`` row.
+
+        ``legacy`` are databases whose unsharded ``order`` rows may still be copied in by
+        ``app.scripts.reshard_orders``; every counter is raised above their ids first.
+        """
+        if create_tables:
+            tables = [Order.__table__, OrderShard.__table__, OrderRollup.__table__, OwnerOrderStats.__table__]
+            for shard in self.shards:
+                async with shard.engine.begin() as conn:
+                    await conn.run_sync(lambda c: Order.metadata.create_all(c, tables=tables))
+        await ensure_shard_rows(self.shards, legacy)
+        if legacy:
+            await raise_seq_floors(self.shards, legacy)
+        self._by_shard_id = {shard.shard_id: shard for shard in self.shards}
+
+    async def gather(self, fn) -> list:
+        """Run ``fn(session)`` on every shard concurrently; results in shard order."""
+
+        async def one(shard: Shard):
+            async with shard.session() as session:
+                return await fn(session)
+
+        return await asyncio.gather(*(one(shard) for shard in self.shards))
+
+
+async def ensure_shard_rows(shards: List[Shard], legacy: Sequence[AsyncEngine] = ()) -> None:
+    """Read or assign each database's stable shard id; start new counters above existing ids."""
+    missing = []
+    for shard in shards:
+        async with shard.session() as session:
+            shard.shard_id = (await session.execute(select(OrderShard.shard_id))).scalar()
+        if shard.shard_id is None:
+            missing.append(shard)
+    if not missing:
+        return
+    taken = {shard.shard_id for shard in shards if shard.shard_id is not None}
+    free = (i for i in range(MAX_SHARDS) if i not in taken)
+    floor = await _seq_floor(shards, legacy)
+    for shard in missing:
+        shard_id = next(free)
+        async with shard.session() as session:
+            session.add(OrderShard(shard_id=shard_id, next_seq=floor))
+            try:
+                await session.commit()
+            except IntegrityError:
+                # another process registered this database first; use its row
+                await session.rollback()
+                shard_id = (await session.execute(select(OrderShard.shard_id))).scalar_one()
+        shard.shard_id = shard_id
+
+
+async def _legacy_max_id(engine: AsyncEngine) -> int:
+    try:
+        async with engine.connect() as conn:
+            return (await conn.execute(select(func.max(Order.id)))).scalar() or 0
+    except DBAPIError:  # no ``order`` table there
+        return 0
+
+
+async def _seq_floor(shards: List[Shard], legacy: Sequence[AsyncEngine] = ()) -> int:
+    # above the largest id in *any* shard or legacy database: a copied row keeps its id,
+    # whatever its low bits
+    max_id = 0
+    for shard in shards:
+        async with shard.session() as session:
+            max_id = max(max_id, (await session.execute(select(func.max(Order.id)))).scalar() or 0)
+    for engine in legacy:
+        max_id = max(max_id, await _legacy_max_id(engine))
+    return (max_id >> ID_SHARD_BITS) + 1
+
+
+async def raise_seq_floors(shards: List[Shard], legacy: Sequence[AsyncEngine] = ()) -> None:
+    """Move every counter past the largest id stored in the shards and ``legacy`` databases.
+
+    Run before copying rows in (so no id handed out from now on can match one being copied)
+    and again afterwards.
+    """
+    floor = await _seq_floor(shards, legacy)
+    for shard in shards:
+        async with shard.session() as session:
+            await session.execute(update(OrderShard).where(OrderShard.next_seq < floor).values(next_seq=floor))
+            await session.commit()
+        shard._ids.clear()
@@ -0,0 +1,43 @@
+"""Connection pool warm-up run at startup, before the readiness probe reports ready."""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from app.services.order_service import crud_order
+from app.services.user_snapshot_service import get_snapshot, get_snapshots
+
+logger = logging.getLogger(__name__)
+
+Statement = Callable[[AsyncSession], Awaitable[object]]
+
+# The statements behind GET /orders/, GET /orders/{id}/ and owner enrichment. Running them
+# once per pooled connection fills SQLAlchemy's compiled cache and, on asyncpg, the
+# per-connection type introspection and prepared statement caches.
+HOT_STATEMENTS: Sequence[Statement] = (
+    lambda session: crud_order.get(session, id=0),
+    lambda session: crud_order.get_all(session, offset=0, limit=1),
+    lambda session: get_snapshot(session, 0),
+    lambda session: get_snapshots(session, [0]),
+)
+
+
+async def warm_pool(engine: AsyncEngine, connections: int, statements: Sequence[Statement] = HOT_STATEMENTS) -> int:
+    """Check out ``connections`` pool connections at once and run ``statements`` on each.
+
+    All connections are held concurrently so the pool really opens that many; they go back
+    to the pool warm. Returns how many connections were warmed.
+    """
+
+    async def warm_one() -> None:
+        async with engine.connect() as conn:
+            async with AsyncSession(bind=conn) as session:
+                for statement in statements:
+                    await statement(session)
+
+    results = await asyncio.gather(*(warm_one() for _ in range(connections)), return_exceptions=True)
+    failures = [r for r in results if isinstance(r, BaseException)]
+    if failures:
+        logger.warning("db warm-up: %d of %d connections failed: %r", len(failures), connections, failures[0])
+    return connections - len(failures)
@@ -1,10 +1,17 @@
 import asyncio
-import json
 import logging
 from typing import Any, Dict
 
+from sqlalchemy import delete
+
 from app.core.config import settings
+from app.core.encoding import decode
+from app.core.tracing import tracer
 from app.db.session import _async_session
+from app.models.user_snapshot import UserSnapshot
+from app.services.owner_validation import set_pending_status
+from app.services.user_client import forget_user
+from app.services.user_directory import user_directory
 from app.services.user_snapshot_service import upsert_snapshot
 
 
@@ -18,24 +25,39 @@ async def process_user_event(session, event: Dict[str, Any]) -> None:
     if etype in ("user.created", "user.updated"):
         user_id = payload.get("id")
         await upsert_snapshot(session, user_id=user_id, email=payload.get("email"), full_name=payload.get("full_name"))
+        if user_directory.ready:
+            user_directory.put(user_id, payload.get("email"), payload.get("full_name"))
+        # orders accepted before this owner was known locally are now validated
+        await set_pending_status(session, "confirmed", owner_id=user_id)
+        # drops the owner (and responses showing them) in every replica
+        await forget_user(user_id)
     elif etype == "user.deleted":
         # For deleted, we remove snapshot if present
         user_id = payload.get("id")
-        await session.execute("DELETE FROM user_snapshot WHERE user_id = :uid", {"uid": user_id})
+        await session.execute(delete(UserSnapshot).where(UserSnapshot.user_id == user_id))
         await session.commit()
+        if user_directory.ready:
+            user_directory.remove(user_id)
+        await forget_user(user_id)
 
 
 async def _consume_message(message) -> None:
     # Incoming message is provided by aio-pika; treat it as an object with .process() and .body
     async with message.process(ignore_processed=True):
-        body = message.body.decode()
         try:
-            ev = json.loads(body)
+            ev = decode(message.body, getattr(message, "content_type", None))
         except Exception:
             return
-        # open DB session and process
-        async with _async_session() as session:
-            await process_user_event(session, ev)
+        if isinstance(ev, dict) and "type" not in ev:
+            # user-service publishes the bare payload; the event type is the routing key
+            ev = {"type": getattr(message, "routing_key", None), "payload": ev}
+        routing_key = getattr(message, "routing_key", None)
+        # continue the trace of the request that published the event
+        parent = tracer.extract(getattr(message, "headers", None))
+        with tracer.span(f"consume {routing_key}", kind="consumer", parent=parent):
+            # open DB session and process
+            async with _async_session() as session:
+                await process_user_event(session, ev)
 
 
 async def run_consumer() -> None:
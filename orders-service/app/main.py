@@ -1,27 +1,162 @@
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
 
+from app.api.routes.admin import admin_router
 from app.api.routes.orders import orders_router
-from app.db.init_db import init_db
-from app.events.consumer import run_consumer
+from app.core import memory
+from app.core.admission import AdmissionController, AdmissionMiddleware
+from app.core.capture import TrafficCaptureMiddleware
+from app.core.config import settings
+from app.core.deadline import DeadlineMiddleware
+from app.core.leader import host_mutex, lead, leader_lock_from_settings
+from app.core.looplag import LoopLagMonitor
+from app.core.profiler import ProfileTagMiddleware
+from app.core.startup import StartupTimings
+from app.core.tracing import TracingMiddleware, tracer
+from app.db.init_db import check_schema_revision, init_db
+from app.db.session import _async_session, engine, replica_set, shard_set
+from app.db.warmup import warm_pool
+from app.services import user_client
+from app.services.background_jobs import refresh_user_directory, start_background_jobs
+from app.services.response_cache import response_cache
+from app.services.user_directory import user_directory
 import asyncio
+import logging
 
 
 def create_app() -> FastAPI:
     app = FastAPI(title="orders-service")
     app.include_router(orders_router, prefix="/api/v1")
+    app.include_router(admin_router, prefix="/api/v1")
+    if settings.REQUEST_BUDGET_SECONDS > 0:
+        app.add_middleware(DeadlineMiddleware, default_budget=settings.REQUEST_BUDGET_SECONDS)
+    if settings.CAPTURE_ENABLED:
+        app.add_middleware(
+            TrafficCaptureMiddleware,
+            path=settings.CAPTURE_PATH,
+            sample_rate=settings.CAPTURE_SAMPLE_RATE,
+            max_body_bytes=settings.CAPTURE_MAX_BODY_BYTES,
+            exclude_body_paths=settings.CAPTURE_EXCLUDE_BODY_PATHS,
+        )
+    if settings.GZIP_ENABLED:
+        # outside capture, so capture still records uncompressed bodies; small responses pass through
+        app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+    if settings.MEMORY_DIAGNOSTICS_ENABLED:
+        memory.register_size("response_cache", response_cache.stats)
+        memory.register_size("owner_cache", user_client.owner_cache.stats)
+        memory.register_size("user_directory", user_directory.memory_stats)
+    if settings.PROFILER_ENABLED:
+        # marks requests matching a running profile's header filter
+        app.add_middleware(ProfileTagMiddleware)
+    if settings.TRACING_ENABLED:
+        app.add_middleware(TracingMiddleware)
+    # outermost: a shed request costs no more than the 503 itself
+    app.state.admission = AdmissionController.from_settings(settings) if settings.ADMISSION_ENABLED else None
+    if app.state.admission is not None:
+        app.add_middleware(AdmissionMiddleware, controller=app.state.admission)
 
     app.state._consumer_task = None
+    app.state._snapshot_sync_task = None
+    app.state._leader_task = None
+    app.state._directory_refresh_task = None
+    app.state._replica_health_task = None
+    app.state._cache_listener_task = None
+    app.state.leader_lock = None
+    app.state.loop_monitor = LoopLagMonitor.from_settings(settings) if settings.LOOP_LAG_MONITOR_ENABLED else None
+    app.state.startup_timings = None
+    app.state.ready = False
+
+    def _start_jobs() -> None:
+        tasks = start_background_jobs()
+        app.state._consumer_task = tasks.get("consumer")
+        app.state._snapshot_sync_task = tasks.get("snapshot_sync")
+
+    def _stop_jobs() -> None:
+        # the leader lock was lost: another process may already be running them
+        for name in ("_consumer_task", "_snapshot_sync_task"):
+            task = getattr(app.state, name)
+            if task is not None:
+                task.cancel()
+            setattr(app.state, name, None)
 
     @app.on_event("startup")
     async def on_startup() -> None:
-        # Create tables on startup (development convenience)
-        await init_db()
-        # Start background consumer if configured
-        try:
-            app.state._consumer_task = asyncio.create_task(run_consumer())
-        except Exception:
-            # best-effort: do not fail startup if RabbitMQ is not available
-            app.state._consumer_task = None
+        timings = StartupTimings()
+        if app.state.loop_monitor is not None:
+            # first, so blocking work during startup is caught too
+            app.state.loop_monitor.start()
+        if settings.STARTUP_MODE == "production":
+            # Schema is owned by alembic; one query instead of create_all's catalog introspection
+            with timings.phase("schema_check"):
+                await check_schema_revision()
+            if shard_set is not None:
+                with timings.phase("order_shards"):
+                    # unsharded orders left on POSTGRES_URI may still be resharded in: new ids
+                    # must start above them
+                    await shard_set.init(legacy=[engine])
+        else:
+            # Create tables on startup (development convenience), one worker at a time
+            with timings.phase("init_db"):
+                async with host_mutex(settings.LEADER_LOCK_PATH + ".init"):
+                    await init_db()
+                    if shard_set is not None:
+                        await shard_set.init(create_tables=True, legacy=[engine])
+        if settings.USER_DIRECTORY_ENABLED:
+            with timings.phase("user_directory"):
+                async with _async_session() as session:
+                    loaded = await user_directory.load(session)
+            logging.getLogger(__name__).info("user directory loaded %d users: %s", loaded, user_directory.memory_stats())
+            if settings.USER_DIRECTORY_REFRESH_SECONDS > 0:
+                app.state._directory_refresh_task = asyncio.create_task(
+                    refresh_user_directory(settings.USER_DIRECTORY_REFRESH_SECONDS)
+                )
+        if user_client.owner_cache.backend is not None:
+            # owner deletes broadcast by other replicas
+            app.state._cache_listener_task = asyncio.create_task(user_client.owner_cache.listen())
+        if replica_set is not None:
+            app.state._replica_health_task = asyncio.create_task(
+                replica_set.run_health_checks(settings.REPLICA_HEALTH_INTERVAL_SECONDS)
+            )
+        # Consumer and snapshot sync run in one process only (see BACKGROUND_JOBS)
+        if settings.BACKGROUND_JOBS == "always":
+            _start_jobs()
+        elif settings.BACKGROUND_JOBS == "leader":
+            app.state.leader_lock = leader_lock_from_settings(settings, engine)
+            app.state._leader_task = asyncio.create_task(
+                lead(app.state.leader_lock, _start_jobs, _stop_jobs, settings.LEADER_RETRY_SECONDS)
+            )
+        # Warm pooled DB and user-service connections before /orders/ready lets traffic in
+        with timings.phase("warmup"):
+            warmed = await asyncio.gather(
+                warm_pool(engine, settings.WARMUP_DB_CONNECTIONS),
+                user_client.warm_up(settings.WARMUP_HTTP_CONNECTIONS),
+            )
+            if replica_set is not None:
+                await asyncio.gather(*(warm_pool(r, settings.WARMUP_DB_CONNECTIONS) for r in replica_set.engines))
+        logging.getLogger(__name__).info("warm-up: %d db connections, %d user-service connections", *warmed)
+        app.state.startup_timings = timings.report("orders-service")
+        app.state.ready = True
+
+    @app.on_event("shutdown")
+    async def on_shutdown() -> None:
+        app.state.ready = False
+        if app.state.loop_monitor is not None:
+            app.state.loop_monitor.stop()
+        for name in (
+            "_leader_task",
+            "_consumer_task",
+            "_snapshot_sync_task",
+            "_directory_refresh_task",
+            "_replica_health_task",
+            "_cache_listener_task",
+        ):
+            task = getattr(app.state, name)
+            if task is not None:
+                task.cancel()
+        if app.state.leader_lock is not None:
+            await app.state.leader_lock.release()
+        await user_client.close_client()
+        tracer.flush()
 
     return app
 
@@ -1,15 +1,19 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime
 from sqlalchemy.sql import func
 
 from app.db.base import Base
 
 
 class Order(Base):
-    id = Column(Integer, primary_key=True, index=True)
+    # 64-bit so sharded ids (seq << 10 | shard id, see app.db.sharding) fit; plain INTEGER on
+    # SQLite keeps it the rowid alias
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, index=True)
     item_name = Column(String, index=True, nullable=False)
     quantity = Column(Integer, default=1)
     owner_id = Column(Integer, index=True, nullable=False)  # references user-service user.id
     created_at = Column(DateTime, server_default=func.now())
+    # "confirmed", or "pending"/"rejected" when owner validation runs after the insert
+    status = Column(String, nullable=False, default="confirmed", server_default="confirmed")
 
     def to_dict(self):
         return {
@@ -18,4 +22,5 @@ class Order(Base):
             "quantity": self.quantity,
             "owner_id": self.owner_id,
             "created_at": self.created_at,
+            "status": self.status,
         }
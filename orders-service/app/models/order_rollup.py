@@ -0,0 +1,12 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer, String
+
+from app.db.base import Base
+
+
+class OrderRollup(Base):
+    # Orders created per hour and item (app.services.order_rollup), kept in step with the
+    # ``order`` table by every insert and stored next to it (on each shard when sharded)
+    bucket_start = Column(DateTime, primary_key=True)
+    item_name = Column(String, primary_key=True)
+    order_count = Column(Integer, nullable=False, default=0)
+    total_quantity = Column(BigInteger().with_variant(Integer, "sqlite"), nullable=False, default=0)
@@ -0,0 +1,10 @@
+from sqlalchemy import BigInteger, Column, Integer
+
+from app.db.base import Base
+
+
+class OrderShard(Base):
+    # One row per shard database (app.db.sharding): its stable shard id and the next block of
+    # order id sequence numbers to hand out. Unused when orders are not sharded.
+    shard_id = Column(Integer, primary_key=True, autoincrement=False)
+    next_seq = Column(BigInteger, nullable=False, default=1)
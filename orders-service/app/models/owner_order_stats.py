@@ -0,0 +1,12 @@
+from sqlalchemy import BigInteger, Column, DateTime, Integer
+
+from app.db.base import Base
+
+
+class OwnerOrderStats(Base):
+    # Per-owner order totals (app.services.owner_order_stats), written in the transaction that
+    # changes the owner's orders and stored next to them (on the owner's shard when sharded)
+    owner_id = Column(Integer, primary_key=True, autoincrement=False)  # references user-service user.id
+    order_count = Column(Integer, nullable=False, default=0)
+    total_quantity = Column(BigInteger().with_variant(Integer, "sqlite"), nullable=False, default=0)
+    last_order_at = Column(DateTime, nullable=True)
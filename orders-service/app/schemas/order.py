@@ -1,4 +1,5 @@
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -9,12 +10,38 @@ class OrderCreateSchema(BaseModel):
     owner_id: int
 
 
+class OrderCreateDBSchema(OrderCreateSchema):
+    status: str
+
+
 class OrderResponse(BaseModel):
     id: int
     item_name: str
     quantity: int
     owner_id: int
+    status: str = "confirmed"
     owner: dict | None = None
 
     class Config:
         from_attributes = True
+
+
+class OrderAnalyticsBucket(BaseModel):
+    bucket_start: datetime
+    item_name: Optional[str] = None  # set when grouped by item
+    order_count: int
+    total_quantity: int
+
+
+class OrderAnalyticsResponse(BaseModel):
+    granularity: str
+    start: datetime
+    end: datetime
+    buckets: List[OrderAnalyticsBucket]
+
+
+class OwnerOrderStatsResponse(BaseModel):
+    owner_id: int
+    order_count: int
+    total_quantity: int
+    last_order_at: Optional[datetime] = None  # None when the owner has no orders
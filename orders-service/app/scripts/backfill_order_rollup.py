@@ -0,0 +1,40 @@
+"""Build ``order_rollup`` from the ``order`` table in bulk.
+
+Each database holding orders is rebuilt with one ``INSERT ... SELECT ... GROUP BY``, the
+database doing the aggregation, in a single transaction. By default that means
+POSTGRES_URI, or every ORDER_SHARD_URIS database when orders are sharded. With
+``--since`` only buckets from that hour on are recomputed. Inserts keep the rollup
+current on their own, so run this once after ``alembic upgrade`` adds the table, and
+again after a reshard.
+
+Usage (from orders-service/):
+    python -m app.scripts.backfill_order_rollup
+    python -m app.scripts.backfill_order_rollup --db $SHARD0 $SHARD1 --since 2026-10-01T00:00
+"""
+import argparse
+import asyncio
+import json
+from datetime import datetime
+from functools import partial
+from typing import Dict, Optional, Sequence
+
+from app.models.order_rollup import OrderRollup
+from app.scripts.derived import add_database_arguments, database_urls, rebuild_each
+from app.services.order_rollup import rebuild
+
+
+async def backfill(urls: Sequence[str], since: Optional[datetime] = None, create_tables: bool = False) -> Dict[str, int]:
+    return await rebuild_each(urls, partial(rebuild, since=since), OrderRollup, create_tables)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_database_arguments(parser, "order_rollup")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="only rebuild buckets from this time on")
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(backfill(database_urls(parser, args), args.since, args.create_tables))))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
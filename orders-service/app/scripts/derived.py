@@ -0,0 +1,53 @@
+"""Shared plumbing for the scripts that rebuild a table derived from ``order``.
+
+``rebuild_each`` opens each database holding orders in turn and hands a session to the
+table's own ``rebuild`` function, which recomputes and commits it. ``database_urls``
+resolves the ``--db`` argument added by ``add_database_arguments``: by default
+POSTGRES_URI, or every ORDER_SHARD_URIS database when orders are sharded.
+"""
+import argparse
+from typing import Awaitable, Callable, Dict, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.db.sqlite import create_sqlite_engine, is_sqlite
+
+
+def engine_for(url: str) -> AsyncEngine:
+    return create_sqlite_engine(url) if is_sqlite(url) else create_async_engine(url)
+
+
+def add_database_arguments(parser: argparse.ArgumentParser, table: str) -> None:
+    parser.add_argument("--db", nargs="+", help="databases to rebuild (default: ORDER_SHARD_URIS or POSTGRES_URI)")
+    parser.add_argument("--create-tables", action="store_true", help=f"create {table} first (dev)")
+
+
+def database_urls(parser: argparse.ArgumentParser, args: argparse.Namespace) -> Sequence[str]:
+    urls = args.db or settings.ORDER_SHARD_URIS or [settings.POSTGRES_URI]
+    if not all(urls):
+        parser.error("no database configured; pass --db or set POSTGRES_URI")
+    return urls
+
+
+async def rebuild_each(
+    urls: Sequence[str],
+    rebuild: Callable[[AsyncSession], Awaitable[int]],
+    model,
+    create_tables: bool = False,
+) -> Dict[str, int]:
+    """Run ``rebuild`` against every database in ``urls``; rows written, keyed ``db0``, ``db1``, ..."""
+    stats = {}
+    for index, url in enumerate(urls):
+        engine = engine_for(url)
+        try:
+            if create_tables:
+                async with engine.begin() as conn:
+                    await conn.run_sync(lambda c: model.metadata.create_all(c, tables=[model.__table__]))
+            async with sessionmaker(engine, class_=AsyncSession)() as session:
+                # keyed by position: URLs carry credentials
+                stats[f"db{index}"] = await rebuild(session)
+        finally:
+            await engine.dispose()
+    return stats
@@ -0,0 +1,36 @@
+"""Rebuild ``owner_order_stats`` from the ``order`` table in bulk.
+
+Each database holding orders is rebuilt with one ``INSERT ... SELECT ... GROUP BY owner_id``
+in a single transaction, so readers see either the old or the new table. By default that
+means POSTGRES_URI, or every ORDER_SHARD_URIS database when orders are sharded. Writes keep
+the stats current on their own, so run this once after ``alembic upgrade`` adds the table,
+and again after a reshard moves owners between shards.
+
+Usage (from orders-service/):
+    python -m app.scripts.rebuild_owner_order_stats
+    python -m app.scripts.rebuild_owner_order_stats --db $SHARD0 $SHARD1
+"""
+import argparse
+import asyncio
+import json
+from typing import Dict, Optional, Sequence
+
+from app.models.owner_order_stats import OwnerOrderStats
+from app.scripts.derived import add_database_arguments, database_urls, rebuild_each
+from app.services.owner_order_stats import rebuild
+
+
+async def rebuild_all(urls: Sequence[str], create_tables: bool = False) -> Dict[str, int]:
+    return await rebuild_each(urls, rebuild, OwnerOrderStats, create_tables)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_database_arguments(parser, "owner_order_stats")
+    args = parser.parse_args(argv)
+    print(json.dumps(asyncio.run(rebuild_all(database_urls(parser, args), args.create_tables))))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
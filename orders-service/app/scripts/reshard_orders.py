@@ -0,0 +1,134 @@
+"""Move orders onto the shard their owner hashes to.
+
+Covers both the initial backfill (unsharded database -> shards) and growing the shard list.
+Each source is read in id order in batches. Rows whose owner now hashes to a different
+database are copied there with insert-or-ignore, so re-running after an interruption is
+safe. An id that already exists on the target stops the run unless that row is identical
+(copied by an earlier run). With ``--delete`` only rows now present on their target are
+removed from the source. Ids are preserved. Every shard's id counter is raised above the
+largest id in the sources and targets before the copy starts, and again afterwards.
+
+Usage (from orders-service/):
+    # backfill the unsharded table into two shards
+    python -m app.scripts.reshard_orders --from $POSTGRES_URI --to $SHARD0 $SHARD1 --delete
+    # grow from two to three shards: sources are the old list, targets the new one
+    python -m app.scripts.reshard_orders --from $SHARD0 $SHARD1 --to $SHARD0 $SHARD1 $SHARD2 --delete
+
+Deploy the new ORDER_SHARD_URIS before running a grow, so new orders already land on their
+final shard; lookups by id fall back to every shard while rows are in flight. Moved owners'
+stats do not follow their orders: run ``app.scripts.rebuild_owner_order_stats`` and
+``app.scripts.backfill_order_rollup`` against the new shard list afterwards.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import delete, select
+
+from app.db.sharding import ShardSet, raise_seq_floors
+from app.models.order import Order
+from app.scripts.derived import engine_for
+
+
+def _insert_ignore(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert(Order.__table__)
+
+
+class IdConflict(RuntimeError):
+    """A copied id is already taken on its target shard by a different order."""
+
+
+async def _copy(conn, batch: List[dict]) -> List[int]:
+    """Insert ``batch`` on a target; returns the ids now safe to delete from the source.
+
+    Those are the rows inserted here plus rows an interrupted earlier run already copied
+    (same id, identical columns). Any other existing row with the same id is a collision.
+    """
+    table = Order.__table__
+    stmt = _insert_ignore(conn.dialect.name).values(batch).on_conflict_do_nothing().returning(table.c.id)
+    inserted = set((await conn.execute(stmt)).scalars())
+    skipped = [row for row in batch if row["id"] not in inserted]
+    if skipped:
+        query = select(table).where(table.c.id.in_([row["id"] for row in skipped]))
+        stored = {row["id"]: dict(row) for row in (await conn.execute(query)).mappings()}
+        clashes = [row["id"] for row in skipped if stored.get(row["id"]) != row]
+        if clashes:
+            raise IdConflict(f"order ids {clashes} already belong to different orders on the target shard")
+    return [row["id"] for row in batch]
+
+
+async def reshard(
+    sources: Sequence[str],
+    targets: Sequence[str],
+    batch_size: int = 1000,
+    delete_moved: bool = False,
+    create_tables: bool = False,
+) -> Dict[str, int]:
+    shard_set = ShardSet([engine_for(url) for url in targets])
+    source_engines = {url: engine_for(url) for url in sources}
+    target_urls: List[str] = list(targets)
+    stats = {"scanned": 0, "moved": 0}
+    table = Order.__table__
+    try:
+        # counters above every source id before anything is copied, so ids the app allocates
+        # meanwhile cannot match a row still waiting to be copied
+        await shard_set.init(create_tables=create_tables, legacy=list(source_engines.values()))
+        for source_url, source in source_engines.items():
+            last_id: Optional[int] = 0
+            while last_id is not None:
+                async with source.connect() as conn:
+                    rows = (
+                        await conn.execute(
+                            select(table).where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+                        )
+                    ).mappings().all()
+                last_id = rows[-1]["id"] if rows else None
+                stats["scanned"] += len(rows)
+                moving: Dict[int, List[dict]] = {}
+                for row in rows:
+                    shard = shard_set.for_owner(row["owner_id"])
+                    if target_urls[shard.index] != source_url:
+                        moving.setdefault(shard.index, []).append(dict(row))
+                for index, batch in moving.items():
+                    shard = shard_set.shards[index]
+                    async with shard.engine.begin() as conn:
+                        copied = await _copy(conn, batch)
+                    if delete_moved:
+                        async with source.begin() as conn:
+                            await conn.execute(delete(table).where(table.c.id.in_(copied)))
+                    stats["moved"] += len(copied)
+        await raise_seq_floors(shard_set.shards)
+    finally:
+        for source in source_engines.values():
+            await source.dispose()
+        for shard in shard_set.shards:
+            await shard.engine.dispose()
+    return stats
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--from", dest="sources", nargs="+", required=True, help="database URLs to read orders from")
+    parser.add_argument("--to", dest="targets", nargs="+", required=True, help="the (new) ORDER_SHARD_URIS list, in order")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--delete", action="store_true", help="remove moved rows from their source")
+    parser.add_argument("--create-tables", action="store_true", help="create order tables on the targets (dev)")
+    args = parser.parse_args(argv)
+    try:
+        stats = asyncio.run(reshard(args.sources, args.targets, args.batch_size, args.delete, args.create_tables))
+    except IdConflict as exc:
+        # nothing from the conflicting batch was copied or deleted; earlier batches were
+        print(f"reshard stopped: {exc}", file=sys.stderr)
+        return 1
+    print(json.dumps(stats))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
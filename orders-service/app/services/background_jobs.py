@@ -0,0 +1,39 @@
+import asyncio
+import logging
+from typing import Dict
+
+from app.core.config import settings
+from app.db.session import _async_session
+from app.events.consumer import run_consumer
+from app.services.snapshot_sync import snapshot_syncer
+from app.services.user_directory import user_directory
+
+logger = logging.getLogger(__name__)
+
+
+def start_background_jobs() -> Dict[str, asyncio.Task]:
+    """Start the jobs that must run in exactly one process: the event consumer and snapshot sync.
+
+    Called from the elected leader (BACKGROUND_JOBS=leader), from every process
+    (BACKGROUND_JOBS=always) or from the dedicated ``python -m app.worker`` process.
+    """
+    tasks = {"consumer": asyncio.create_task(run_consumer())}
+    # Bootstrap / reconcile user_snapshot from the user-service change feed
+    if settings.SNAPSHOT_SYNC_ON_STARTUP or settings.SNAPSHOT_SYNC_INTERVAL_SECONDS > 0:
+        tasks["snapshot_sync"] = asyncio.create_task(snapshot_syncer.run(settings.SNAPSHOT_SYNC_INTERVAL_SECONDS))
+    return tasks
+
+
+async def refresh_user_directory(interval: float) -> None:
+    """Reload the in-memory user directory every ``interval`` seconds until cancelled.
+
+    Needed in every process: user events are consumed by one process only (and the queue is
+    shared across pods), so the other replicas only see changes through ``user_snapshot``.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with _async_session() as session:
+                await user_directory.load(session)
+        except Exception as exc:
+            logger.warning("user directory refresh failed: %s", exc)
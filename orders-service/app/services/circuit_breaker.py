@@ -0,0 +1,81 @@
+import time
+from typing import Any, Dict, Optional
+
+
+class CircuitBreaker:
+    """Minimal closed / open / half-open circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and callers are
+    expected to fail fast. Once ``reset_timeout`` seconds have passed a single probe
+    call is let through (half-open); its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+        self._short_circuited = 0
+        self._total_failures = 0
+        self._total_successes = 0
+
+    @property
+    def state(self) -> str:
+        if self._state == self.OPEN and self._opened_at is not None:
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+        return self._state
+
+    def allow(self) -> bool:
+        """Return True if a call may go out now."""
+        state = self.state
+        if state == self.CLOSED:
+            return True
+        if state == self.HALF_OPEN and not self._probe_in_flight:
+            self._state = self.HALF_OPEN
+            self._probe_in_flight = True
+            return True
+        self._short_circuited += 1
+        return False
+
+    def record_success(self) -> None:
+        self._total_successes += 1
+        self._failures = 0
+        self._state = self.CLOSED
+        self._opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._total_failures += 1
+        self._failures += 1
+        if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """Forget an in-flight half-open probe whose outcome will never be known."""
+        self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        opened_for = None
+        if self._opened_at is not None:
+            opened_for = round(time.monotonic() - self._opened_at, 3)
+        return {
+            "name": self.name,
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "failure_threshold": self.failure_threshold,
+            "reset_timeout": self.reset_timeout,
+            "open_for_seconds": opened_for,
+            "short_circuited": self._short_circuited,
+            "total_failures": self._total_failures,
+            "total_successes": self._total_successes,
+        }
@@ -0,0 +1,162 @@
+"""Hourly order rollups behind ``GET /orders/analytics``.
+
+``order_rollup`` holds one row per (hour, item_name) with the number of orders that exist
+and were created in that hour, and their total quantity: exactly what ``rebuild`` computes
+from ``order``. Every write path keeps it so in the transaction that writes the orders,
+so the rollup commits or rolls back with them. Inserts (``OrderCRUD.create`` and the write
+batcher) ``record`` them, deletes ``remove`` them, and updates ``replace`` the order's old
+values with its new ones. That costs one upsert per distinct (hour, item) in the write.
+Reports read at most one row per hour and item in the requested range, whatever the
+number of orders. Day buckets are summed from the hourly rows. With sharded orders each
+shard keeps a rollup of its own rows, and reports add them up.
+
+``rebuild`` recomputes the table from ``order`` with a single ``INSERT ... SELECT``
+(``python -m app.scripts.backfill_order_rollup``). Use it for the initial backfill, and
+to re-align per-shard rollups after a reshard. The totals across shards are not affected
+by moving rows.
+
+Bucket times use the database clock's zone (UTC for SQLite), like ``order.created_at``.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import Order
+from app.models.order_rollup import OrderRollup
+
+GRANULARITIES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+# buckets in a report when the caller gives no start
+DEFAULT_BUCKETS = {"hour": 24, "day": 30}
+
+
+def truncate(ts: datetime, granularity: str) -> datetime:
+    ts = ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0) if granularity == "day" else ts
+
+
+def _upsert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    stmt = dialect_insert(OrderRollup)
+    return stmt.on_conflict_do_update(
+        index_elements=[OrderRollup.bucket_start, OrderRollup.item_name],
+        set_={
+            "order_count": OrderRollup.order_count + stmt.excluded.order_count,
+            "total_quantity": OrderRollup.total_quantity + stmt.excluded.total_quantity,
+        },
+    )
+
+
+def _deltas(orders: Iterable[Order], sign: int) -> Dict[Tuple[datetime, str], List[int]]:
+    deltas: Dict[Tuple[datetime, str], List[int]] = defaultdict(lambda: [0, 0])
+    for order in orders:
+        if order.created_at is None:
+            continue
+        delta = deltas[(truncate(order.created_at, "hour"), order.item_name)]
+        delta[0] += sign
+        delta[1] += sign * (order.quantity or 0)
+    return deltas
+
+
+async def _apply(session: AsyncSession, deltas: Dict[Tuple[datetime, str], List[int]]) -> None:
+    rows = [
+        {"bucket_start": bucket, "item_name": item, "order_count": count, "total_quantity": quantity}
+        for (bucket, item), (count, quantity) in sorted(deltas.items())
+        if count or quantity
+    ]
+    if not rows:
+        return
+    await session.execute(_upsert((await session.connection()).dialect.name), rows)
+    if any(row["order_count"] < 0 for row in rows):
+        # a bucket whose last order went away disappears, as it would from ``rebuild``
+        emptied = [
+            and_(OrderRollup.bucket_start == row["bucket_start"], OrderRollup.item_name == row["item_name"])
+            for row in rows
+            if row["order_count"] < 0
+        ]
+        await session.execute(delete(OrderRollup).where(or_(*emptied), OrderRollup.order_count <= 0))
+
+
+async def record(session: AsyncSession, orders: Iterable[Order]) -> None:
+    """Add ``orders`` (flushed, with ``created_at`` loaded) to the rollup; the caller commits."""
+    await _apply(session, _deltas(orders, 1))
+
+
+async def remove(session: AsyncSession, orders: Iterable[Order]) -> None:
+    """Take deleted ``orders`` back out of the rollup; the caller commits."""
+    await _apply(session, _deltas(orders, -1))
+
+
+async def replace(session: AsyncSession, before: Order, after: Order) -> None:
+    """Move an updated order's contribution from its old values (``before``) to its new ones."""
+    deltas = _deltas([before], -1)
+    for key, (count, quantity) in _deltas([after], 1).items():
+        deltas[key][0] += count
+        deltas[key][1] += quantity
+    await _apply(session, deltas)
+
+
+async def fetch_hours(session: AsyncSession, start: datetime, end: datetime, by_item: bool) -> List[Tuple]:
+    """Hourly ``(bucket_start, item_name or None, order_count, total_quantity)`` rows in ``[start, end)``."""
+    columns = [OrderRollup.bucket_start, OrderRollup.item_name] if by_item else [OrderRollup.bucket_start]
+    query = (
+        select(*columns, func.sum(OrderRollup.order_count), func.sum(OrderRollup.total_quantity))
+        .where(OrderRollup.bucket_start >= start, OrderRollup.bucket_start < end)
+        .group_by(*columns)
+    )
+    rows = (await session.execute(query)).all()
+    return [tuple(row) if by_item else (row[0], None, row[1], row[2]) for row in rows]
+
+
+def merge(hour_rows: Iterable[Tuple], granularity: str) -> List[Dict[str, Any]]:
+    """Sum hourly rows (from one or more shards) into ``granularity`` buckets, in time order."""
+    totals: Dict[Tuple[datetime, Optional[str]], List[int]] = defaultdict(lambda: [0, 0])
+    for bucket, item, count, quantity in hour_rows:
+        total = totals[(truncate(bucket, granularity), item)]
+        total[0] += int(count or 0)
+        total[1] += int(quantity or 0)
+    out = []
+    for (bucket, item), (count, quantity) in sorted(totals.items(), key=lambda kv: (kv[0][0], kv[0][1] or "")):
+        entry: Dict[str, Any] = {"bucket_start": bucket, "order_count": count, "total_quantity": quantity}
+        if item is not None:
+            entry["item_name"] = item
+        out.append(entry)
+    return out
+
+
+def _hour_of(dialect: str, column):
+    if dialect == "postgresql":
+        return func.date_trunc("hour", column)
+    # SQLite: the text format SQLAlchemy's DateTime writes, so rebuilt keys match incremental ones
+    return func.strftime("%Y-%m-%d %H:00:00.000000", column)
+
+
+async def rebuild(session: AsyncSession, since: Optional[datetime] = None) -> int:
+    """Recompute the rollup (from ``since`` on, else entirely) from ``order``; returns rows written."""
+    since = truncate(since, "hour") if since is not None else None
+    hour = _hour_of((await session.connection()).dialect.name, Order.created_at)
+    source = (
+        select(
+            hour.label("bucket_start"),
+            Order.item_name,
+            func.count().label("order_count"),
+            func.coalesce(func.sum(Order.quantity), 0).label("total_quantity"),
+        )
+        .where(Order.created_at.is_not(None))
+        .group_by(hour, Order.item_name)
+    )
+    clear = delete(OrderRollup)
+    if since is not None:
+        source = source.where(hour >= since)
+        clear = clear.where(OrderRollup.bucket_start >= since)
+    await session.execute(clear)
+    result = await session.execute(
+        insert(OrderRollup).from_select(["bucket_start", "item_name", "order_count", "total_quantity"], source)
+    )
+    await session.commit()
+    return result.rowcount
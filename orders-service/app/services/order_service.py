@@ -1,10 +1,16 @@
+import heapq
+from itertools import islice
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 
 from pydantic import BaseModel as PydanticBaseModel
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.db.session import shard_set
+from app.db.sharding import ShardSet
 from app.models.order import Order
+from app.services import order_rollup, owner_order_stats
+from app.services.response_cache import response_cache
 
 
 # ----------------------------
@@ -22,9 +28,9 @@ class AsyncCRUD(Generic[TModel, TCreate, TUpdate]):
     def __init__(self, model: Type[TModel]) -> None:
         self._model_class = model
 
-    async def create(self, session: AsyncSession, obj_in: TCreate) -> TModel:
+    async def create(self, session: AsyncSession, obj_in: TCreate, **extra) -> TModel:
         data = obj_in.dict(exclude_unset=True)  # only use fields provided
-        instance = self._model_class(**data)
+        instance = self._model_class(**data, **extra)
         session.add(instance)
         await session.commit()
         await session.refresh(instance)  # refresh to get auto-generated fields like id
@@ -82,8 +88,151 @@ class AsyncCRUD(Generic[TModel, TCreate, TUpdate]):
         return db_obj
 
 
+# ----------------------------
+# Order CRUD
+# ----------------------------
+class OrderCRUD(AsyncCRUD[Order, PydanticBaseModel, PydanticBaseModel]):
+    """``AsyncCRUD`` for orders; every write invalidates the cached responses showing the order.
+
+    Every write also updates ``order_rollup`` (``app.services.order_rollup``) and
+    ``owner_order_stats`` (``app.services.owner_order_stats``), in the same transaction as
+    the order.
+    """
+
+    async def create(self, session: AsyncSession, obj_in: PydanticBaseModel, **extra) -> Order:
+        data = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        order = self._model_class(**data, **extra)
+        session.add(order)
+        await session.flush()
+        await session.refresh(order)  # id and created_at, which picks the rollup bucket
+        await order_rollup.record(session, [order])
+        await owner_order_stats.record(session, [order])
+        await session.commit()
+        response_cache.order_written(order.id, membership_changed=True)
+        return order
+
+    async def update(self, session: AsyncSession, *, db_obj: Optional[Order] = None, obj_in, **filter_by) -> Optional[Order]:
+        order = db_obj or await self.get(session, **filter_by)
+        if order is None:
+            return None
+        owners = {order.owner_id}
+        before = Order(item_name=order.item_name, quantity=order.quantity, created_at=order.created_at)
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        current_data = order.to_dict()
+        for field, value in update_data.items():
+            if field in current_data:
+                setattr(order, field, value)
+        session.add(order)
+        if {"item_name", "quantity", "created_at"} & update_data.keys():
+            await order_rollup.replace(session, before, order)
+        if {"owner_id", "quantity"} & update_data.keys():
+            await session.flush()
+            await owner_order_stats.recompute(session, owners | {order.owner_id})
+        await session.commit()
+        response_cache.order_written(order.id)
+        return order
+
+    async def delete(self, session: AsyncSession, *filters, db_obj: Optional[Order] = None, **filter_by) -> Optional[Order]:
+        order = db_obj or await self.get(session, *filters, **filter_by)
+        if order is None:
+            return None
+        await session.delete(order)
+        await session.flush()
+        await order_rollup.remove(session, [order])
+        await owner_order_stats.recompute(session, [order.owner_id])
+        await session.commit()
+        response_cache.order_written(order.id, membership_changed=True)
+        return order
+
+
+# ----------------------------
+# Owner-sharded order CRUD
+# ----------------------------
+class ShardedOrderCRUD(OrderCRUD):
+    """Same interface as ``AsyncCRUD``, backed by the shards in ``app.db.sharding``.
+
+    The ``session`` argument is accepted for compatibility and ignored: every call opens
+    sessions on the shard(s) it needs. Lookups that carry ``owner_id`` touch one shard;
+    lookups by id try the shard that allocated the id first; anything else fans out to
+    every shard, and listings are merged in id order.
+    """
+
+    def __init__(self, shards: ShardSet) -> None:
+        super().__init__(Order)
+        self.shards = shards
+
+    def _candidates(self, filter_by: Dict[str, Any]):
+        if "owner_id" in filter_by:
+            return [self.shards.for_owner(filter_by["owner_id"])]
+        first = self.shards.for_order_id(filter_by["id"]) if "id" in filter_by else None
+        rest = [shard for shard in self.shards.shards if shard is not first]
+        return [first] + rest if first is not None else rest
+
+    async def create(self, session: AsyncSession, obj_in: PydanticBaseModel) -> Order:
+        data = obj_in.dict(exclude_unset=True)
+        shard = self.shards.for_owner(data["owner_id"])
+        async with shard.session() as shard_session:
+            return await super().create(shard_session, obj_in, id=await shard.allocate_id())
+
+    async def get(self, session: AsyncSession, *filters, **filter_by) -> Optional[Order]:
+        for shard in self._candidates(filter_by):
+            async with shard.session() as shard_session:
+                found = await super().get(shard_session, *filters, **filter_by)
+            if found is not None:
+                return found
+        return None
+
+    async def get_all(
+        self, session: AsyncSession, *filters, offset: int = 0, limit: int = 100, **filter_by
+    ) -> List[Order]:
+        if "owner_id" in filter_by:
+            async with self.shards.for_owner(filter_by["owner_id"]).session() as shard_session:
+                return await super().get_all(shard_session, *filters, offset=offset, limit=limit, **filter_by)
+
+        # scatter-gather: each shard returns its first offset+limit rows in id order, the
+        # merged stream is cut to the requested page
+        query = select(Order).filter(*filters).filter_by(**filter_by).order_by(Order.id).limit(offset + limit)
+
+        async def fetch(shard_session: AsyncSession) -> List[Order]:
+            return (await shard_session.execute(query)).scalars().all()
+
+        per_shard = await self.shards.gather(fetch)
+        return list(islice(heapq.merge(*per_shard, key=lambda order: order.id), offset, offset + limit))
+
+    async def update(self, session: AsyncSession, *, db_obj: Optional[Order] = None, obj_in, **filter_by) -> Optional[Order]:
+        db_obj = db_obj or await self.get(session, **filter_by)
+        if db_obj is None:
+            return None
+        update_data = obj_in if isinstance(obj_in, dict) else obj_in.dict(exclude_unset=True)
+        shard = self.shards.for_owner(db_obj.owner_id)
+        target = self.shards.for_owner(update_data.get("owner_id", db_obj.owner_id))
+        if target is not shard:
+            return await self._move(db_obj, update_data, shard, target)
+        async with shard.session() as shard_session:
+            return await super().update(shard_session, db_obj=await shard_session.merge(db_obj), obj_in=update_data)
+
+    async def _move(self, db_obj: Order, update_data: Dict[str, Any], shard, target) -> Order:
+        # a new owner on another shard: the order follows it, keeping its id. Inserted on the
+        # target first, so a failure in between leaves a duplicate (found by id) rather than
+        # losing the order; each shard's derived rows are updated by create/delete there
+        current = db_obj.to_dict()
+        data = {**current, **{field: value for field, value in update_data.items() if field in current}}
+        async with target.session() as target_session:
+            moved = await super().create(target_session, data)
+        async with shard.session() as shard_session:
+            await super().delete(shard_session, db_obj=await shard_session.merge(db_obj))
+        return moved
+
+    async def delete(self, session: AsyncSession, *filters, db_obj: Optional[Order] = None, **filter_by) -> Optional[Order]:
+        db_obj = db_obj or await self.get(session, *filters, **filter_by)
+        if db_obj is None:
+            return None
+        async with self.shards.for_owner(db_obj.owner_id).session() as shard_session:
+            await super().delete(shard_session, db_obj=await shard_session.merge(db_obj))
+        return db_obj
+
+
 # ----------------------------
 # Order-specific CRUD instance
 # ----------------------------
-OrderCRUD = AsyncCRUD[Order, PydanticBaseModel, PydanticBaseModel]
-crud_order = OrderCRUD(Order)
+crud_order = ShardedOrderCRUD(shard_set) if shard_set is not None else OrderCRUD(Order)
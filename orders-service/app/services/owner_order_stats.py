@@ -0,0 +1,116 @@
+"""Per-owner order statistics behind ``GET /orders/owner-stats``.
+
+``owner_order_stats`` holds one row per owner: the number of orders, their total quantity
+and when the latest one was created. Writes keep it exact inside their own transaction:
+inserts (``OrderCRUD.create`` and the write batcher) add to it through ``record``, one
+upsert per distinct owner in the write. Updates that touch quantity or owner, and deletes,
+call ``recompute`` for the affected owners, which is one indexed aggregate over their
+orders. A lookup reads one primary-key row per owner, however many orders they have.
+
+All of an owner's orders live on one shard, so their stats row lives there too. An owner
+change within a shard recomputes both owners there; one across shards moves the order
+(``ShardedOrderCRUD``), which records it on the new owner's shard and recomputes the old
+owner on theirs.
+``rebuild`` recomputes the whole table from ``order`` with a single ``INSERT ... SELECT``
+(``python -m app.scripts.rebuild_owner_order_stats``). Use it for the initial backfill and
+after a reshard, which moves owners to other shards without their stats.
+
+Every order counts, whatever its status, as in ``order_rollup``.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.order import Order
+from app.models.owner_order_stats import OwnerOrderStats
+
+
+def _later(dialect: str, current, new):
+    # latest of two nullable timestamps
+    if dialect == "postgresql":
+        return func.greatest(current, new)  # ignores NULLs
+    # SQLite's scalar max() returns NULL if any argument is NULL
+    return func.max(func.coalesce(current, new), func.coalesce(new, current))
+
+
+def _upsert(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    stmt = dialect_insert(OwnerOrderStats)
+    return stmt.on_conflict_do_update(
+        index_elements=[OwnerOrderStats.owner_id],
+        set_={
+            "order_count": OwnerOrderStats.order_count + stmt.excluded.order_count,
+            "total_quantity": OwnerOrderStats.total_quantity + stmt.excluded.total_quantity,
+            "last_order_at": _later(dialect, OwnerOrderStats.last_order_at, stmt.excluded.last_order_at),
+        },
+    )
+
+
+async def record(session: AsyncSession, orders: Iterable[Order]) -> None:
+    """Add newly inserted ``orders`` (flushed, with ``created_at`` loaded) to their owners' stats; the caller commits."""
+    deltas: Dict[int, Dict[str, Any]] = {}
+    for order in orders:
+        delta = deltas.setdefault(
+            order.owner_id,
+            {"owner_id": order.owner_id, "order_count": 0, "total_quantity": 0, "last_order_at": None},
+        )
+        delta["order_count"] += 1
+        delta["total_quantity"] += order.quantity or 0
+        if order.created_at is not None and (delta["last_order_at"] is None or order.created_at > delta["last_order_at"]):
+            delta["last_order_at"] = order.created_at
+    if not deltas:
+        return
+    rows = [deltas[owner_id] for owner_id in sorted(deltas)]
+    await session.execute(_upsert((await session.connection()).dialect.name), rows)
+
+
+def _aggregate():
+    return select(
+        Order.owner_id,
+        func.count().label("order_count"),
+        func.coalesce(func.sum(Order.quantity), 0).label("total_quantity"),
+        func.max(Order.created_at).label("last_order_at"),
+    ).group_by(Order.owner_id)
+
+
+async def _replace(session: AsyncSession, owner_ids: Optional[Iterable[int]]) -> int:
+    source, clear = _aggregate(), delete(OwnerOrderStats)
+    if owner_ids is not None:
+        owner_ids = list(owner_ids)
+        source = source.where(Order.owner_id.in_(owner_ids))
+        clear = clear.where(OwnerOrderStats.owner_id.in_(owner_ids))
+    await session.execute(clear)
+    result = await session.execute(
+        insert(OwnerOrderStats).from_select(["owner_id", "order_count", "total_quantity", "last_order_at"], source)
+    )
+    return result.rowcount
+
+
+async def recompute(session: AsyncSession, owner_ids: Iterable[int]) -> None:
+    """Recompute ``owner_ids``' stats from their (flushed) orders; the caller commits."""
+    await _replace(session, owner_ids)
+
+
+async def rebuild(session: AsyncSession) -> int:
+    """Recompute every owner's stats from ``order`` and commit; returns rows written."""
+    written = await _replace(session, None)
+    await session.commit()
+    return written
+
+
+async def fetch(session: AsyncSession, owner_ids: Iterable[int]) -> List[Dict[str, Any]]:
+    """Stats rows for those of ``owner_ids`` that have any orders."""
+    query = select(OwnerOrderStats).where(OwnerOrderStats.owner_id.in_(list(owner_ids)))
+    return [
+        {
+            "owner_id": row.owner_id,
+            "order_count": row.order_count,
+            "total_quantity": row.total_quantity,
+            "last_order_at": row.last_order_at,
+        }
+        for row in (await session.execute(query)).scalars()
+    ]
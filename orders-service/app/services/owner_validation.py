@@ -0,0 +1,65 @@
+import asyncio
+import logging
+
+from fastapi import HTTPException
+from sqlalchemy import update
+
+from app.db.session import _async_session, shard_set
+from app.models.order import Order
+from app.services.response_cache import response_cache
+from app.services.user_client import get_user
+
+logger = logging.getLogger(__name__)
+
+
+async def set_pending_status(session, status: str, *, order_id: int | None = None, owner_id: int | None = None) -> int:
+    """Move pending orders (one order, or all of an owner's) to ``status``; returns rows changed.
+
+    With sharded orders, ``owner_id`` is required and the update runs on the owner's shard.
+    """
+    if shard_set is not None:
+        async with shard_set.for_owner(owner_id).session() as shard_session:
+            return await _set_pending_status(shard_session, status, order_id=order_id, owner_id=owner_id)
+    return await _set_pending_status(session, status, order_id=order_id, owner_id=owner_id)
+
+
+async def _set_pending_status(session, status: str, *, order_id: int | None, owner_id: int | None) -> int:
+    stmt = update(Order).where(Order.status == "pending")
+    if order_id is not None:
+        stmt = stmt.where(Order.id == order_id)
+    if owner_id is not None:
+        stmt = stmt.where(Order.owner_id == owner_id)
+    result = await session.execute(stmt.values(status=status))
+    await session.commit()
+    if result.rowcount:
+        if order_id is not None:
+            response_cache.order_written(order_id)
+        else:
+            response_cache.owner_changed(owner_id)
+    return result.rowcount
+
+
+async def confirm_pending_order(order_id: int, owner_id: int, attempts: int = 3, backoff: float = 1.0) -> str:
+    """Validate the owner of an order accepted as "pending" and record the outcome.
+
+    Runs after the response has been sent. If user-service stays unavailable the order is
+    left pending; a later user.created event for the owner confirms it (see the consumer).
+    """
+    for attempt in range(attempts):
+        try:
+            await get_user(owner_id)
+            status = "confirmed"
+        except HTTPException as exc:
+            if exc.status_code != 400:
+                if attempt < attempts - 1:
+                    await asyncio.sleep(backoff)
+                    backoff *= 2
+                continue
+            status = "rejected"
+        async with _async_session() as session:
+            await set_pending_status(session, status, order_id=order_id, owner_id=owner_id)
+        if status == "rejected":
+            logger.info("order %s rejected: owner %s does not exist", order_id, owner_id)
+        return status
+    logger.warning("order %s left pending: user-service unavailable", order_id)
+    return "pending"
@@ -0,0 +1,154 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+from app.core.config import settings
+
+LIST_TAG = "orders"
+
+
+def order_tag(order_id: int) -> str:
+    return f"order:{order_id}"
+
+
+def owner_tag(owner_id: int) -> str:
+    return f"owner:{owner_id}"
+
+
+def cache_key(route: str, **params: Any) -> str:
+    """Normalized key: the route template plus its parsed query parameters in name order."""
+    return route + "?" + "&".join(f"{name}={params[name]}" for name in sorted(params))
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+
+
+class _Entry(NamedTuple):
+    value: CachedResponse
+    tags: Tuple[str, ...]
+    expires_at: float
+
+
+class ResponseCache:
+    """LRU of rendered order read responses (RESPONSE_CACHE_ENABLED).
+
+    Entries are keyed by ``cache_key`` and tagged with what they render: ``order:{id}`` for
+    every order in them, ``owner:{id}`` for every owner, and ``orders`` for list pages.
+    Writers invalidate by tag, so a status change drops only the pages showing that order,
+    and a new or deleted order drops the list pages but no other order's detail.
+
+    Concurrent misses on one key share a single computation. A result computed while an
+    invalidation ran is returned but not stored. Invalidation only reaches this process, so
+    ``ttl`` bounds how stale an entry can get after a write handled by another worker.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 5.0) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._drop(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def _put(self, key: str, value: CachedResponse, tags: Iterable[str]) -> None:
+        self._drop(key)
+        entry = _Entry(value, tuple(set(tags)), time.monotonic() + self.ttl)
+        self._entries[key] = entry
+        for tag in entry.tags:
+            self._by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[Tuple[CachedResponse, Iterable[str]]]]
+    ) -> CachedResponse:
+        """Cached response for ``key``; on a miss ``compute()`` returns ``(response, tags)``."""
+        while True:
+            cached = self._get(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            flight = self._inflight.get(key)
+            if flight is None:
+                break
+            try:
+                return await asyncio.shield(flight)
+            except asyncio.CancelledError:
+                if not flight.cancelled():
+                    raise
+                # the request computing it went away; take over
+
+        self.misses += 1
+        flight = asyncio.get_running_loop().create_future()
+        self._inflight[key] = flight
+        epoch = self._epoch
+        try:
+            value, tags = await compute()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as exc:
+            flight.set_exception(exc)
+            flight.exception()  # waiters re-raise it; don't log it as never retrieved
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        flight.set_result(value)
+        if epoch == self._epoch:
+            self._put(key, value, tags)
+        return value
+
+    def invalidate(self, *tags: str) -> int:
+        """Drop every entry carrying any of ``tags``; returns how many were dropped."""
+        self._epoch += 1
+        keys = set()
+        for tag in tags:
+            keys |= self._by_tag.get(tag, set())
+        for key in keys:
+            self._drop(key)
+        return len(keys)
+
+    def order_written(self, order_id: int, membership_changed: bool = False) -> int:
+        """An order changed; ``membership_changed`` for inserts and deletes (list pages shift)."""
+        if membership_changed:
+            return self.invalidate(order_tag(order_id), LIST_TAG)
+        return self.invalidate(order_tag(order_id))
+
+    def owner_changed(self, owner_id: int) -> int:
+        """An owner's snapshot changed, or the status of their orders did."""
+        return self.invalidate(owner_tag(owner_id))
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+)
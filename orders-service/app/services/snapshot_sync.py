@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.core.config import settings
+from app.db.session import _async_session
+from app.services.response_cache import response_cache
+from app.services.user_client import get_user_changes
+from app.services.user_directory import user_directory
+from app.services.user_snapshot_service import bulk_upsert_snapshots
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotSyncer:
+    """Pull the user-service change feed into ``user_snapshot`` with bulk upserts.
+
+    The first run (no watermark) bootstraps every user; later runs only fetch users changed
+    since the last watermark, re-reading a small overlap window because ``updated_at`` ties
+    and clock skew could otherwise hide a change. Upserts are idempotent, so re-reading is
+    harmless. Deletions are not part of the feed and keep arriving as user.deleted events.
+    """
+
+    def __init__(self, page_size: int = 1000, overlap_seconds: float = 5.0) -> None:
+        self.page_size = page_size
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.watermark: Optional[datetime] = None
+        self.last_synced: int = 0
+
+    async def sync_once(self) -> int:
+        """Fetch every page changed since the watermark; returns the number of users upserted."""
+        since = self.watermark - self.overlap if self.watermark else None
+        cursor = since.isoformat() if since else None
+        after_id = 0
+        total = 0
+        while True:
+            page = await get_user_changes(since=cursor, after_id=after_id, limit=self.page_size)
+            items = page.get("items", [])
+            if items:
+                async with _async_session() as session:
+                    total += await bulk_upsert_snapshots(session, items)
+                if user_directory.ready:
+                    for user in items:
+                        user_directory.put(user["id"], user.get("email"), user.get("full_name"))
+                for user in items:
+                    response_cache.owner_changed(user["id"])
+            cursor, after_id = page.get("next_since") or cursor, page.get("next_after_id") or after_id
+            if not page.get("has_more"):
+                break
+        if cursor:
+            self.watermark = datetime.fromisoformat(cursor)
+        self.last_synced = total
+        return total
+
+    async def run(self, interval: float) -> None:
+        """Sync now, then every ``interval`` seconds (if positive) until cancelled."""
+        while True:
+            try:
+                count = await self.sync_once()
+                logger.info("user_snapshot sync upserted %d users (watermark=%s)", count, self.watermark)
+            except Exception as exc:  # user-service down or feed unavailable; try again later
+                logger.warning("user_snapshot sync failed: %s", exc)
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+
+
+snapshot_syncer = SnapshotSyncer(
+    page_size=settings.SNAPSHOT_SYNC_PAGE_SIZE,
+    overlap_seconds=settings.SNAPSHOT_SYNC_OVERLAP_SECONDS,
+)
@@ -1,45 +1,283 @@
 import asyncio
-from typing import Optional
+import time
+from functools import partial
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
 
 import httpx
 
 from fastapi import HTTPException
 
+from app.core import deadline
+from app.core.cache import CacheEntry, TieredCache, cache_backend_from_settings
+from app.core.encoding import accept_header, decode
 from app.core.config import settings
+from app.core.tracing import tracer
+from app.services.circuit_breaker import CircuitBreaker
+from app.services.response_cache import response_cache
 
+user_service_breaker = CircuitBreaker(
+    "user-service",
+    failure_threshold=settings.USER_SERVICE_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.USER_SERVICE_BREAKER_RESET_SECONDS,
+)
 
-async def get_user(user_id: int) -> dict:
-    """Fetch user and raise on errors (used during order create to validate owner exists)."""
+
+def _owner_invalidated(key: str) -> None:
+    # runs in every replica when an owner is dropped, so cached order responses follow
+    response_cache.owner_changed(int(key))
+
+
+# Last known good owners, {"user": ..., "etag": ...} by user id (app.core.cache). Revalidated
+# with If-None-Match on the next lookup, served while the breaker is open, and served without
+# asking user-service while younger than USER_SERVICE_CACHE_FRESH_SECONDS.
+owner_cache = TieredCache(
+    "owners",
+    backend=cache_backend_from_settings(settings),
+    ttl=settings.USER_SERVICE_CACHE_TTL,
+    max_entries=settings.USER_SERVICE_CACHE_SIZE,
+    on_invalidate=_owner_invalidated,
+)
+
+
+async def cached_user(user_id: int) -> Optional[dict]:
+    entry = await owner_cache.get(str(user_id))
+    return entry.value["user"] if entry is not None else None
+
+
+async def _fresh_user(user_id: int) -> Optional[dict]:
+    fresh_for = settings.USER_SERVICE_CACHE_FRESH_SECONDS
+    if fresh_for <= 0:
+        return None
+    entry = await owner_cache.get(str(user_id))
+    return entry.value["user"] if entry is not None and entry.age < fresh_for else None
+
+
+async def forget_user(user_id: int) -> None:
+    """Drop a changed or deleted owner from every replica's cache."""
+    await owner_cache.delete(str(user_id))
+
+
+# Keep-alive client shared by all lookups once open_client() has run (app startup); until
+# then each request opens and closes its own connection.
+_client: Optional[httpx.AsyncClient] = None
+
+
+def open_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.USER_SERVICE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.USER_SERVICE_MAX_CONNECTIONS,
+            )
+        )
+    return _client
+
+
+async def close_client() -> None:
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
+
+
+async def warm_up(connections: int, timeout: float = 2.0) -> int:
+    """Open ``connections`` keep-alive connections to user-service on the shared client.
+
+    Issues that many concurrent lookups of a non-existent user so TCP/TLS setup happens
+    before the first real request. Outcomes are not fed to the circuit breaker. Returns
+    the number of requests that got a response.
+    """
+    client = open_client()
+    url = f"{settings.USER_SERVICE_URL}/users/0/"
+    results = await asyncio.gather(
+        *(client.get(url, timeout=timeout) for _ in range(connections)), return_exceptions=True
+    )
+    return sum(1 for r in results if isinstance(r, httpx.Response))
+
+
+async def _get(url: str, timeout: float, extra_headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    headers = {"Accept": accept_header(settings.USER_SERVICE_ENCODING), **(extra_headers or {})}
+    left = deadline.remaining()
+    if left is not None:
+        # let user-service know how long we are prepared to wait
+        headers[deadline.DEADLINE_HEADER] = str(int(left * 1000))
+    with tracer.span("GET user-service", kind="client", attributes={"http.url": url}) as span:
+        tracer.inject(headers)
+        if _client is not None:
+            resp = await _client.get(url, timeout=timeout, headers=headers)
+        else:
+            async with httpx.AsyncClient() as client:
+                resp = await client.get(url, timeout=timeout, headers=headers)
+        span.set_attribute("http.status_code", resp.status_code)
+        return resp
+
+
+async def _hedged_get(url: str, timeout: float, extra_headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    """GET ``url``, firing a second identical request if the first is slower than the hedge delay.
+
+    Whichever attempt completes first wins and the other is cancelled.
+    """
+    delay = settings.USER_SERVICE_HEDGE_DELAY
+    if not delay or delay >= timeout:
+        return await _get(url, timeout, extra_headers)
+    primary = asyncio.ensure_future(_get(url, timeout, extra_headers))
+    pending = {primary}
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        hedge = asyncio.ensure_future(_get(url, timeout - delay, extra_headers))
+        pending = {primary, hedge}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+        # both attempts failed: surface the primary's error
+        return primary.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def _body(resp: httpx.Response) -> Any:
+    """Decode a user-service response in whatever encoding it negotiated (JSON or msgpack)."""
+    return decode(resp.content, resp.headers.get("content-type"))
+
+
+async def _call(
+    url: str, timeout: float, hedge: bool = True, extra_headers: Optional[Dict[str, str]] = None
+) -> httpx.Response:
+    """Issue a user-service request and feed the outcome into the breaker."""
+    try:
+        resp = await (_hedged_get(url, timeout, extra_headers) if hedge else _get(url, timeout, extra_headers))
+    except asyncio.CancelledError:
+        # caller gave up (e.g. request deadline); not evidence that user-service is down
+        user_service_breaker.release_probe()
+        raise
+    except BaseException:
+        user_service_breaker.record_failure()
+        raise
+    if resp.status_code >= 500:
+        user_service_breaker.record_failure()
+    else:
+        user_service_breaker.record_success()
+    return resp
+
+
+async def _lookup(user_id: int, timeout: float) -> Tuple[int, Optional[dict]]:
+    """GET one user, revalidating the cached copy if there is one; returns (status, user).
+
+    Concurrent lookups of one user in this process share a request. A 304 refreshes the
+    cached entry and counts as a 200 with the cached user.
+    """
+    key = str(user_id)
+    # read before the cached entry: an answer that raced a forget_user() must not be stored
+    epoch = owner_cache.epoch
+    entry = await owner_cache.get(key)
+    return await owner_cache.single_flight(key, partial(_fetch, user_id, timeout, entry, epoch))
+
+
+async def _fetch(user_id: int, timeout: float, entry: Optional[CacheEntry], epoch: int) -> Tuple[int, Optional[dict]]:
+    key = str(user_id)
+    claimed = False
+    if settings.USER_SERVICE_CACHE_FRESH_SECONDS > 0:
+        started = time.time()
+        claimed = await owner_cache.claim(key, timeout)
+        if not claimed:
+            # another replica is fetching this owner; take its answer if it lands in time
+            filled = await owner_cache.wait_for_fill(key, started, timeout)
+            if filled is not None:
+                return 200, filled.value["user"]
+    try:
+        return await _fetch_remote(user_id, timeout, entry, epoch)
+    finally:
+        if claimed:
+            await owner_cache.release(key)
+
+
+async def _fetch_remote(
+    user_id: int, timeout: float, entry: Optional[CacheEntry], epoch: int
+) -> Tuple[int, Optional[dict]]:
+    key = str(user_id)
     url = f"{settings.USER_SERVICE_URL}/users/{user_id}/"
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, timeout=5.0)
+    etag = entry.value.get("etag") if entry is not None else None
+    resp = await _call(url, timeout=timeout, extra_headers={"If-None-Match": etag} if etag else None)
+    if resp.status_code == 304 and entry is not None:
+        await owner_cache.set(key, entry.value, epoch=epoch)
+        return 200, entry.value["user"]
+    if resp.status_code == 200:
+        user = _body(resp)
+        await owner_cache.set(key, {"user": user, "etag": resp.headers.get("etag")}, epoch=epoch)
+        return 200, user
     if resp.status_code == 404:
+        await owner_cache.delete(key)
+    return resp.status_code, None
+
+
+async def get_user(user_id: int) -> dict:
+    """Fetch user and raise on errors (used during order create to validate owner exists)."""
+    fresh = await _fresh_user(user_id)
+    if fresh is not None:
+        return fresh
+    if not user_service_breaker.allow():
+        cached = await cached_user(user_id)
+        if cached is not None:
+            return cached
+        raise HTTPException(status_code=503, detail="User service unavailable")
+    try:
+        status, user = await _lookup(user_id, timeout=deadline.clamp(5.0))
+    except (httpx.RequestError, httpx.TimeoutException):
+        raise HTTPException(status_code=503, detail="User service unavailable")
+    if status == 404:
         raise HTTPException(status_code=400, detail="Owner user not found")
-    if resp.status_code >= 400:
+    if user is None:
         raise HTTPException(status_code=503, detail="User service unavailable")
-    return resp.json()
+    return user
 
 
 async def safe_get_user(user_id: int, retries: int = 1, timeout: float = 2.0) -> Optional[dict]:
     """Attempt to fetch user but return None on failure; used for enrichment where failure should not bring down the request.
 
-    This function retries `retries` times with exponential backoff.
+    This function retries `retries` times with exponential backoff. While the user-service
+    circuit breaker is open, or once the request deadline has passed, it returns the last
+    known copy of the user (or None) immediately. Timeouts and backoff never outlive the
+    current request deadline.
     """
-    url = f"{settings.USER_SERVICE_URL}/users/{user_id}/"
+    fresh = await _fresh_user(user_id)
+    if fresh is not None:
+        return fresh
     backoff = 0.5
     for attempt in range(retries + 1):
+        if deadline.expired() or not user_service_breaker.allow():
+            return await cached_user(user_id)
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(url, timeout=timeout)
-            if resp.status_code == 200:
-                return resp.json()
-            if resp.status_code == 404:
+            status, user = await _lookup(user_id, timeout=deadline.clamp(timeout))
+            if status == 200:
+                return user
+            if status == 404:
                 return None
         except (httpx.RequestError, httpx.TimeoutException):
-            # transient failure – will retry if attempts remain
-            if attempt < retries:
-                await asyncio.sleep(backoff)
-                backoff *= 2
-                continue
-            return None
-    return None
+            pass
+        # transient failure – will retry if attempts remain and the budget allows
+        left = deadline.remaining()
+        if attempt < retries and (left is None or left > backoff):
+            await asyncio.sleep(backoff)
+            backoff *= 2
+    return await cached_user(user_id)
+
+
+async def get_user_changes(since: Optional[str] = None, after_id: int = 0, limit: int = 1000) -> Dict[str, Any]:
+    """Fetch one page of the user-service change feed (users changed after the cursor).
+
+    Raises httpx errors / HTTPStatusError so callers (snapshot sync) can back off.
+    """
+    params: Dict[str, Any] = {"after_id": after_id, "limit": limit}
+    if since:
+        params["since"] = since
+    url = f"{settings.USER_SERVICE_URL}/users/changes?{urlencode(params)}"
+    resp = await _call(url, timeout=30.0, hedge=False)
+    resp.raise_for_status()
+    return _body(resp)
@@ -0,0 +1,207 @@
+import asyncio
+import sys
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user_snapshot import UserSnapshot
+
+_SEP = "\x1f"  # unit separator between email and full_name in a packed entry
+
+
+def _merge(ids: array, values: List[str], changes: Dict[int, Optional[str]]) -> Tuple[array, List[str], int]:
+    """Apply ``changes`` to the sorted base in one pass; also returns the new values' bytes."""
+    updates = sorted(changes.items())
+    new_ids, new_values = array("q"), []
+    j, n = 0, len(updates)
+    for user_id, packed in zip(ids, values):
+        while j < n and updates[j][0] < user_id:
+            if updates[j][1] is not None:
+                new_ids.append(updates[j][0])
+                new_values.append(updates[j][1])
+            j += 1
+        if j < n and updates[j][0] == user_id:
+            packed = updates[j][1]
+            j += 1
+        if packed is not None:
+            new_ids.append(user_id)
+            new_values.append(packed)
+    for user_id, packed in updates[j:]:
+        if packed is not None:
+            new_ids.append(user_id)
+            new_values.append(packed)
+    return new_ids, new_values, sum(sys.getsizeof(packed) for packed in new_values)
+
+
+def _entry_bytes(user_id: int, packed: Optional[str]) -> int:
+    return sys.getsizeof(user_id) + sys.getsizeof(packed)
+
+
+class UserDirectory:
+    """Memory-resident, read-mostly replica of ``user_snapshot`` (id -> email, full_name).
+
+    The bulk-loaded base is stored column-wise: user ids in a sorted ``array('q')`` (8
+    bytes each, searched with bisect) and, in a parallel list, one string per user packing
+    email and full name. Changes after the load go to a small overlay dict (``None`` marks
+    a delete). Once it grows past ``compact_ratio`` it is frozen and merged into a new base
+    in a worker thread, while a fresh overlay takes further changes, so the event loop
+    never sorts or copies the whole directory. That is roughly 100 bytes per user against
+    several hundred for a dict of dicts. Entry and byte counts are kept as running totals.
+    """
+
+    __slots__ = (
+        "_ids",
+        "_values",
+        "_overlay",
+        "_frozen",
+        "_count",
+        "_value_bytes",
+        "_overlay_bytes",
+        "_frozen_bytes",
+        "_generation",
+        "compact_ratio",
+        "ready",
+    )
+
+    def __init__(self, compact_ratio: float = 0.1) -> None:
+        self._ids = array("q")
+        self._values: List[str] = []
+        self._overlay: Dict[int, Optional[str]] = {}
+        self._frozen: Dict[int, Optional[str]] = {}  # overlay being merged by a worker thread
+        self._count = 0
+        self._value_bytes = 0
+        self._overlay_bytes = 0
+        self._frozen_bytes = 0
+        self._generation = 0  # bumped by load(); a merge started before it is discarded
+        self.compact_ratio = compact_ratio
+        self.ready = False
+
+    @staticmethod
+    def _pack(email: Optional[str], full_name: Optional[str]) -> str:
+        return f"{email or ''}{_SEP}{full_name or ''}"
+
+    @staticmethod
+    def _unpack(user_id: int, packed: str) -> dict:
+        email, _, full_name = packed.partition(_SEP)
+        return {"id": user_id, "email": email or None, "full_name": full_name or None}
+
+    def _base_get(self, user_id: int) -> Optional[str]:
+        pos = bisect_left(self._ids, user_id)
+        if pos < len(self._ids) and self._ids[pos] == user_id:
+            return self._values[pos]
+        return None
+
+    def _packed(self, user_id: int) -> Optional[str]:
+        if user_id in self._overlay:
+            return self._overlay[user_id]
+        if user_id in self._frozen:
+            return self._frozen[user_id]
+        return self._base_get(user_id)
+
+    def get(self, user_id: int) -> Optional[dict]:
+        packed = self._packed(user_id)
+        return None if packed is None else self._unpack(user_id, packed)
+
+    def get_many(self, user_ids: Iterable[int]) -> Dict[int, dict]:
+        found = {}
+        for user_id in set(user_ids):
+            owner = self.get(user_id)
+            if owner is not None:
+                found[user_id] = owner
+        return found
+
+    def put(self, user_id: int, email: Optional[str], full_name: Optional[str]) -> None:
+        self._set(user_id, self._pack(email, full_name))
+
+    def remove(self, user_id: int) -> None:
+        self._set(user_id, None)
+
+    def _set(self, user_id: int, packed: Optional[str]) -> None:
+        if self._packed(user_id) is not None:
+            self._count -= 1
+        if user_id in self._overlay:
+            self._overlay_bytes -= _entry_bytes(user_id, self._overlay[user_id])
+        self._overlay[user_id] = packed
+        self._overlay_bytes += _entry_bytes(user_id, packed)
+        if packed is not None:
+            self._count += 1
+        self._maybe_compact()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _maybe_compact(self) -> None:
+        if self._frozen or len(self._overlay) <= max(1024, self.compact_ratio * len(self._ids)):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.compact()
+            return
+        self._frozen, self._overlay = self._overlay, {}
+        self._frozen_bytes, self._overlay_bytes = self._overlay_bytes, 0
+        generation = self._generation
+        merging = loop.run_in_executor(None, _merge, self._ids, self._values, self._frozen)
+        merging.add_done_callback(lambda done: self._merged(done, generation))
+
+    def _merged(self, done: asyncio.Future, generation: int) -> None:
+        # back on the event loop: swap in the merged base; the live overlay stays on top
+        if generation != self._generation or done.cancelled():
+            return
+        if done.exception() is not None:
+            # keep serving from base + frozen overlay; fold it back so a later merge retries
+            self._frozen.update(self._overlay)
+            self._overlay, self._frozen = self._frozen, {}
+            self._overlay_bytes = sum(_entry_bytes(k, v) for k, v in self._overlay.items())
+            self._frozen_bytes = 0
+            return
+        self._ids, self._values, self._value_bytes = done.result()
+        self._frozen, self._frozen_bytes = {}, 0
+
+    def compact(self) -> None:
+        """Fold the overlay into the sorted base arrays now, on the calling thread."""
+        changes = {**self._frozen, **self._overlay}
+        self._ids, self._values, self._value_bytes = _merge(self._ids, self._values, changes)
+        self._overlay, self._frozen = {}, {}
+        self._overlay_bytes = self._frozen_bytes = 0
+        self._generation += 1  # a merge still running in a thread would be stale
+
+    async def load(self, session: AsyncSession, chunk_size: int = 10000) -> int:
+        """Replace the contents with every row of ``user_snapshot``, streamed in id order."""
+        ids = array("q")
+        values: List[str] = []
+        value_bytes = 0
+        query = select(UserSnapshot.user_id, UserSnapshot.email, UserSnapshot.full_name).order_by(
+            UserSnapshot.user_id
+        )
+        result = await session.stream(query.execution_options(yield_per=chunk_size))
+        async for user_id, email, full_name in result:
+            packed = self._pack(email, full_name)
+            ids.append(user_id)
+            values.append(packed)
+            value_bytes += sys.getsizeof(packed)
+        self._ids, self._values, self._overlay, self._frozen = ids, values, {}, {}
+        self._count, self._value_bytes, self._overlay_bytes, self._frozen_bytes = len(ids), value_bytes, 0, 0
+        self._generation += 1
+        self.ready = True
+        return len(ids)
+
+    def memory_stats(self) -> dict:
+        """Approximate bytes held by the directory (containers, strings and overlay keys); O(1)."""
+        size = sys.getsizeof(self._ids) + sys.getsizeof(self._values)
+        size += sys.getsizeof(self._overlay) + sys.getsizeof(self._frozen)
+        size += self._value_bytes + self._overlay_bytes + self._frozen_bytes
+        entries = self._count
+        return {
+            "ready": self.ready,
+            "entries": entries,
+            "overlay_entries": len(self._overlay) + len(self._frozen),
+            "bytes": size,
+            "bytes_per_entry": round(size / entries, 1) if entries else 0.0,
+        }
+
+
+user_directory = UserDirectory()
@@ -1,6 +1,6 @@
-from typing import Optional
+from typing import Dict, Iterable, Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.user_snapshot import UserSnapshot
@@ -26,3 +26,39 @@ async def get_snapshot(session: AsyncSession, user_id: int) -> Optional[dict]:
     if not inst:
         return None
     return {"id": inst.user_id, "email": inst.email, "full_name": inst.full_name}
+
+
+async def get_snapshots(session: AsyncSession, user_ids: Iterable[int]) -> Dict[int, dict]:
+    """Fetch snapshots for many users in one query, keyed by user id (misses are absent)."""
+    ids = set(user_ids)
+    if not ids:
+        return {}
+    result = await session.execute(select(UserSnapshot).where(UserSnapshot.user_id.in_(ids)))
+    return {
+        inst.user_id: {"id": inst.user_id, "email": inst.email, "full_name": inst.full_name}
+        for inst in result.scalars()
+    }
+
+
+async def bulk_upsert_snapshots(session: AsyncSession, users: Sequence[dict]) -> int:
+    """Insert or update many snapshots in one statement (``users`` as returned by user-service)."""
+    rows = [{"user_id": u["id"], "email": u.get("email"), "full_name": u.get("full_name")} for u in users]
+    if not rows:
+        return 0
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:  # pragma: no cover - no native upsert; fall back to row-at-a-time
+        for row in rows:
+            await upsert_snapshot(session, **row)
+        return len(rows)
+    stmt = insert(UserSnapshot).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserSnapshot.user_id],
+        set_={"email": stmt.excluded.email, "full_name": stmt.excluded.full_name, "updated_at": func.now()},
+    )
+    await session.execute(stmt)
+    await session.commit()
+    return len(rows)
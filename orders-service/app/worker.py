@@ -0,0 +1,31 @@
+"""Dedicated background-job process: ``python -m app.worker``.
+
+Runs the RabbitMQ consumer and the user_snapshot sync without serving HTTP, for
+deployments whose web workers set BACKGROUND_JOBS=never.
+"""
+import asyncio
+import logging
+
+from app.core.config import settings
+from app.db.init_db import check_schema_revision, init_db
+from app.db.session import engine, shard_set
+from app.services.background_jobs import start_background_jobs
+
+
+async def main() -> None:
+    if settings.STARTUP_MODE == "production":
+        await check_schema_revision()
+    else:
+        await init_db()
+    if shard_set is not None:
+        await shard_set.init(create_tables=settings.STARTUP_MODE != "production", legacy=[engine])
+    tasks = start_background_jobs()
+    logging.getLogger(__name__).info("background worker running: %s", ", ".join(tasks))
+    await asyncio.gather(*tasks.values())
+    # run_consumer returns when RabbitMQ is unreachable; exit so the supervisor restarts us
+    logging.getLogger(__name__).warning("background jobs stopped; exiting")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
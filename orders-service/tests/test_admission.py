@@ -0,0 +1,80 @@
+import asyncio
+import pathlib
+import sys
+
+import httpx
+from fastapi import FastAPI
+
+
+def _load_admission():
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        return importlib.import_module("app.core.admission")
+    finally:
+        sys.path.remove(str(service_dir))
+
+
+def test_limit_queues_then_sheds_and_adapts():
+    admission = _load_admission()
+
+    async def scenario():
+        limit = admission.AdaptiveLimit(target_latency=0.1, initial=2, min_limit=1, max_limit=4)
+        assert await limit.acquire(0.05) and await limit.acquire(0.05)
+        queued = asyncio.ensure_future(limit.acquire(1.0))
+        await asyncio.sleep(0)
+        assert not await limit.acquire(0.01)  # behind the queued request, times out
+        limit.release(0.01)
+        assert await queued and limit.in_flight == 2
+        assert limit.snapshot()["rejected"] == 1
+
+        # slow completions shrink the limit, fast ones at full use grow it back
+        before = limit.limit
+        limit.release(0.5)
+        shrunk = limit.limit
+        assert shrunk < before
+        limit.release(0.5)  # within the same target interval: no second cut
+        assert limit.limit == shrunk
+        for _ in range(10):
+            assert await limit.acquire(0) and await limit.acquire(0)
+            limit.release(0.01)
+            limit.release(0.01)
+        assert limit.limit > shrunk
+
+    asyncio.run(scenario())
+
+
+def test_middleware_sheds_with_retry_after_but_not_probes():
+    admission = _load_admission()
+    controller = admission.AdmissionController({"list": 1000.0}, queue_timeout_ms=10, initial=1, min_limit=1)
+    app = FastAPI()
+
+    @app.get("/api/v1/orders/")
+    async def slow():
+        await asyncio.sleep(0.2)
+        return []
+
+    @app.get("/api/v1/orders/health", status_code=204)
+    async def health():
+        return None
+
+    app.add_middleware(admission.AdmissionMiddleware, controller=controller)
+
+    async def scenario():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            burst = [asyncio.ensure_future(client.get("/api/v1/orders/")) for _ in range(3)]
+            await asyncio.sleep(0.05)
+            assert (await client.get("/api/v1/orders/health")).status_code == 204
+            responses = await asyncio.gather(*burst)
+        codes = sorted(r.status_code for r in responses)
+        assert codes == [200, 503, 503]
+        shed = [r for r in responses if r.status_code == 503][0]
+        assert int(shed.headers["retry-after"]) >= 1
+        assert controller.snapshot()["list"]["rejected"] == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,97 @@
+import asyncio
+import pathlib
+import sys
+
+import httpx
+from fastapi.testclient import TestClient
+
+
+def _load_app(tmp_path, monkeypatch):
+    monkeypatch.setenv("POSTGRES_URI", f"sqlite+aiosqlite:///{tmp_path}/orders_etag.db")
+    import importlib
+
+    for modname in list(sys.modules.keys()):
+        if modname == "app" or modname.startswith("app."):
+            del sys.modules[modname]
+    return importlib.import_module("app.main")
+
+
+def test_etag_304_and_gzip(tmp_path, monkeypatch):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        main = _load_app(tmp_path, monkeypatch)
+        from app.api.routes import orders as orders_routes
+        from app.db.base import Base
+        from app.db.session import engine
+        from app.models.order import Order
+
+        async def seed():
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(
+                    Order.__table__.insert(),
+                    [{"id": i, "item_name": f"item-{i}", "quantity": 1, "owner_id": 1} for i in range(1, 51)],
+                )
+
+        asyncio.run(seed())
+
+        async def owner(user_id, *args, **kwargs):
+            return {"id": user_id, "email": "o@example.com", "full_name": "Owner"}
+
+        monkeypatch.setattr(orders_routes, "safe_get_user", owner)
+        app = main.app
+        app.router.on_startup.clear()
+        client = TestClient(app)
+
+        first = client.get("/api/v1/orders/1/")
+        etag = first.headers["etag"]
+        again = client.get("/api/v1/orders/1/", headers={"If-None-Match": etag})
+        assert again.status_code == 304 and again.content == b"" and again.headers["etag"] == etag
+
+        listing = client.get("/api/v1/orders/", headers={"Accept-Encoding": "gzip"})
+        assert listing.headers["content-encoding"] == "gzip" and len(listing.json()) == 50
+        assert client.get("/api/v1/orders/", headers={"If-None-Match": listing.headers["etag"]}).status_code == 304
+        # a single order is under the size threshold and goes out uncompressed
+        assert "content-encoding" not in client.get("/api/v1/orders/2/", headers={"Accept-Encoding": "gzip"}).headers
+
+        # any change to what the response renders changes the tag
+        async def confirm():
+            async with engine.begin() as conn:
+                await conn.execute(Order.__table__.update().where(Order.id == 1).values(status="rejected"))
+
+        asyncio.run(confirm())
+        changed = client.get("/api/v1/orders/1/", headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.headers["etag"] != etag
+    finally:
+        sys.path.remove(str(service_dir))
+
+
+def test_user_client_revalidates_cached_owner(tmp_path, monkeypatch):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        _load_app(tmp_path, monkeypatch)
+        from app.services import user_client
+
+        seen = []
+
+        class FakeClient:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, exc_type, exc, tb):
+                return False
+
+            async def get(self, url, timeout=0, headers=None):
+                seen.append((headers or {}).get("If-None-Match"))
+                if seen[-1] == 'W/"v1"':
+                    return httpx.Response(304, headers={"ETag": 'W/"v1"'})
+                return httpx.Response(200, json={"id": 7, "email": "a@example.com"}, headers={"ETag": 'W/"v1"'})
+
+        monkeypatch.setattr(user_client.httpx, "AsyncClient", FakeClient)
+        assert asyncio.run(user_client.safe_get_user(7))["email"] == "a@example.com"
+        assert asyncio.run(user_client.get_user(7))["email"] == "a@example.com"
+        assert seen == [None, 'W/"v1"']
+    finally:
+        sys.path.remove(str(service_dir))
@@ -0,0 +1,84 @@
+import asyncio
+import pathlib
+import sys
+
+
+def test_single_leader_and_failover(tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        leader = importlib.import_module("app.core.leader")
+        path = str(tmp_path / "orders.leader.lock")
+
+        async def runner():
+            first, second = leader.FileLeaderLock(path), leader.FileLeaderLock(path)
+            assert await first.try_acquire() is True
+            assert await second.try_acquire() is False
+
+            elected = []
+            follower = asyncio.create_task(leader.campaign(second, lambda: elected.append("second"), retry_seconds=0.01))
+            await asyncio.sleep(0.05)
+            assert elected == []  # follower keeps campaigning while the leader lives
+            await first.release()
+            await asyncio.wait_for(follower, 1)
+            assert elected == ["second"] and second.held
+            await second.release()
+
+        asyncio.run(runner())
+    finally:
+        sys.path.remove(str(service_dir))
+
+
+def test_leader_steps_down_when_lock_is_lost():
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        leader = importlib.import_module("app.core.leader")
+
+        class FlakyLock:
+            # acquires at once; the first check finds the connection (and so the lock) gone
+            def __init__(self):
+                self.acquired, self.checks = 0, 0
+
+            async def try_acquire(self):
+                self.acquired += 1
+                return True
+
+            async def check(self):
+                self.checks += 1
+                return self.checks > 1
+
+        class FakeConn:
+            async def scalar(self, statement):
+                raise ConnectionError("server closed the connection")
+
+            async def invalidate(self):
+                pass
+
+        async def runner():
+            events = []
+            lock = FlakyLock()
+            task = asyncio.create_task(
+                leader.lead(lock, lambda: events.append("elected"), lambda: events.append("deposed"), retry_seconds=0.01)
+            )
+            await asyncio.sleep(0.05)
+            task.cancel()
+            assert events == ["elected", "deposed", "elected"] and lock.acquired == 2
+
+            pg = leader.PostgresLeaderLock(engine=None, key=1)
+            pg._conn = FakeConn()
+            assert await pg.check() is False and not pg.held
+
+        asyncio.run(runner())
+    finally:
+        sys.path.remove(str(service_dir))
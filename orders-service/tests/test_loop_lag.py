@@ -0,0 +1,46 @@
+import asyncio
+import pathlib
+import sys
+import time
+
+
+def _load_looplag():
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        return importlib.import_module("app.core.looplag")
+    finally:
+        sys.path.remove(str(service_dir))
+
+
+def block_the_loop():
+    time.sleep(0.2)
+
+
+def test_monitor_records_lag_and_captures_blocking_stack():
+    looplag = _load_looplag()
+
+    async def scenario():
+        monitor = looplag.LoopLagMonitor(interval=0.01, threshold=0.05)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            for _ in range(2):
+                block_the_loop()
+                await asyncio.sleep(0.05)
+        finally:
+            monitor.stop()
+        return monitor
+
+    monitor = asyncio.run(scenario())
+    lag = monitor.snapshot()["lag"]
+    assert lag["max_ms"] >= 150 and lag["buckets_ms"]["+Inf"] == lag["count"]
+    assert lag["buckets_ms"]["100"] < lag["count"]  # the stalls landed above 100 ms
+    [worst] = monitor.blocking_stacks()
+    assert worst["stack"][-1].endswith("in block_the_loop") and worst["count"] == 2
+    assert worst["max_lag_ms"] >= 150
@@ -0,0 +1,52 @@
+import asyncio
+import pathlib
+import sys
+import tracemalloc
+
+import httpx
+
+_retained = []
+
+
+def test_tracemalloc_diff_and_cache_sizes(monkeypatch, tmp_path):
+    monkeypatch.setenv("POSTGRES_URI", f"sqlite+aiosqlite:///{tmp_path}/orders_memory.db")
+    monkeypatch.setenv("MEMORY_DIAGNOSTICS_ENABLED", "true")
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        from app.main import app
+
+        app.router.on_startup.clear()
+        headers = {"X-Admin-Token": "s3cret"}
+
+        async def scenario():
+            async with httpx.AsyncClient(app=app, base_url="http://test/api/v1/admin", headers=headers) as client:
+                assert (await client.post("/memory/snapshots")).status_code == 409  # not tracing yet
+                started = (await client.post("/memory/tracemalloc/start")).json()
+                assert started["tracing"] is True
+                assert (await client.post("/memory/snapshots", params={"name": "before"})).json()["name"] == "before"
+                _retained.append([bytearray(1024) for _ in range(2000)])
+                diff = (await client.get("/memory/snapshots/diff", params={"base": "before"})).json()
+                missing = await client.get("/memory/snapshots/diff", params={"base": "nope"})
+                report = (await client.get("/memory")).json()
+                stopped = (await client.post("/memory/tracemalloc/stop")).json()
+            return diff, missing, report, stopped
+
+        diff, missing, report, stopped = asyncio.run(scenario())
+        top = diff["top"][0]
+        assert top["site"][0].startswith(str(pathlib.Path(__file__))) and top["size_diff_bytes"] > 2000 * 1024
+        assert missing.status_code == 404
+        assert report["caches"]["response_cache"]["entries"] == 0
+        assert report["caches"]["owner_cache"] == {"entries": 0, "filling": 0}
+        assert report["tracemalloc"]["snapshots"][0]["name"] == "before"
+        assert {"live", "identity_map_objects"} <= set(report["sessions"])
+        assert report["gc_objects"] > 0
+        assert stopped["tracing"] is False and stopped["snapshots"] == []
+    finally:
+        tracemalloc.stop()
+        _retained.clear()
+        sys.path.remove(str(service_dir))
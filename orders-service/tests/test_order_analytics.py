@@ -0,0 +1,98 @@
+import asyncio
+import pathlib
+import sys
+from datetime import datetime
+
+import httpx
+from sqlalchemy import insert, select
+
+
+def test_rollup_follows_inserts_and_matches_backfill(tmp_path, monkeypatch):
+    monkeypatch.setenv("POSTGRES_URI", f"sqlite+aiosqlite:///{tmp_path}/orders_analytics.db")
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        app = importlib.import_module("app.main").app
+        app.router.on_startup.clear()
+        from app.db.init_db import init_db
+        from app.db.session import _async_session
+        from app.models.order import Order
+        from app.models.order_rollup import OrderRollup
+        from app.schemas.order import OrderCreateDBSchema
+        from app.services import order_rollup
+        from app.services.order_batcher import OrderWriteBatcher
+        from app.services.order_service import crud_order
+
+        def order(item, quantity):
+            return OrderCreateDBSchema(item_name=item, quantity=quantity, owner_id=1, status="confirmed")
+
+        async def rollup_rows():
+            async with _async_session() as session:
+                rows = (await session.execute(select(OrderRollup).order_by(OrderRollup.bucket_start, OrderRollup.item_name))).scalars()
+                return [(r.bucket_start, r.item_name, r.order_count, r.total_quantity) for r in rows]
+
+        async def scenario():
+            await init_db()
+            async with _async_session() as session:
+                await crud_order.create(session, order("widget", 2))
+                await crud_order.create(session, order("widget", 3))
+                await crud_order.create(session, order("gadget", 1))
+                renamed = await crud_order.create(session, order("gizmo", 8))
+                doomed = await crud_order.create(session, order("doohickey", 9))
+            batcher = OrderWriteBatcher(max_delay=0.01, max_batch=10)
+            await asyncio.gather(*(batcher.create(order("gadget", 5)) for _ in range(3)))
+            async with _async_session() as session:
+                await crud_order.update(session, id=renamed.id, obj_in={"item_name": "widget", "quantity": 1})
+                await crud_order.delete(session, id=doomed.id)
+            incremental = await rollup_rows()
+            # updates and deletes leave exactly what a rebuild from ``order`` would
+            async with _async_session() as session:
+                await order_rollup.rebuild(session)
+            assert await rollup_rows() == incremental
+
+            # rows written behind the rollup's back (e.g. before the table existed)
+            async with _async_session() as session:
+                await session.execute(
+                    insert(Order),
+                    [
+                        {"item_name": "widget", "quantity": 4, "owner_id": 2, "created_at": datetime(2026, 1, 1, 9, 15)},
+                        {"item_name": "widget", "quantity": 6, "owner_id": 2, "created_at": datetime(2026, 1, 1, 9, 45)},
+                        {"item_name": "widget", "quantity": 1, "owner_id": 2, "created_at": datetime(2026, 1, 2, 23, 59)},
+                    ],
+                )
+                await session.commit()
+                written = await order_rollup.rebuild(session)
+            rebuilt = await rollup_rows()
+
+            async with httpx.AsyncClient(app=app, base_url="http://test/api/v1") as client:
+                days = await client.get(
+                    "/orders/analytics", params={"granularity": "day", "start": "2026-01-01", "end": "2026-01-03"}
+                )
+                hours = await client.get(
+                    "/orders/analytics",
+                    params={"granularity": "hour", "by_item": "true", "start": "2026-01-01T09:00", "end": "2026-01-01T10:00"},
+                )
+                recent = await client.get("/orders/analytics", params={"granularity": "hour", "by_item": "true"})
+                too_wide = await client.get("/orders/analytics", params={"granularity": "hour", "start": "2000-01-01"})
+            return incremental, written, rebuilt, days, hours, recent, too_wide
+
+        incremental, written, rebuilt, days, hours, recent, too_wide = asyncio.run(scenario())
+        assert sorted((item, count, qty) for _, item, count, qty in incremental) == [("gadget", 4, 16), ("widget", 3, 6)]
+        # the bulk rebuild reproduces the incremental rows and adds the historical ones
+        assert rebuilt[-len(incremental):] == incremental and written == len(rebuilt) == len(incremental) + 2
+        assert [(b["bucket_start"][:10], b["order_count"], b["total_quantity"]) for b in days.json()["buckets"]] == [
+            ("2026-01-01", 2, 10),
+            ("2026-01-02", 1, 1),
+        ]
+        assert hours.json()["buckets"] == [
+            {"bucket_start": "2026-01-01T09:00:00", "item_name": "widget", "order_count": 2, "total_quantity": 10}
+        ]
+        assert {b["item_name"]: b["order_count"] for b in recent.json()["buckets"]} == {"gadget": 4, "widget": 3}
+        assert too_wide.status_code == 400
+    finally:
+        sys.path.remove(str(service_dir))
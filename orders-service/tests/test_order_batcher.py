@@ -0,0 +1,98 @@
+import asyncio
+import pathlib
+import sys
+
+from sqlalchemy import event
+
+
+def test_concurrent_creates_share_one_commit(tmp_path, monkeypatch):
+    monkeypatch.setenv("POSTGRES_URI", f"sqlite+aiosqlite:///{tmp_path}/orders_batch.db")
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        importlib.import_module("app.main")
+        from app.db.init_db import init_db
+        from app.db.session import engine
+        from app.schemas.order import OrderCreateDBSchema
+        from app.services.order_batcher import OrderWriteBatcher
+
+        commits = []
+        event.listen(engine.sync_engine, "commit", lambda conn: commits.append(1))
+        batcher = OrderWriteBatcher(max_delay=0.01, max_batch=16)
+
+        async def runner():
+            await init_db()
+            commits.clear()
+            return await asyncio.gather(
+                *(
+                    batcher.create(OrderCreateDBSchema(item_name=f"item-{i}", quantity=i, owner_id=i, status="confirmed"))
+                    for i in range(40)
+                )
+            )
+
+        orders = asyncio.run(runner())
+        # every caller gets its own row back, ids are distinct, 40 rows took 3 commits (16+16+8)
+        assert [o.item_name for o in orders] == [f"item-{i}" for i in range(40)]
+        assert all(o.owner_id == o.quantity for o in orders)
+        assert len({o.id for o in orders}) == 40
+        assert len(commits) == 3
+    finally:
+        sys.path.remove(str(service_dir))
+
+
+def test_cancelled_callers_get_no_row(tmp_path, monkeypatch):
+    monkeypatch.setenv("POSTGRES_URI", f"sqlite+aiosqlite:///{tmp_path}/orders_batch_cancel.db")
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        importlib.import_module("app.main")
+        from sqlalchemy import select
+
+        from app.db.init_db import init_db
+        from app.db.session import _async_session, engine
+        from app.models.order import Order
+        from app.models.owner_order_stats import OwnerOrderStats
+        from app.schemas.order import OrderCreateDBSchema
+        from app.services.order_batcher import OrderWriteBatcher
+
+        batcher = OrderWriteBatcher(max_delay=0.02, max_batch=16)
+        in_flight_victim = []
+
+        def cancel_during_insert(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT INTO \"order\"") and in_flight_victim:
+                in_flight_victim.pop().cancel()
+
+        def create(name):
+            order = OrderCreateDBSchema(item_name=name, quantity=1, owner_id=1, status="confirmed")
+            return asyncio.ensure_future(batcher.create(order))
+
+        async def runner():
+            await init_db()
+            event.listen(engine.sync_engine, "after_cursor_execute", cancel_during_insert)
+            kept, queued_victim, flight_victim = create("kept"), create("timed-out"), create("cancelled-mid-insert")
+            await asyncio.sleep(0)
+            queued_victim.cancel()  # e.g. the request deadline fired while it waited
+            in_flight_victim.append(flight_victim)
+            results = await asyncio.gather(kept, queued_victim, flight_victim, return_exceptions=True)
+            event.remove(engine.sync_engine, "after_cursor_execute", cancel_during_insert)
+            async with _async_session() as session:
+                names = (await session.execute(select(Order.item_name))).scalars().all()
+                stats = await session.get(OwnerOrderStats, 1)
+            return results, names, stats.order_count
+
+        results, names, order_count = asyncio.run(runner())
+        assert results[0].item_name == "kept"
+        assert all(isinstance(r, asyncio.CancelledError) for r in results[1:])
+        assert names == ["kept"] and order_count == 1
+    finally:
+        sys.path.remove(str(service_dir))
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import pathlib
+import sys
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+
+def test_sharded_orders_route_list_and_reshard(tmp_path, monkeypatch):
+    shard_urls = [f"sqlite+aiosqlite:///{tmp_path}/shard{i}.db" for i in range(3)]
+    monkeypatch.setenv("POSTGRES_URI", f"sqlite+aiosqlite:///{tmp_path}/primary.db")
+    monkeypatch.setenv("ORDER_SHARD_URIS", json.dumps(shard_urls))
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        main = importlib.import_module("app.main")
+        from app.api.routes import orders as orders_routes
+        from app.db.init_db import init_db
+        from app.db.session import _create_engine, shard_set
+        from app.db.sharding import ShardSet, jump_hash
+        from app.models.order import Order
+        from app.scripts.reshard_orders import reshard
+
+        async def setup():
+            await init_db()
+            await shard_set.init(create_tables=True)
+
+        asyncio.run(setup())
+
+        async def owner(user_id, *args, **kwargs):
+            return {"id": user_id, "email": f"u{user_id}@example.com", "full_name": "Owner"}
+
+        monkeypatch.setattr(orders_routes, "safe_get_user", owner)
+        monkeypatch.setattr(orders_routes, "get_user", owner)
+        app = main.app
+        app.router.on_startup.clear()
+        client = TestClient(app)
+
+        created = [
+            client.post("/api/v1/orders/", json={"item_name": f"item-{i}", "quantity": 1, "owner_id": i % 12}).json()
+            for i in range(30)
+        ]
+        ids = sorted(o["id"] for o in created)
+        assert len(set(ids)) == 30
+
+        async def rows_by_shard(shards):
+            found = []
+            for shard in shards.shards:
+                async with shard.session() as session:
+                    found.append((await session.execute(select(Order.id, Order.owner_id))).all())
+            return found
+
+        placed = asyncio.run(rows_by_shard(shard_set))
+        for index, rows in enumerate(placed):
+            assert all(jump_hash(owner_id, 3) == index for _, owner_id in rows)
+        assert sum(len(rows) for rows in placed) == 30
+
+        # scatter-gather listing merges shards in id order
+        page = client.get("/api/v1/orders/", params={"offset": 5, "limit": 10}).json()
+        assert [o["id"] for o in page] == ids[5:15]
+        assert client.get(f"/api/v1/orders/{ids[7]}/").json()["id"] == ids[7]
+
+        # grow to four shards; moved rows keep their ids and land on their new owner shard
+        new_urls = shard_urls + [f"sqlite+aiosqlite:///{tmp_path}/shard3.db"]
+        stats = asyncio.run(reshard(shard_urls, new_urls, batch_size=7, delete_moved=True, create_tables=True))
+        assert stats["scanned"] == 30 and 0 < stats["moved"] < 30
+
+        async def check_grown():
+            grown = ShardSet([_create_engine(url) for url in new_urls])
+            await grown.init()
+            rows = await rows_by_shard(grown)
+            new_shard = grown.shards[3]
+            new_id = await new_shard.allocate_id()
+            return rows, new_id
+
+        rows, new_id = asyncio.run(check_grown())
+        for index, shard_rows in enumerate(rows):
+            assert all(jump_hash(owner_id, 4) == index for _, owner_id in shard_rows)
+        assert sorted(order_id for shard_rows in rows for order_id, _ in shard_rows) == ids
+        assert new_id > ids[-1]
+    finally:
+        sys.path.remove(str(service_dir))
+
+
+def test_backfill_keeps_legacy_ids_and_owner_changes_move_orders(tmp_path, monkeypatch):
+    shard_urls = [f"sqlite+aiosqlite:///{tmp_path}/shard{i}.db" for i in range(2)]
+    legacy_url = f"sqlite+aiosqlite:///{tmp_path}/primary.db"
+    monkeypatch.setenv("POSTGRES_URI", legacy_url)
+    monkeypatch.setenv("ORDER_SHARD_URIS", json.dumps(shard_urls))
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        importlib.import_module("app.main")
+        from sqlalchemy import insert
+
+        from app.db.init_db import init_db
+        from app.db.session import _async_session, engine, shard_set
+        from app.models.order import Order
+        from app.schemas.order import OrderCreateDBSchema
+        from app.scripts import reshard_orders
+        from app.services.order_service import crud_order
+
+        # legacy serial ids high enough to look like sharded ids (seq << 10 | shard id)
+        legacy = [{"id": 1024 + i, "item_name": f"old-{i}", "quantity": 1, "owner_id": i} for i in range(6)]
+
+        async def scenario():
+            await init_db()
+            async with _async_session() as session:
+                await session.execute(insert(Order), legacy)
+                await session.commit()
+            # the app starts on the shards before the backfill has run
+            await shard_set.init(create_tables=True, legacy=[engine])
+            new = await crud_order.create(None, OrderCreateDBSchema(item_name="new", quantity=1, owner_id=1, status="confirmed"))
+
+            # a different order already holding a legacy id on its target stops the copy there
+            target = shard_set.for_owner(legacy[0]["owner_id"])
+            async with target.session() as session:
+                session.add(Order(**{**legacy[0], "item_name": "imposter"}))
+                await session.commit()
+            try:
+                await reshard_orders.reshard([legacy_url], shard_urls, batch_size=1, delete_moved=True)
+                raise AssertionError("expected IdConflict")
+            except reshard_orders.IdConflict:
+                pass
+            async with _async_session() as session:
+                assert legacy[0]["id"] in set((await session.execute(select(Order.id))).scalars())
+
+            # once cleared, a re-run copies everything and only then empties the source
+            async with target.session() as session:
+                await session.delete(await session.get(Order, legacy[0]["id"]))
+                await session.commit()
+            stats = await reshard_orders.reshard([legacy_url], shard_urls, batch_size=4, delete_moved=True)
+            async with _async_session() as session:
+                left = (await session.execute(select(Order.id))).scalars().all()
+            copied = sorted(o.id for o in await crud_order.get_all(None, limit=100))
+
+            # an owner change to an owner on the other shard moves the order, id and all
+            other_owner = next(o for o in range(100) if shard_set.for_owner(o) is not shard_set.for_owner(1))
+            moved = await crud_order.update(None, db_obj=new, obj_in={"owner_id": other_owner})
+            async with shard_set.for_owner(1).session() as session:
+                on_old = await session.get(Order, new.id)
+            async with shard_set.for_owner(other_owner).session() as session:
+                on_new = await session.get(Order, new.id)
+            return new, stats, left, copied, moved, on_old, on_new, other_owner
+
+        new, stats, left, copied, moved, on_old, on_new, other_owner = asyncio.run(scenario())
+        assert new.id not in {row["id"] for row in legacy}
+        assert stats["moved"] == len(legacy) and left == []
+        assert copied == sorted([row["id"] for row in legacy] + [new.id])
+        assert moved.id == new.id and on_old is None
+        assert on_new.owner_id == other_owner and on_new.created_at == new.created_at
+    finally:
+        sys.path.remove(str(service_dir))
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import pathlib
+import sys
+from datetime import datetime
+
+import httpx
+from sqlalchemy import insert, select
+
+
+def test_owner_stats_follow_writes_and_match_rebuild(tmp_path, monkeypatch):
+    monkeypatch.setenv("POSTGRES_URI", f"sqlite+aiosqlite:///{tmp_path}/orders_owner_stats.db")
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        app = importlib.import_module("app.main").app
+        app.router.on_startup.clear()
+        from app.db.init_db import init_db
+        from app.db.session import _async_session
+        from app.models.order import Order
+        from app.models.owner_order_stats import OwnerOrderStats
+        from app.schemas.order import OrderCreateDBSchema
+        from app.services import owner_order_stats
+        from app.services.order_batcher import OrderWriteBatcher
+        from app.services.order_service import crud_order
+
+        def order(owner_id, quantity):
+            return OrderCreateDBSchema(item_name="widget", quantity=quantity, owner_id=owner_id, status="confirmed")
+
+        async def stats_rows():
+            async with _async_session() as session:
+                rows = (await session.execute(select(OwnerOrderStats).order_by(OwnerOrderStats.owner_id))).scalars()
+                return [(r.owner_id, r.order_count, r.total_quantity, r.last_order_at) for r in rows]
+
+        async def scenario():
+            await init_db()
+            async with _async_session() as session:
+                first = await crud_order.create(session, order(1, 2))
+                await crud_order.create(session, order(1, 3))
+                doomed = await crud_order.create(session, order(2, 7))
+            batcher = OrderWriteBatcher(max_delay=0.01, max_batch=10)
+            await asyncio.gather(*(batcher.create(order(owner_id, 5)) for owner_id in (2, 3, 3)))
+            async with _async_session() as session:
+                await crud_order.update(session, id=first.id, obj_in={"quantity": 10})
+                await crud_order.delete(session, id=doomed.id)
+            incremental = await stats_rows()
+
+            # an order written behind the stats' back (e.g. before the table existed)
+            async with _async_session() as session:
+                await session.execute(
+                    insert(Order), [{"item_name": "widget", "quantity": 4, "owner_id": 4, "created_at": datetime(2026, 1, 1, 9)}]
+                )
+                await session.commit()
+                written = await owner_order_stats.rebuild(session)
+            rebuilt = await stats_rows()
+
+            async with httpx.AsyncClient(app=app, base_url="http://test/api/v1") as client:
+                batch = await client.get("/orders/owner-stats", params={"owner_id": [4, 1, 99, 1]})
+                missing = await client.get("/orders/owner-stats")
+            return incremental, written, rebuilt, batch, missing
+
+        incremental, written, rebuilt, batch, missing = asyncio.run(scenario())
+        assert [row[:3] for row in incremental] == [(1, 2, 13), (2, 1, 5), (3, 2, 10)]
+        assert all(last is not None for *_, last in incremental)
+        # the bulk rebuild reproduces the maintained rows and adds the missed owner
+        assert rebuilt[:3] == incremental and written == len(rebuilt) == 4
+        assert batch.json() == [
+            {"owner_id": 4, "order_count": 1, "total_quantity": 4, "last_order_at": "2026-01-01T09:00:00"},
+            {"owner_id": 1, "order_count": 2, "total_quantity": 13, "last_order_at": incremental[0][3].isoformat()},
+            {"owner_id": 99, "order_count": 0, "total_quantity": 0, "last_order_at": None},
+        ]
+        assert missing.status_code == 422
+    finally:
+        sys.path.remove(str(service_dir))
+
+
+def test_owner_change_keeps_stats_on_each_owners_shard(tmp_path, monkeypatch):
+    monkeypatch.setenv("POSTGRES_URI", f"sqlite+aiosqlite:///{tmp_path}/primary.db")
+    monkeypatch.setenv("ORDER_SHARD_URIS", json.dumps([f"sqlite+aiosqlite:///{tmp_path}/shard{i}.db" for i in range(2)]))
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        app = importlib.import_module("app.main").app
+        app.router.on_startup.clear()
+        from app.db.session import shard_set
+        from app.models.owner_order_stats import OwnerOrderStats
+        from app.schemas.order import OrderCreateDBSchema
+        from app.services.order_service import crud_order
+
+        def order(owner_id, quantity):
+            return OrderCreateDBSchema(item_name="widget", quantity=quantity, owner_id=owner_id, status="confirmed")
+
+        owner = 1
+        neighbour = next(o for o in range(2, 100) if shard_set.for_owner(o) is shard_set.for_owner(owner))
+        remote = next(o for o in range(2, 100) if shard_set.for_owner(o) is not shard_set.for_owner(owner))
+
+        async def scenario():
+            await shard_set.init(create_tables=True)
+            first = await crud_order.create(None, order(owner, 2))
+            second = await crud_order.create(None, order(owner, 3))
+            await crud_order.create(None, order(remote, 4))
+            await crud_order.update(None, db_obj=first, obj_in={"owner_id": remote})  # moves shards
+            await crud_order.update(None, db_obj=second, obj_in={"owner_id": neighbour, "quantity": 6})
+            per_shard = []
+            for shard in shard_set.shards:
+                async with shard.session() as session:
+                    rows = (await session.execute(select(OwnerOrderStats))).scalars()
+                    per_shard.append({(r.owner_id, r.order_count, r.total_quantity) for r in rows})
+            async with httpx.AsyncClient(app=app, base_url="http://test/api/v1") as client:
+                stats = await client.get("/orders/owner-stats", params={"owner_id": [owner, neighbour, remote]})
+            return per_shard, stats
+
+        per_shard, stats = asyncio.run(scenario())
+        home = shard_set.shards.index(shard_set.for_owner(owner))
+        # each owner's row is on its own shard only, and the old owner has none left
+        assert per_shard[home] == {(neighbour, 1, 6)}
+        assert per_shard[1 - home] == {(remote, 2, 6)}
+        assert [(s["owner_id"], s["order_count"], s["total_quantity"]) for s in stats.json()] == [
+            (owner, 0, 0),
+            (neighbour, 1, 6),
+            (remote, 2, 6),
+        ]
+    finally:
+        sys.path.remove(str(service_dir))
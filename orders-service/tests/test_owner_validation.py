@@ -0,0 +1,131 @@
+import asyncio
+import pathlib
+import sys
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+
+def _load_app(tmp_path, mode):
+    import importlib
+
+    for modname in list(sys.modules.keys()):
+        if modname == "app" or modname.startswith("app."):
+            del sys.modules[modname]
+    cfg = importlib.import_module("app.core.config")
+    cfg.settings.POSTGRES_URI = f"sqlite+aiosqlite:///{tmp_path}/orders_validation.db"
+    cfg.settings.OWNER_VALIDATION_MODE = mode
+    main = importlib.import_module("app.main")
+    from app.db.init_db import init_db
+    from app.db.session import _async_session
+    from app.events.consumer import process_user_event
+
+    async def seed():
+        await init_db()
+        async with _async_session() as session:
+            await process_user_event(session, {"type": "user.created", "payload": {"id": 1, "email": "known@example.com", "full_name": "Known"}})
+
+    asyncio.run(seed())
+    main.app.router.on_startup.clear()
+    return main.app, cfg
+
+
+def test_async_validation(tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        app, cfg = _load_app(tmp_path, "async")
+        import importlib
+
+        orders_module = importlib.import_module("app.api.routes.orders")
+        validation_module = importlib.import_module("app.services.owner_validation")
+        remote_calls = []
+
+        async def fake_get_user(user_id: int):
+            remote_calls.append(user_id)
+            raise HTTPException(status_code=400, detail="Owner user not found")
+
+        orders_module.get_user = fake_get_user
+        validation_module.get_user = fake_get_user
+        client = TestClient(app)
+
+        # Snapshot hit: confirmed without any user-service call
+        r = client.post("/api/v1/orders/", json={"item_name": "Widget", "quantity": 1, "owner_id": 1})
+        assert r.status_code == 200
+        assert r.json()["status"] == "confirmed"
+        assert r.json()["owner"]["email"] == "known@example.com"
+        assert remote_calls == []
+
+        # Snapshot miss: accepted as pending, then rejected by the background check
+        r = client.post("/api/v1/orders/", json={"item_name": "Gadget", "quantity": 1, "owner_id": 99})
+        assert r.status_code == 200
+        assert r.json()["status"] == "pending"
+        assert r.json()["owner"] is None
+        assert remote_calls == [99]
+
+        r = client.get(f"/api/v1/orders/{r.json()['id']}/")
+        assert r.json()["status"] == "rejected"
+    finally:
+        cfg.settings.OWNER_VALIDATION_MODE = "remote"
+        sys.path.remove(str(service_dir))
+
+
+def test_snapshot_validation(tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        app, cfg = _load_app(tmp_path, "snapshot")
+        import importlib
+
+        orders_module = importlib.import_module("app.api.routes.orders")
+        remote_calls = []
+
+        async def fake_get_user(user_id: int):
+            remote_calls.append(user_id)
+            if user_id == 2:
+                return {"id": 2, "email": "remote@example.com", "full_name": "Remote"}
+            raise HTTPException(status_code=400, detail="Owner user not found")
+
+        orders_module.get_user = fake_get_user
+        client = TestClient(app)
+
+        # Snapshot hit: confirmed without any user-service call
+        r = client.post("/api/v1/orders/", json={"item_name": "Widget", "quantity": 1, "owner_id": 1})
+        assert r.status_code == 200
+        assert r.json()["status"] == "confirmed"
+        assert r.json()["owner"]["email"] == "known@example.com"
+        assert remote_calls == []
+
+        # Snapshot miss: user-service is asked inline, as in "remote" mode
+        r = client.post("/api/v1/orders/", json={"item_name": "Gadget", "quantity": 1, "owner_id": 2})
+        assert r.status_code == 200
+        assert r.json()["status"] == "confirmed"
+        assert r.json()["owner"]["email"] == "remote@example.com"
+        assert remote_calls == [2]
+
+        # ... and an owner unknown there too is refused; nothing stays pending
+        r = client.post("/api/v1/orders/", json={"item_name": "Gizmo", "quantity": 1, "owner_id": 99})
+        assert r.status_code == 400
+        assert remote_calls == [2, 99]
+    finally:
+        cfg.settings.OWNER_VALIDATION_MODE = "remote"
+        sys.path.remove(str(service_dir))
+
+
+def test_unknown_validation_mode_is_rejected(monkeypatch):
+    import importlib
+
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        cfg = importlib.import_module("app.core.config")
+        monkeypatch.setenv("OWNER_VALIDATION_MODE", "snapshots")
+        with pytest.raises(ValidationError, match="OWNER_VALIDATION_MODE"):
+            cfg.Settings()
+    finally:
+        sys.path.remove(str(service_dir))
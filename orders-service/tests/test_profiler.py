@@ -0,0 +1,95 @@
+import asyncio
+import pathlib
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+
+
+def _load(monkeypatch, tmp_path):
+    monkeypatch.setenv("POSTGRES_URI", f"sqlite+aiosqlite:///{tmp_path}/orders_profile.db")
+    monkeypatch.setenv("PROFILER_ENABLED", "true")
+    monkeypatch.setenv("ADMIN_TOKEN", "s3cret")
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        return importlib.import_module("app.core.profiler"), importlib.import_module("app.main").app
+    finally:
+        sys.path.remove(str(service_dir))
+
+
+def spin_tagged():
+    end = time.perf_counter() + 0.15
+    while time.perf_counter() < end:
+        pass
+
+
+def spin_other():
+    end = time.perf_counter() + 0.15
+    while time.perf_counter() < end:
+        pass
+
+
+def test_header_filter_profiles_only_marked_requests(monkeypatch, tmp_path):
+    profiler, _ = _load(monkeypatch, tmp_path)
+    app = FastAPI()
+
+    @app.get("/tagged")
+    async def tagged():
+        spin_tagged()
+        return {}
+
+    @app.get("/other")
+    async def other():
+        spin_other()
+        return {}
+
+    app.add_middleware(profiler.ProfileTagMiddleware)
+
+    async def scenario():
+        run = asyncio.ensure_future(profiler.run_profile(0.5, interval=0.002, header=("x-profile", "1")))
+        await asyncio.sleep(0.05)
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            # one task per request, as under a real server
+            await asyncio.gather(
+                client.get("/tagged", headers={"X-Profile": "1"}),
+                client.get("/other", headers={"X-Profile": "2"}),
+            )
+        with_busy = None
+        try:
+            await profiler.run_profile(0.01)
+        except profiler.ProfilerBusy as exc:
+            with_busy = exc
+        return await run, with_busy
+
+    result, busy = asyncio.run(scenario())
+    collapsed = result.collapsed()
+    assert busy is not None
+    assert result.samples > 0 and ":spin_tagged" in collapsed and ":spin_other" not in collapsed
+    assert all(line.startswith("loop;") for line in collapsed.splitlines())
+    assert result.summary()["top_self"][0]["frame"].endswith(":spin_tagged")
+
+
+def test_admin_profile_endpoint_requires_token(monkeypatch, tmp_path):
+    _, app = _load(monkeypatch, tmp_path)
+    app.router.on_startup.clear()
+
+    async def scenario():
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            missing = await client.get("/api/v1/admin/profile", params={"seconds": 0.05})
+            ok = await client.get(
+                "/api/v1/admin/profile",
+                params={"seconds": 0.05, "format": "json", "include_idle": "true"},
+                headers={"X-Admin-Token": "s3cret"},
+            )
+        return missing, ok
+
+    missing, ok = asyncio.run(scenario())
+    assert missing.status_code == 401
+    assert ok.status_code == 200 and ok.json()["samples"] > 0
@@ -0,0 +1,63 @@
+import asyncio
+import json
+import pathlib
+import sys
+
+from fastapi.testclient import TestClient
+
+
+def test_reads_go_to_replica_writes_to_primary(tmp_path, monkeypatch):
+    # two SQLite files stand in for a primary and its replica; configured via env because
+    # app/__init__ builds the engines as soon as app.core.config is imported
+    primary_url = f"sqlite+aiosqlite:///{tmp_path}/primary.db"
+    replica_url = f"sqlite+aiosqlite:///{tmp_path}/replica.db"
+    monkeypatch.setenv("POSTGRES_URI", primary_url)
+    monkeypatch.setenv("POSTGRES_REPLICA_URIS", json.dumps([replica_url]))
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        main = importlib.import_module("app.main")
+        from app.api.routes import orders as orders_routes
+        from app.db.base import Base
+        from app.db.session import engine, replica_set
+        from app.models.order import Order
+
+        replica = replica_set.engines[0]
+
+        async def seed():
+            for eng, name in ((engine, "on-primary"), (replica, "on-replica")):
+                async with eng.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+                    await conn.execute(Order.__table__.insert(), [{"id": 1, "item_name": name, "quantity": 1, "owner_id": 1}])
+
+        asyncio.run(seed())
+
+        async def owner(user_id, *args, **kwargs):
+            return {"id": user_id, "email": "o@example.com", "full_name": "Owner"}
+
+        monkeypatch.setattr(orders_routes, "safe_get_user", owner)
+        monkeypatch.setattr(orders_routes, "get_user", owner)
+        app = main.app
+        app.router.on_startup.clear()
+        client = TestClient(app)
+
+        assert client.get("/api/v1/orders/1/").json()["item_name"] == "on-replica"
+        assert [o["item_name"] for o in client.get("/api/v1/orders/").json()] == ["on-replica"]
+
+        # the write and its read-back both happen on the primary
+        created = client.post("/api/v1/orders/", json={"item_name": "new", "quantity": 2, "owner_id": 1})
+        assert created.status_code == 200 and created.json()["id"] == 2
+        assert client.get("/api/v1/orders/2/").status_code == 404  # not replicated here
+
+        # a replica failing its health check leaves the rotation; reads fall back to the primary
+        replica_set.healthy[id(replica)] = False
+        assert client.get("/api/v1/orders/2/").json()["item_name"] == "new"
+        asyncio.run(replica_set.check())
+        assert replica_set.healthy[id(replica)] is True
+    finally:
+        sys.path.remove(str(service_dir))
@@ -0,0 +1,33 @@
+import pathlib
+import sys
+
+from fastapi.testclient import TestClient
+
+
+def test_ready_only_after_warmup(tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        cfg = importlib.import_module("app.core.config")
+        cfg.settings.POSTGRES_URI = f"sqlite+aiosqlite:///{tmp_path}/orders_ready.db"
+        cfg.settings.WARMUP_DB_CONNECTIONS = 3
+        cfg.settings.WARMUP_HTTP_CONNECTIONS = 0
+        main = importlib.import_module("app.main")
+        app = main.app
+
+        # without startup (no lifespan) the replica is live but not ready
+        client = TestClient(app)
+        assert client.get("/api/v1/orders/health").status_code == 204
+        assert client.get("/api/v1/orders/ready").status_code == 503
+
+        with TestClient(app) as client:
+            assert client.get("/api/v1/orders/ready").status_code == 204
+            assert "warmup" in app.state.startup_timings["phases_ms"]
+        assert app.state.ready is False  # shutdown takes the replica out again
+    finally:
+        sys.path.remove(str(service_dir))
@@ -0,0 +1,61 @@
+import asyncio
+import pathlib
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+
+def test_list_orders_returns_partial_enrichment_within_budget(tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        cfg = importlib.import_module("app.core.config")
+        cfg.settings.POSTGRES_URI = f"sqlite+aiosqlite:///{tmp_path}/orders_deadline.db"
+        main = importlib.import_module("app.main")
+        from app.db.init_db import init_db
+        from app.db.session import _async_session
+        from app.models.order import Order
+
+        async def seed():
+            await init_db()
+            async with _async_session() as session:
+                session.add_all([Order(item_name=f"item-{i}", quantity=1, owner_id=i) for i in range(20)])
+                await session.commit()
+
+        asyncio.run(seed())
+
+        orders_module = importlib.import_module("app.api.routes.orders")
+        in_flight = {"now": 0, "peak": 0}
+
+        async def slow_safe_get_user(user_id: int, retries: int = 1, timeout: float = 2.0):
+            in_flight["now"] += 1
+            in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+            try:
+                await asyncio.sleep(5)
+            finally:
+                in_flight["now"] -= 1
+            return {"id": user_id, "email": "late@example.com", "full_name": "Late"}
+
+        orders_module.safe_get_user = slow_safe_get_user
+        app = main.app
+        app.router.on_startup.clear()
+        client = TestClient(app)
+
+        started = time.monotonic()
+        r = client.get("/api/v1/orders/", headers={"X-Request-Timeout-Ms": "200"})
+        elapsed = time.monotonic() - started
+
+        assert r.status_code == 200
+        items = r.json()
+        assert len(items) == 20
+        assert all(item["owner"] is None for item in items)
+        assert elapsed < 2.0
+        assert in_flight["peak"] <= cfg.settings.ENRICH_CONCURRENCY
+    finally:
+        sys.path.remove(str(service_dir))
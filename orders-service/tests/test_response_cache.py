@@ -0,0 +1,117 @@
+import asyncio
+import pathlib
+import sys
+
+from fastapi.testclient import TestClient
+
+
+def _import_app(monkeypatch, tmp_path):
+    monkeypatch.setenv("POSTGRES_URI", f"sqlite+aiosqlite:///{tmp_path}/orders_cache.db")
+    monkeypatch.setenv("RESPONSE_CACHE_ENABLED", "true")
+    import importlib
+
+    for modname in list(sys.modules.keys()):
+        if modname == "app" or modname.startswith("app."):
+            del sys.modules[modname]
+    return importlib.import_module("app.main")
+
+
+def test_single_flight_tags_and_lru(monkeypatch, tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        _import_app(monkeypatch, tmp_path)
+        from app.services.response_cache import CachedResponse, ResponseCache
+
+        async def scenario():
+            cache = ResponseCache(max_entries=2, ttl=60)
+            calls = []
+
+            def compute(key, tags):
+                async def run():
+                    calls.append(key)
+                    await asyncio.sleep(0.01)
+                    return CachedResponse(f'W/"{key}"', key.encode()), tags
+
+                return run
+
+            results = await asyncio.gather(*(cache.get_or_compute("a", compute("a", {"order:1"})) for _ in range(5)))
+            assert calls == ["a"] and {r.body for r in results} == {b"a"}
+
+            await cache.get_or_compute("b", compute("b", {"order:2"}))
+            assert cache.invalidate("order:2") == 1
+            await cache.get_or_compute("b", compute("b", {"order:2"}))
+            assert calls == ["a", "b", "b"]
+
+            # "a" is least recently used once "b" is read, and is evicted by "c"
+            await cache.get_or_compute("b", compute("b", {"order:2"}))
+            await cache.get_or_compute("c", compute("c", set()))
+            await cache.get_or_compute("a", compute("a", {"order:1"}))
+            assert calls == ["a", "b", "b", "c", "a"]
+
+        asyncio.run(scenario())
+    finally:
+        sys.path.remove(str(service_dir))
+
+
+def test_reads_cached_until_a_write_touches_them(monkeypatch, tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        main = _import_app(monkeypatch, tmp_path)
+        from app.api.routes import orders as orders_routes
+        from app.db.base import Base
+        from app.db.session import _async_session, engine
+        from app.events.consumer import process_user_event
+        from app.models.order import Order
+
+        async def seed():
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(
+                    Order.__table__.insert(),
+                    [{"id": 1, "item_name": "a", "quantity": 1, "owner_id": 1}, {"id": 2, "item_name": "b", "quantity": 1, "owner_id": 2}],
+                )
+
+        asyncio.run(seed())
+        lookups = []
+
+        async def owner(user_id, *args, **kwargs):
+            lookups.append(user_id)
+            return {"id": user_id, "email": f"{user_id}@example.com", "full_name": "Owner"}
+
+        monkeypatch.setattr(orders_routes, "safe_get_user", owner)
+        monkeypatch.setattr(orders_routes, "get_user", owner)
+        app = main.app
+        app.router.on_startup.clear()
+        client = TestClient(app)
+
+        first = client.get("/api/v1/orders/")
+        assert client.get("/api/v1/orders/").json() == first.json()
+        assert client.get("/api/v1/orders/", params={"limit": 100, "offset": 0}).json() == first.json()
+        assert client.get("/api/v1/orders/", headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+        client.get("/api/v1/orders/2/")
+        client.get("/api/v1/orders/2/")
+        assert sorted(lookups) == [1, 2, 2]
+
+        # a new order drops the list pages but not other orders' details
+        assert client.post("/api/v1/orders/", json={"item_name": "c", "quantity": 1, "owner_id": 3}).status_code == 200
+        assert len(client.get("/api/v1/orders/").json()) == 3
+        client.get("/api/v1/orders/2/")
+        assert sorted(lookups) == [1, 1, 2, 2, 2, 3, 3]  # create response, then the list page
+
+        # an owner update drops exactly the responses rendering that owner
+        async def owner_updated():
+            async with _async_session() as session:
+                await process_user_event(session, {"type": "user.updated", "payload": {"id": 2, "email": "new@example.com"}})
+
+        asyncio.run(owner_updated())
+        client.get("/api/v1/orders/1/")
+        del lookups[:]
+        client.get("/api/v1/orders/1/")
+        client.get("/api/v1/orders/2/")
+        assert client.get("/api/v1/orders/2/").json()["owner"]["email"] == "new@example.com"
+        assert lookups == []  # order 2's owner now comes from the snapshot the event wrote
+        assert orders_routes.response_cache.stats()["hits"] >= 5
+    finally:
+        sys.path.remove(str(service_dir))
@@ -0,0 +1,121 @@
+import asyncio
+import pathlib
+import sys
+
+import httpx
+
+
+def _import(monkeypatch, tmp_path):
+    monkeypatch.setenv("POSTGRES_URI", f"sqlite+aiosqlite:///{tmp_path}/orders_shared_cache.db")
+    monkeypatch.setenv("CACHE_BACKEND", "memory")
+    monkeypatch.setenv("USER_SERVICE_CACHE_FRESH_SECONDS", "60")
+    import importlib
+
+    for modname in list(sys.modules.keys()):
+        if modname == "app" or modname.startswith("app."):
+            del sys.modules[modname]
+    return importlib.import_module("app.services.user_client")
+
+
+def test_replicas_share_l2_and_invalidations(monkeypatch, tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        _import(monkeypatch, tmp_path)
+        from app.core.cache import MemoryBackend, TieredCache
+
+        async def scenario():
+            backend = MemoryBackend()
+            dropped = []
+            a = TieredCache("owners", backend=backend, ttl=60)
+            b = TieredCache("owners", backend=backend, ttl=60, on_invalidate=dropped.append)
+            listener = asyncio.create_task(b.listen())
+            await asyncio.sleep(0)
+
+            await a.set("7", {"email": "x@example.com"})
+            assert (await b.get("7")).value == {"email": "x@example.com"}  # L2 hit, now in b's L1
+            await a.delete("7")
+            await asyncio.sleep(0)
+            assert dropped == ["7"] and await b.get("7") is None
+
+            # only one replica wins the right to fill a key
+            assert await a.claim("8", 1.0) and not await b.claim("8", 1.0)
+            listener.cancel()
+
+        asyncio.run(scenario())
+    finally:
+        sys.path.remove(str(service_dir))
+
+
+def test_owner_lookups_once_per_window(monkeypatch, tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        user_client = _import(monkeypatch, tmp_path)
+        calls = []
+
+        class FakeClient:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, exc_type, exc, tb):
+                return False
+
+            async def get(self, url, timeout=0, headers=None):
+                calls.append(url)
+                await asyncio.sleep(0.01)
+                return httpx.Response(200, json={"id": 7, "email": "a@example.com"})
+
+        monkeypatch.setattr(user_client.httpx, "AsyncClient", FakeClient)
+
+        async def scenario():
+            owners = await asyncio.gather(*(user_client.safe_get_user(7) for _ in range(10)))
+            assert {o["email"] for o in owners} == {"a@example.com"}
+            assert (await user_client.get_user(7))["email"] == "a@example.com"
+            assert len(calls) == 1
+            await user_client.forget_user(7)
+            await user_client.safe_get_user(7)
+            assert len(calls) == 2
+
+        asyncio.run(scenario())
+    finally:
+        sys.path.remove(str(service_dir))
+
+
+def test_owner_forgotten_during_lookup_is_not_cached(monkeypatch, tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        user_client = _import(monkeypatch, tmp_path)
+        calls = []
+
+        class FakeClient:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, exc_type, exc, tb):
+                return False
+
+            async def get(self, url, timeout=0, headers=None):
+                calls.append(url)
+                await asyncio.sleep(0.01)
+                return httpx.Response(200, json={"id": 7, "email": f"v{len(calls)}@example.com"})
+
+        monkeypatch.setattr(user_client.httpx, "AsyncClient", FakeClient)
+
+        async def scenario():
+            lookup = asyncio.ensure_future(user_client.safe_get_user(7))
+            while not calls:
+                await asyncio.sleep(0)
+            # the consumer applies a user-changed event while the answer is in flight
+            await user_client.forget_user(7)
+            assert (await lookup)["email"] == "v1@example.com"
+            assert await user_client.cached_user(7) is None
+            # the next lookup asks user-service again and keeps its answer
+            assert (await user_client.safe_get_user(7))["email"] == "v2@example.com"
+            assert (await user_client.safe_get_user(7))["email"] == "v2@example.com"
+            assert len(calls) == 2
+
+        asyncio.run(scenario())
+    finally:
+        sys.path.remove(str(service_dir))
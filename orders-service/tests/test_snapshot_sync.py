@@ -0,0 +1,61 @@
+import asyncio
+import pathlib
+import sys
+
+
+def test_snapshot_sync_bootstraps_then_reconciles(tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        cfg = importlib.import_module("app.core.config")
+        cfg.settings.POSTGRES_URI = f"sqlite+aiosqlite:///{tmp_path}/orders_sync.db"
+        importlib.import_module("app.main")
+        from app.db.init_db import init_db
+        from app.db.session import _async_session
+        from app.services import snapshot_sync
+        from app.services.user_snapshot_service import get_snapshots
+
+        feed = [
+            {"id": 1, "email": "a@example.com", "full_name": "A", "updated_at": "2026-01-01T00:00:00"},
+            {"id": 2, "email": "b@example.com", "full_name": "B", "updated_at": "2026-01-02T00:00:00"},
+            {"id": 3, "email": "c@example.com", "full_name": "C", "updated_at": "2026-01-03T00:00:00"},
+        ]
+        requests = []
+
+        async def fake_changes(since=None, after_id=0, limit=1000):
+            requests.append(since)
+            rows = sorted(feed, key=lambda u: (u["updated_at"], u["id"]))
+            rows = [u for u in rows if since is None or (u["updated_at"], u["id"]) > (since, after_id)]
+            rows = rows[:limit]
+            last = rows[-1] if rows else None
+            return {
+                "items": rows,
+                "next_since": last["updated_at"] if last else since,
+                "next_after_id": last["id"] if last else after_id,
+                "has_more": len(rows) == limit,
+            }
+
+        snapshot_sync.get_user_changes = fake_changes
+        syncer = snapshot_sync.SnapshotSyncer(page_size=2, overlap_seconds=0)
+
+        async def runner():
+            await init_db()
+            assert await syncer.sync_once() == 3
+            feed[0] = {"id": 1, "email": "a2@example.com", "full_name": "A", "updated_at": "2026-01-04T00:00:00"}
+            # user 3 sits exactly on the watermark and is re-read; upserts are idempotent
+            assert await syncer.sync_once() == 2
+            async with _async_session() as session:
+                return await get_snapshots(session, [1, 2, 3])
+
+        snaps = asyncio.run(runner())
+        assert requests[0] is None  # bootstrap reads the whole feed
+        assert requests[2] == "2026-01-03T00:00:00"  # reconcile starts at the watermark
+        assert snaps[1]["email"] == "a2@example.com"
+        assert snaps[3]["full_name"] == "C"
+    finally:
+        sys.path.remove(str(service_dir))
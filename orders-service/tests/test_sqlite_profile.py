@@ -0,0 +1,91 @@
+import asyncio
+import pathlib
+import sys
+
+from sqlalchemy import func, select, text
+
+
+def test_sqlite_profile_concurrent_writes(tmp_path, monkeypatch):
+    # app/__init__ imports app.main (and the engine) with the config, so configure via env
+    monkeypatch.setenv("POSTGRES_URI", f"sqlite+aiosqlite:///{tmp_path}/orders_sqlite.db")
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        cfg = importlib.import_module("app.core.config")
+        from app.db.init_db import init_db
+        from app.db.session import _async_session, engine
+        from app.db.sqlite import create_sqlite_engine
+        from app.models.order import Order
+        from app.schemas.order import OrderCreateDBSchema
+        from app.services.order_service import crud_order
+
+        async def create(i):
+            async with _async_session() as session:
+                await crud_order.create(session, OrderCreateDBSchema(item_name=f"item-{i}", quantity=1, owner_id=1, status="confirmed"))
+
+        async def runner():
+            await init_db()
+            await asyncio.gather(*(create(i) for i in range(40)))
+            async with engine.connect() as conn:
+                journal = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+                timeout = (await conn.execute(text("PRAGMA busy_timeout"))).scalar()
+            async with _async_session() as session:
+                count = (await session.execute(select(func.count()).select_from(Order))).scalar()
+            return journal, timeout, count
+
+        journal, timeout, count = asyncio.run(runner())
+        assert journal == "wal"
+        assert timeout == cfg.settings.SQLITE_BUSY_TIMEOUT_MS
+        assert count == 40
+
+        # :memory: is shared between pooled connections, which keep separate transactions
+        async def memory():
+            mem = create_sqlite_engine("sqlite+aiosqlite:///:memory:")
+            async with mem.begin() as conn:
+                await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            async with mem.connect() as writer, mem.connect() as reader:
+                await writer.execute(text("INSERT INTO t VALUES (1)"))
+                await reader.rollback()
+                await writer.commit()
+                count = (await reader.execute(text("SELECT count(*) FROM t"))).scalar()
+            await mem.dispose()
+            return count
+
+        assert asyncio.run(memory()) == 1
+
+        # ... without dirty reads: a reader arriving mid-write waits for the commit
+        async def isolation():
+            mem = create_sqlite_engine("sqlite+aiosqlite:///:memory:")
+            async with mem.begin() as conn:
+                await conn.execute(text("CREATE TABLE t (x INTEGER)"))
+            async with mem.connect() as writer, mem.connect() as reader:
+                await writer.execute(text("INSERT INTO t VALUES (1)"))
+                read = asyncio.ensure_future(reader.execute(text("SELECT count(*) FROM t")))
+                await asyncio.sleep(0.1)
+                await writer.rollback()
+                count = (await read).scalar()
+            await mem.dispose()
+            return count
+
+        assert asyncio.run(isolation()) == 0
+
+        # autoflush takes the writer lock too, and a task may nest writing sessions
+        async def locking():
+            async with _async_session() as outer:
+                outer.add(Order(item_name="pending", quantity=1, owner_id=1))
+                await outer.execute(select(func.count()).select_from(Order))  # autoflushes
+                assert outer._holds_writer
+                async with _async_session() as inner:
+                    async with asyncio.timeout(1):  # same task, unlike wait_for
+                        await inner._begin_write()
+                    assert inner._holds_writer
+                await outer.rollback()
+
+        asyncio.run(locking())
+    finally:
+        sys.path.remove(str(service_dir))
@@ -0,0 +1,41 @@
+import asyncio
+import pathlib
+import sys
+
+import pytest
+from sqlalchemy import text
+
+
+def test_production_startup_checks_alembic_revision(tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        cfg = importlib.import_module("app.core.config")
+        cfg.settings.POSTGRES_URI = f"sqlite+aiosqlite:///{tmp_path}/orders_startup.db"
+        importlib.import_module("app.main")
+        from app.db import init_db as init_db_module
+        from app.db.session import engine
+
+        # No alembic_version table: production startup refuses to run
+        with pytest.raises(RuntimeError):
+            asyncio.run(init_db_module.check_schema_revision())
+
+        async def stamp(revision):
+            async with engine.begin() as conn:
+                await conn.execute(text("CREATE TABLE IF NOT EXISTS alembic_version (version_num VARCHAR(32))"))
+                await conn.execute(text("DELETE FROM alembic_version"))
+                await conn.execute(text("INSERT INTO alembic_version VALUES (:rev)"), {"rev": revision})
+
+        asyncio.run(stamp("0001_create_orders_table"))
+        with pytest.raises(RuntimeError, match="expected"):
+            asyncio.run(init_db_module.check_schema_revision())
+
+        asyncio.run(stamp(init_db_module.SCHEMA_REVISION))
+        assert asyncio.run(init_db_module.check_schema_revision()) == init_db_module.SCHEMA_REVISION
+    finally:
+        sys.path.remove(str(service_dir))
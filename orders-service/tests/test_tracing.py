@@ -0,0 +1,142 @@
+import asyncio
+import pathlib
+import sys
+from types import SimpleNamespace
+
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import text
+
+INCOMING = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+def test_trace_continues_through_request_sql_and_events(monkeypatch, tmp_path):
+    monkeypatch.setenv("POSTGRES_URI", f"sqlite+aiosqlite:///{tmp_path}/orders_trace.db")
+    monkeypatch.setenv("TRACING_ENABLED", "true")
+    monkeypatch.setenv("TRACE_EXPORTER", "memory")
+    monkeypatch.setenv("TRACE_SAMPLE_RATE", "1.0")
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        from app.core import tracing
+        from app.db.session import engine
+        from app.events import consumer
+
+        spans = tracing.tracer.exporter.spans
+        app = FastAPI()
+
+        @app.get("/api/v1/orders/{order_id}/")
+        async def read(order_id: int):
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1 FROM sqlite_master"))
+            return tracing.tracer.inject({})
+
+        app.add_middleware(tracing.TracingMiddleware)
+
+        async def scenario():
+            async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+                resp = await client.get("/api/v1/orders/7/", headers={"traceparent": INCOMING})
+                outbound = tracing.parse_traceparent(resp.json()["traceparent"])
+                unsampled = await client.get("/api/v1/orders/7/", headers={"traceparent": INCOMING[:-2] + "00"})
+            return outbound, unsampled.json()["traceparent"]
+
+        outbound, unsampled = asyncio.run(scenario())
+        db, server = spans
+        assert server["name"] == "GET /api/v1/orders/{order_id}/" and server["kind"] == "server"
+        assert server["trace_id"] == INCOMING[3:35] and server["parent_id"] == INCOMING[36:52]
+        assert server["attributes"]["http.status_code"] == 200
+        assert db["name"] == "SELECT sqlite_master" and db["parent_id"] == server["span_id"]
+        # outbound calls carry the server span as their parent
+        assert outbound == tracing.SpanContext(server["trace_id"], server["span_id"], True)
+        # an unsampled caller's decision is propagated and nothing is recorded
+        assert unsampled.endswith("-00") and len(spans) == 2
+
+        class Message(SimpleNamespace):
+            def process(self, ignore_processed=False):
+                return _Processing()
+
+        class _Processing:
+            async def __aenter__(self):
+                return None
+
+            async def __aexit__(self, *exc):
+                return False
+
+        async def noop(session, ev):
+            return None
+
+        monkeypatch.setattr(consumer, "process_user_event", noop)
+        message = Message(
+            body=b'{"id": 1}',
+            content_type="application/json",
+            routing_key="user.updated",
+            # aio-pika hands header values back as bytes
+            headers={"traceparent": f"00-{outbound.trace_id}-{outbound.span_id}-01".encode()},
+        )
+        asyncio.run(consumer._consume_message(message))
+        consumed = spans[-1]
+        assert consumed["name"] == "consume user.updated" and consumed["kind"] == "consumer"
+        assert consumed["trace_id"] == server["trace_id"] and consumed["parent_id"] == server["span_id"]
+
+        otlp = tracing.to_otlp(spans)["resourceSpans"][0]
+        assert otlp["resource"]["attributes"][0]["value"]["stringValue"] == "orders-service"
+        assert len(otlp["scopeSpans"][0]["spans"]) == len(spans)
+    finally:
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+
+        tracing_mod = sys.modules.get("app.core.tracing")
+        if tracing_mod is not None and event.contains(Engine, "before_cursor_execute", tracing_mod._before_cursor_execute):
+            event.remove(Engine, "before_cursor_execute", tracing_mod._before_cursor_execute)
+            event.remove(Engine, "after_cursor_execute", tracing_mod._after_cursor_execute)
+            event.remove(Engine, "handle_error", tracing_mod._handle_error)
+        sys.path.remove(str(service_dir))
+
+
+
+def test_otlp_exporter_posts_every_span(monkeypatch):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        from app.core import tracing
+
+        posted = []
+
+        def collect(request):
+            spans = request.read().decode()
+            posted.append(spans.count('"spanId"'))
+            return httpx.Response(200)
+
+        transport = httpx.MockTransport(collect)
+        real_client, real_async_client = httpx.Client, httpx.AsyncClient
+        monkeypatch.setattr(httpx, "Client", lambda **kw: real_client(transport=transport, **kw))
+        monkeypatch.setattr(httpx, "AsyncClient", lambda **kw: real_async_client(transport=transport, **kw))
+
+        def span(n):
+            return {
+                "trace_id": "0" * 32, "span_id": f"{n:016x}", "parent_id": None, "service": "orders", "name": "s",
+                "kind": "internal", "start": 1.0, "duration_ms": 1.0, "attributes": {}, "error": None,
+            }
+
+        exporter = tracing.OtlpExporter("http://collector/v1/traces", batch_size=2, interval=60)
+
+        async def scenario():
+            for n in range(3):
+                exporter.export(span(n))
+            # the background post is referenced until it finishes
+            assert len(exporter._tasks) == 1
+            await asyncio.gather(*exporter._tasks)
+            assert not exporter._tasks
+
+        asyncio.run(scenario())
+        assert posted == [2]
+        exporter.flush()  # shutdown: the odd span is posted, not dropped
+        assert posted == [2, 1]
+    finally:
+        sys.path.remove(str(service_dir))
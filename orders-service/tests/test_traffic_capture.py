@@ -0,0 +1,103 @@
+import importlib.util
+import json
+import pathlib
+import sys
+
+from fastapi.testclient import TestClient
+
+
+def _load_replay_tool():
+    path = pathlib.Path(__file__).resolve().parents[2] / "tools" / "replay.py"
+    spec = importlib.util.spec_from_file_location("replay_tool", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_capture_middleware_writes_jsonl(tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        cfg = importlib.import_module("app.core.config")
+        capture_file = tmp_path / "capture.jsonl"
+        cfg.settings.CAPTURE_ENABLED = True
+        cfg.settings.CAPTURE_PATH = str(capture_file)
+        main = importlib.import_module("app.main")
+        app = main.create_app()
+        app.router.on_startup.clear()
+
+        with TestClient(app) as client:
+            r = client.get("/api/v1/orders/health?probe=1")
+            assert r.status_code == 204
+
+        records = [json.loads(line) for line in capture_file.read_text().splitlines()]
+        assert len(records) == 1
+        assert records[0]["method"] == "GET"
+        assert records[0]["path"] == "/api/v1/orders/health"
+        assert records[0]["query"] == "probe=1"
+        assert records[0]["status"] == 204
+        assert records[0]["duration_ms"] >= 0
+    finally:
+        cfg.settings.CAPTURE_ENABLED = False
+        sys.path.remove(str(service_dir))
+
+
+def test_replay_schedule_and_percentiles():
+    replay = _load_replay_tool()
+    records = [{"ts": 100.0}, {"ts": 100.5}, {"ts": 102.0}]
+    assert replay.schedule(records, speed=1.0) == [0.0, 0.5, 2.0]
+    assert replay.schedule(records, speed=2.0) == [0.0, 0.25, 1.0]
+
+    summary = replay.summarize(float(v) for v in range(1, 101))
+    assert summary["count"] == 100
+    assert summary["p50"] == 50.0
+    assert summary["p99"] == 99.0
+    assert summary["max"] == 100.0
+
+
+def test_capture_flags_truncated_body_and_replay_skips_it(tmp_path, capsys):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        capture = importlib.import_module("app.core.capture")
+    finally:
+        sys.path.remove(str(service_dir))
+
+    async def echo(scope, receive, send):
+        while (await receive()).get("more_body"):
+            pass
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    capture_file = tmp_path / "capture.jsonl"
+    app = capture.TrafficCaptureMiddleware(echo, str(capture_file), max_body_bytes=8)
+    client = TestClient(app)  # no lifespan: echo only speaks http
+    client.post("/short", content=b"12345678")
+    client.post("/long", content=b"123456789")
+    app.writer.flush()
+
+    records = {r["path"]: r for r in map(json.loads, capture_file.read_text().splitlines())}
+    assert records["/short"]["body"] == "12345678" and "body_truncated" not in records["/short"]
+    assert records["/long"]["body"] == "12345678" and records["/long"]["body_truncated"] is True
+
+    replay = _load_replay_tool()
+    sent = []
+
+    async def fake_replay(records, *args):
+        sent.extend(r["path"] for r in records)
+        return replay.report([], 1.0)
+
+    replay.replay = fake_replay
+    assert replay.main([str(capture_file), "--target", "http://unused", "--json"]) == 0
+    assert sent == ["/short"]
+    assert "1 request(s) whose body was truncated" in capsys.readouterr().err
@@ -0,0 +1,113 @@
+import asyncio
+import pathlib
+import sys
+
+import httpx
+
+
+def _load_user_client():
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        return importlib.import_module("app.services.user_client")
+    finally:
+        sys.path.remove(str(service_dir))
+
+
+def FakeResp(status_code, payload=None):
+    return httpx.Response(status_code, json=payload or {})
+
+
+def _fake_client(handler):
+    class FakeClient:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, exc_type, exc, tb):
+            return False
+
+        async def get(self, url, timeout=0, headers=None):
+            return await handler(url)
+
+    return lambda: FakeClient()
+
+
+def test_breaker_opens_and_serves_cached_owner(monkeypatch):
+    user_client = _load_user_client()
+    user_client.user_service_breaker.failure_threshold = 2
+    calls = {"n": 0}
+
+    async def ok(url):
+        calls["n"] += 1
+        return FakeResp(200, {"id": 7, "email": "owner@example.com", "full_name": "Owner"})
+
+    async def down(url):
+        calls["n"] += 1
+        raise httpx.ConnectError("refused")
+
+    monkeypatch.setattr(user_client.httpx, "AsyncClient", _fake_client(ok))
+    assert asyncio.run(user_client.safe_get_user(7))["email"] == "owner@example.com"
+
+    monkeypatch.setattr(user_client.httpx, "AsyncClient", _fake_client(down))
+    real_sleep = asyncio.sleep
+    monkeypatch.setattr(user_client.asyncio, "sleep", lambda *_: real_sleep(0))
+    asyncio.run(user_client.safe_get_user(7, retries=1))
+    assert user_client.user_service_breaker.state == "open"
+
+    # While open no request goes out and the last known owner is served
+    before = calls["n"]
+    owner = asyncio.run(user_client.safe_get_user(7))
+    assert owner["email"] == "owner@example.com"
+    assert asyncio.run(user_client.safe_get_user(8)) is None
+    assert calls["n"] == before
+    assert user_client.user_service_breaker.snapshot()["short_circuited"] >= 2
+
+
+def test_hedged_request_returns_faster_attempt(monkeypatch):
+    user_client = _load_user_client()
+    monkeypatch.setattr(user_client.settings, "USER_SERVICE_HEDGE_DELAY", 0.01)
+    attempts = {"n": 0}
+
+    async def first_slow(url):
+        attempts["n"] += 1
+        if attempts["n"] == 1:
+            await asyncio.sleep(1.0)
+            return FakeResp(200, {"id": 1, "email": "slow@example.com"})
+        return FakeResp(200, {"id": 1, "email": "fast@example.com"})
+
+    monkeypatch.setattr(user_client.httpx, "AsyncClient", _fake_client(first_slow))
+    user = asyncio.run(user_client.safe_get_user(1))
+    assert user["email"] == "fast@example.com"
+    assert attempts["n"] == 2
+
+
+def test_hedged_request_cancelled_before_hedge_cancels_primary(monkeypatch):
+    user_client = _load_user_client()
+    monkeypatch.setattr(user_client.settings, "USER_SERVICE_HEDGE_DELAY", 0.5)
+    outcome = {}
+
+    async def slow(url):
+        try:
+            await asyncio.sleep(1.0)
+        except asyncio.CancelledError:
+            outcome["primary"] = "cancelled"
+            raise
+        outcome["primary"] = "finished"
+        return FakeResp(200, {"id": 1})
+
+    monkeypatch.setattr(user_client.httpx, "AsyncClient", _fake_client(slow))
+
+    async def scenario():
+        caller = asyncio.ensure_future(user_client._hedged_get("http://users/1", timeout=2.0))
+        await asyncio.sleep(0.05)  # still inside the hedge delay
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        await asyncio.sleep(0.01)
+        return dict(outcome)  # before asyncio.run cancels leftover tasks itself
+
+    assert asyncio.run(scenario()) == {"primary": "cancelled"}
@@ -0,0 +1,85 @@
+import asyncio
+import pathlib
+import sys
+
+
+def test_directory_loads_and_tracks_events(tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        cfg = importlib.import_module("app.core.config")
+        cfg.settings.POSTGRES_URI = f"sqlite+aiosqlite:///{tmp_path}/orders_directory.db"
+        importlib.import_module("app.main")
+        from app.db.init_db import init_db
+        from app.db.session import _async_session
+        from app.events.consumer import process_user_event
+        from app.services.user_directory import user_directory
+
+        async def runner():
+            await init_db()
+            async with _async_session() as session:
+                for uid in (5, 3, 9):
+                    await process_user_event(session, {"type": "user.created", "payload": {"id": uid, "email": f"u{uid}@example.com", "full_name": f"User {uid}"}})
+                assert await user_directory.load(session) == 3
+                # events after the load keep the replica current
+                await process_user_event(session, {"type": "user.updated", "payload": {"id": 3, "email": "new3@example.com", "full_name": "User 3"}})
+                await process_user_event(session, {"type": "user.deleted", "payload": {"id": 9}})
+
+        asyncio.run(runner())
+
+        assert user_directory.get(5) == {"id": 5, "email": "u5@example.com", "full_name": "User 5"}
+        assert user_directory.get(3)["email"] == "new3@example.com"
+        assert user_directory.get(9) is None
+        assert set(user_directory.get_many([3, 5, 9, 42])) == {3, 5}
+
+        user_directory.compact()
+        assert list(user_directory._ids) == [3, 5]
+        stats = user_directory.memory_stats()
+        assert stats["entries"] == 2
+        assert stats["bytes_per_entry"] > 0
+    finally:
+        sys.path.remove(str(service_dir))
+
+
+def test_directory_compacts_off_loop_and_keeps_counts():
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        UserDirectory = importlib.import_module("app.services.user_directory").UserDirectory
+    finally:
+        sys.path.remove(str(service_dir))
+
+    async def scenario():
+        directory = UserDirectory()
+        for uid in range(1100, 0, -1):
+            directory.put(uid, f"u{uid}@example.com", None)
+        # the overlay passed the threshold: it is being merged in a worker thread
+        assert directory._frozen and len(directory._ids) == 0
+        directory.remove(7)
+        directory.put(2000, "late@example.com", "Late")
+        assert directory.get(8)["email"] == "u8@example.com" and directory.get(7) is None
+        assert len(directory) == 1100
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if not directory._frozen:
+                break
+        # the first 1025 puts (ids 1100..76) made the new base; later ones stay in the overlay
+        assert not directory._frozen and list(directory._ids) == list(range(76, 1101))
+        assert directory.get(7) is None and directory.get(2000)["full_name"] == "Late"
+        before = directory.memory_stats()
+        directory.compact()
+        after = directory.memory_stats()
+        assert before["entries"] == after["entries"] == len(directory) == 1100
+        assert 7 not in directory._ids and directory._ids[-1] == 2000
+
+    asyncio.run(scenario())
@@ -0,0 +1,89 @@
+"""Compare JSON and msgpack for inter-service payloads: encode/decode CPU and bytes on the wire.
+
+Uses the services' own codec (user-service ``app.core.encoding``) on two shapes:
+a change-feed page of users (batch lookups / snapshot sync) and a burst of user events.
+
+Usage:
+    python tools/bench_encoding.py --users 1000 --events 1000 --repeat 50
+"""
+import argparse
+import pathlib
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent / "user-service"))
+
+from app.core.encoding import JSON, MSGPACK, decode, encode, msgpack_available  # noqa: E402
+
+
+def user_page(n: int) -> Dict[str, Any]:
+    start = datetime(2026, 1, 1)
+    items = [
+        {
+            "id": i,
+            "email": f"user{i}@example.com",
+            "full_name": f"User Number {i}",
+            "is_active": True,
+            "is_superuser": False,
+            "updated_at": start + timedelta(seconds=i),
+        }
+        for i in range(1, n + 1)
+    ]
+    return {"items": items, "next_since": items[-1]["updated_at"] if items else None, "next_after_id": n, "has_more": True}
+
+
+def event_burst(n: int) -> List[Dict[str, Any]]:
+    return [{"id": i, "email": f"user{i}@example.com", "full_name": f"User Number {i}"} for i in range(1, n + 1)]
+
+
+def _best(fn: Callable[[], Any], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench(name: str, messages: Sequence[Any], repeat: int) -> List[Dict[str, Any]]:
+    rows = []
+    for content_type in (JSON, MSGPACK):
+        if content_type == MSGPACK and not msgpack_available():
+            continue
+        bodies = [encode(m, content_type) for m in messages]
+        rows.append(
+            {
+                "payload": name,
+                "encoding": content_type,
+                "bytes": sum(len(b) for b in bodies),
+                "encode_ms": _best(lambda: [encode(m, content_type) for m in messages], repeat) * 1000,
+                "decode_ms": _best(lambda: [decode(b, content_type) for b in bodies], repeat) * 1000,
+            }
+        )
+    return rows
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000, help="users in the change-feed page")
+    parser.add_argument("--events", type=int, default=1000, help="events in the burst (one message each)")
+    parser.add_argument("--repeat", type=int, default=50, help="runs per measurement; the best is reported")
+    args = parser.parse_args(argv)
+
+    if not msgpack_available():
+        print("msgpack is not installed; showing JSON only (pip install msgpack)")
+    rows = bench(f"page of {args.users} users", [user_page(args.users)], args.repeat)
+    rows += bench(f"{args.events} events", event_burst(args.events), args.repeat)
+    print(f"{'payload':<24} {'encoding':<22} {'bytes':>10} {'encode ms':>10} {'decode ms':>10}")
+    for row in rows:
+        print(
+            f"{row['payload']:<24} {row['encoding']:<22} {row['bytes']:>10} "
+            f"{row['encode_ms']:>10.2f} {row['decode_ms']:>10.2f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,188 @@
+"""Replay a traffic capture against a running service.
+
+Reads a JSONL capture produced by ``TrafficCaptureMiddleware`` (``CAPTURE_ENABLED=true``
+on either service) and re-issues every request at its original offset, optionally
+compressed or stretched with ``--speed``. Scheduling is open-loop: each request is
+fired at its due time whether or not earlier requests have completed, and latency is
+measured from the scheduled send time so a slow server cannot hide queueing delay.
+Requests whose body was truncated at capture (``body_truncated``) are skipped.
+
+Usage:
+    python tools/replay.py orders-capture.jsonl --target http://localhost:8000 --speed 2
+"""
+import argparse
+import asyncio
+import base64
+import json
+import math
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import httpx
+
+
+def load_capture(path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    records = []
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    records.sort(key=lambda r: r.get("ts", 0.0))
+    return records[:limit] if limit else records
+
+
+def schedule(records: Sequence[Dict[str, Any]], speed: float = 1.0) -> List[float]:
+    """Return the send offset (seconds from replay start) of every record."""
+    if not records:
+        return []
+    if speed <= 0:
+        raise ValueError("speed must be positive")
+    t0 = records[0].get("ts", 0.0)
+    return [(r.get("ts", t0) - t0) / speed for r in records]
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies_ms: Iterable[float]) -> Dict[str, float]:
+    values = sorted(latencies_ms)
+    summary = {"count": len(values)}
+    for pct in (50, 90, 95, 99, 99.9):
+        summary[f"p{pct:g}"] = round(percentile(values, pct), 3)
+    summary["max"] = round(values[-1], 3) if values else 0.0
+    summary["mean"] = round(sum(values) / len(values), 3) if values else 0.0
+    return summary
+
+
+def _body(record: Dict[str, Any]) -> Optional[bytes]:
+    body = record.get("body")
+    if body is None:
+        return None
+    if record.get("body_encoding") == "base64":
+        return base64.b64decode(body)
+    return body.encode("utf-8")
+
+
+async def _send(client: httpx.AsyncClient, record: Dict[str, Any], due: float, results: List[Dict[str, Any]]):
+    headers = {}
+    if record.get("content_type"):
+        headers["content-type"] = record["content_type"]
+    url = record["path"] + (f"?{record['query']}" if record.get("query") else "")
+    sent = time.perf_counter()
+    status: Any
+    try:
+        resp = await client.request(record["method"], url, content=_body(record), headers=headers)
+        status = resp.status_code
+    except httpx.HTTPError as exc:
+        status = type(exc).__name__
+    done = time.perf_counter()
+    results.append(
+        {
+            "path": record["path"],
+            "status": status,
+            "latency_ms": (done - due) * 1000,
+            "service_ms": (done - sent) * 1000,
+            "captured_ms": record.get("duration_ms"),
+        }
+    )
+
+
+async def replay(
+    records: Sequence[Dict[str, Any]],
+    target: str,
+    speed: float = 1.0,
+    timeout: float = 30.0,
+    headers: Optional[Dict[str, str]] = None,
+) -> Dict[str, Any]:
+    offsets = schedule(records, speed)
+    results: List[Dict[str, Any]] = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+    async with httpx.AsyncClient(base_url=target, timeout=timeout, headers=headers, limits=limits) as client:
+        start = time.perf_counter()
+        tasks = []
+        for record, offset in zip(records, offsets):
+            due = start + offset
+            delay = due - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(_send(client, record, due, results)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    return report(results, elapsed)
+
+
+def report(results: Sequence[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    by_path: Dict[str, List[float]] = {}
+    for r in results:
+        by_path.setdefault(r["path"], []).append(r["latency_ms"])
+    return {
+        "requests": len(results),
+        "elapsed_s": round(elapsed, 3),
+        "achieved_rps": round(len(results) / elapsed, 2) if elapsed > 0 else 0.0,
+        "status": dict(Counter(str(r["status"]) for r in results)),
+        "latency_ms": summarize(r["latency_ms"] for r in results),
+        "service_ms": summarize(r["service_ms"] for r in results),
+        "captured_ms": summarize(r["captured_ms"] for r in results if r["captured_ms"] is not None),
+        "paths": {path: summarize(values) for path, values in sorted(by_path.items())},
+    }
+
+
+def _print_report(result: Dict[str, Any]) -> None:
+    print(f"requests={result['requests']} elapsed={result['elapsed_s']}s rps={result['achieved_rps']}")
+    print(f"status: {result['status']}")
+    cols = ("count", "p50", "p90", "p95", "p99", "p99.9", "max", "mean")
+    print(f"{'':<40}" + "".join(f"{c:>10}" for c in cols))
+    rows = [("latency (scheduled)", result["latency_ms"]), ("service", result["service_ms"])]
+    rows.append(("captured", result["captured_ms"]))
+    rows.extend(result["paths"].items())
+    for name, summary in rows:
+        print(f"{name[:40]:<40}" + "".join(f"{summary.get(c, 0):>10}" for c in cols))
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("capture", help="JSONL capture file")
+    parser.add_argument("--target", required=True, help="base URL, e.g. http://localhost:8000")
+    parser.add_argument("--speed", type=float, default=1.0, help="rate multiplier (2 = twice as fast)")
+    parser.add_argument("--limit", type=int, default=None, help="replay only the first N requests")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--header", action="append", default=[], help="extra header 'Name: value'")
+    parser.add_argument("--skip-redacted", action="store_true", help="skip requests whose body was not captured")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    records = load_capture(args.capture, args.limit)
+    truncated = sum(1 for r in records if r.get("body_truncated"))
+    if truncated:
+        # only a prefix of the body was captured; sending it would replay a different request
+        print(f"skipping {truncated} request(s) whose body was truncated at capture", file=sys.stderr)
+        records = [r for r in records if not r.get("body_truncated")]
+    if args.skip_redacted:
+        records = [r for r in records if not r.get("body_redacted")]
+    if not records:
+        print("capture is empty", file=sys.stderr)
+        return 1
+    headers = dict(h.split(":", 1) for h in args.header)
+    headers = {k.strip(): v.strip() for k, v in headers.items()}
+    result = asyncio.run(replay(records, args.target, args.speed, args.timeout, headers))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        _print_report(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+"""add user updated_at
+
+Revision ID: 0002_add_user_updated_at
+Revises: 0001_create_users_and_items
+Create Date: 2026-10-19 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002_add_user_updated_at'
+down_revision = '0001_create_users_and_items'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        'user',
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.text('NOW()')),
+    )
+    op.create_index('ix_user_updated_at', 'user', ['updated_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_updated_at', table_name='user')
+    op.drop_column('user', 'updated_at')
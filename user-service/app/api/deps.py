@@ -1,26 +1,46 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
 
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from app.core.jwt_helper import decode as jwt_decode, JWTError
 from pydantic import ValidationError
 
+from app.core.cache import TieredCache, cache_backend_from_settings
 from app.core.config import settings
 from app.core.security import JWT_ALGO, verify_password
 from app.schemas.user import AuthTokenPayload
-from app.db.session import get_session
+from app.db.session import _async_session, get_primary_session, get_session
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.services.user_service import crud_user
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login")
 
+# Authenticated users by id (PRINCIPAL_CACHE_TTL_SECONDS > 0), shared across workers and pods
+# with a CACHE_BACKEND. The password hash is never cached. User updates and deletes drop the
+# entry in every process only with CACHE_BACKEND=redis; with "none" or "memory" just the
+# worker that handled the write forgets it, and the others serve the old principal (including
+# is_active/is_superuser) for up to PRINCIPAL_CACHE_TTL_SECONDS.
+principal_cache = TieredCache(
+    "principals",
+    backend=cache_backend_from_settings(settings),
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_SIZE,
+)
+_PRINCIPAL_FIELDS = ("id", "email", "full_name", "is_active", "is_superuser")
+
 
 async def provide_session() -> AsyncGenerator[AsyncSession, None]:
     async for s in get_session():
         yield s
 
 
+async def provide_primary_session() -> AsyncGenerator[AsyncSession, None]:
+    # For write endpoints: every read sees the primary, not a possibly lagging replica
+    async for s in get_primary_session():
+        yield s
+
+
 def extract_token_data(token: str = Depends(oauth2_scheme)) -> AuthTokenPayload:
     try:
         payload = jwt_decode(token, settings.SECRET_KEY.get_secret_value(), algorithms=[JWT_ALGO])
@@ -36,13 +56,38 @@ async def verify_user(session: AsyncSession, email: str, password: str):
     return None
 
 
+async def _cached_principal(user_id: int):
+    from app.models.user import User
+
+    key = str(user_id)
+    entry = await principal_cache.get(key)
+    if entry is not None:
+        return User(**entry.value)
+
+    async def load() -> Optional[dict]:
+        # From the primary: a lagging replica could hand back privileges a write just revoked.
+        # The epoch keeps a read that raced an update or delete out of the cache.
+        epoch = principal_cache.epoch
+        async with _async_session() as session:
+            user = await crud_user.get(session, id=user_id)
+        if user is None:
+            return None
+        fields = {name: getattr(user, name) for name in _PRINCIPAL_FIELDS}
+        await principal_cache.set(key, fields, epoch=epoch)
+        return fields
+
+    fields = await principal_cache.single_flight(key, load)
+    return User(**fields) if fields is not None else None
+
+
 async def fetch_current_user(
     token_data: AuthTokenPayload = Depends(extract_token_data),
     session: AsyncSession = Depends(provide_session),
 ):
-    from app.models.user import User
-
-    user = await crud_user.get(session, id=int(token_data.user_id))
+    if settings.PRINCIPAL_CACHE_TTL_SECONDS > 0:
+        user = await _cached_principal(int(token_data.user_id))
+    else:
+        user = await crud_user.get(session, id=int(token_data.user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -0,0 +1,100 @@
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import on_superuser
+from app.core import memory
+from app.core.config import settings
+from app.core.profiler import ProfilerBusy, parse_header_filter, run_profile
+
+admin_router = APIRouter(prefix="/admin", tags=["Admin"], dependencies=[Depends(on_superuser)])
+
+
+@admin_router.get("/profile")
+async def profile(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(settings.PROFILER_INTERVAL_MS, ge=1),
+    header: Optional[str] = Query(None, description='Only requests carrying this header ("name" or "name=value")'),
+    include_idle: bool = False,
+    format: str = Query("collapsed", pattern="^(collapsed|json)$"),
+):
+    # Sample every thread's stack for `seconds`; collapsed output feeds flamegraph.pl / speedscope
+    if not settings.PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    try:
+        profiler = await run_profile(
+            min(seconds, settings.PROFILER_MAX_SECONDS),
+            interval=interval_ms / 1000,
+            header=parse_header_filter(header),
+            include_idle=include_idle,
+        )
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    if format == "json":
+        return profiler.summary()
+    return PlainTextResponse(profiler.collapsed())
+
+
+def _require_memory_diagnostics() -> None:
+    if not settings.MEMORY_DIAGNOSTICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Memory diagnostics are disabled")
+
+
+@admin_router.get("/memory", dependencies=[Depends(_require_memory_diagnostics)])
+async def memory_report():
+    # RSS, gc counts, registered cache sizes, session identity maps and tracemalloc status.
+    # Only the heap walk goes to a thread; sessions and caches are read here, on the loop
+    gc_objects = await asyncio.to_thread(memory.heap_objects)
+    return {**memory.report(gc_objects), "tracemalloc": memory.snapshot_store.status()}
+
+
+@admin_router.post("/memory/tracemalloc/start", dependencies=[Depends(_require_memory_diagnostics)])
+async def tracemalloc_start(frames: int = Query(1, ge=1, le=50)):
+    memory.snapshot_store.start(frames)
+    return memory.snapshot_store.status()
+
+
+@admin_router.post("/memory/tracemalloc/stop", dependencies=[Depends(_require_memory_diagnostics)])
+async def tracemalloc_stop():
+    memory.snapshot_store.stop()
+    return memory.snapshot_store.status()
+
+
+@admin_router.post("/memory/snapshots", dependencies=[Depends(_require_memory_diagnostics)])
+async def take_snapshot(name: Optional[str] = None):
+    try:
+        # walking every traced block takes a while on a large heap; keep the loop responsive
+        taken = await asyncio.to_thread(memory.snapshot_store.take, name)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    return {"name": taken, **memory.snapshot_store.status()}
+
+
+@admin_router.get("/memory/snapshots/diff", dependencies=[Depends(_require_memory_diagnostics)])
+async def snapshot_diff(
+    base: str,
+    compare: Optional[str] = Query(None, description="Defaults to a new snapshot taken now"),
+    group_by: str = Query("lineno", pattern="^(lineno|filename|traceback)$"),
+    limit: int = Query(25, ge=1, le=500),
+):
+    store = memory.snapshot_store
+    try:
+        if compare is None:
+            compare = await asyncio.to_thread(store.take)
+        top = await asyncio.to_thread(store.diff, base, compare, group_by, limit)
+    except RuntimeError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    except KeyError as exc:
+        raise HTTPException(status_code=404, detail=f"Unknown snapshot {exc}")
+    return {"base": base, "compare": compare, "group_by": group_by, "top": top}
+
+
+@admin_router.get("/loop-lag")
+async def loop_lag(request: Request, limit: int = Query(20, ge=1, le=100)):
+    # Lag histogram plus the call sites caught blocking the loop, most frequent first
+    monitor = getattr(request.app.state, "loop_monitor", None)
+    if monitor is None:
+        raise HTTPException(status_code=404, detail="Loop lag monitor is disabled")
+    return {**monitor.snapshot(), "blocking": monitor.blocking_stacks(limit)}
@@ -1,17 +1,64 @@
-from fastapi import APIRouter, HTTPException, Depends
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import provide_session
-from app.services.user_service import crud_user
-from app.schemas.user import UserResponse
+from app.core.encoding import JSON, encode, negotiate
+from app.core.etag import make_etag, not_modified
+from app.services.user_service import crud_user, get_users_changed_since
+from app.schemas.user import UserChangePage, UserResponse
 
 internal_router = APIRouter(prefix="/users", tags=["Internal"])
 
 
+def _negotiated(request: Request, response: Response, model: type[BaseModel], payload, headers: Optional[dict] = None):
+    # JSON stays the default; callers sending `Accept: application/x-msgpack` get msgpack.
+    # Both come from one URL (and ETag), so shared caches must key on Accept either way
+    response.headers["Vary"] = "Accept"
+    content_type = negotiate(request.headers.get("accept"))
+    if content_type == JSON:
+        return payload
+    body = model.model_validate(payload, from_attributes=True).model_dump()
+    return Response(encode(body, content_type), media_type=content_type, headers={"Vary": "Accept", **(headers or {})})
+
+
+@internal_router.get("/changes", response_model=UserChangePage)
+async def internal_user_changes(
+    request: Request,
+    response: Response,
+    since: Optional[datetime] = None,
+    after_id: int = 0,
+    limit: int = Query(500, ge=1, le=5000),
+    session: AsyncSession = Depends(provide_session),
+):
+    # Change feed for downstream replicas (orders-service user_snapshot). Omit `since` for a
+    # full bootstrap; hard deletes are not represented here and still flow via user.deleted.
+    users = await get_users_changed_since(session, since=since, after_id=after_id, limit=limit)
+    last = users[-1] if users else None
+    page = {
+        "items": users,
+        "next_since": last.updated_at if last else since,
+        "next_after_id": last.id if last else after_id,
+        "has_more": len(users) == limit,
+    }
+    return _negotiated(request, response, UserChangePage, page)
+
+
 @internal_router.get("/{user_id}/", response_model=UserResponse)
-async def internal_get_user(user_id: int, session: AsyncSession = Depends(provide_session)):
-    # Public internal lookup used by other services (no auth)
+async def internal_get_user(
+    request: Request, response: Response, user_id: int, session: AsyncSession = Depends(provide_session)
+):
+    # Public internal lookup used by other services (no auth). Callers revalidate their cached
+    # copy with If-None-Match; an unchanged user costs a header-only 304.
     user = await crud_user.get(session, id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    etag = make_etag(user.id, user.updated_at, user.email, user.full_name, user.is_active, user.is_superuser)
+    unchanged = not_modified(request, response, etag)
+    if unchanged is not None:
+        unchanged.headers["Vary"] = "Accept"
+        return unchanged
+    return _negotiated(request, response, UserResponse, user, headers={"ETag": etag})
@@ -1,10 +1,10 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api.deps import provide_session, fetch_current_user, on_superuser
+from app.api.deps import provide_primary_session, provide_session, fetch_current_user, on_superuser, principal_cache
 from app.schemas.user import (
     UserCreateSchema,
     UserUpdateDBSchema,
@@ -25,6 +25,28 @@ async def health():
     return {"status": "ok"}
 
 
+@users_router.get("/ready")
+async def ready(request: Request):
+    # Readiness, unlike /health (liveness): 503 until startup warm-up has finished
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(status_code=503, detail="Warming up")
+    return {"status": "ready", "startup": request.app.state.startup_timings}
+
+
+@users_router.get("/health/admission")
+async def admission_health(request: Request):
+    # Per route class limit, in-flight, queued and shed counts (ADMISSION_ENABLED)
+    admission = getattr(request.app.state, "admission", None)
+    return admission.snapshot() if admission is not None else {}
+
+
+@users_router.get("/health/loop-lag")
+async def loop_lag_health(request: Request):
+    # Event-loop scheduling delay histogram (LOOP_LAG_MONITOR_ENABLED); stacks are under /admin
+    monitor = getattr(request.app.state, "loop_monitor", None)
+    return monitor.snapshot() if monitor is not None else {}
+
+
 
 @users_router.get("/", response_model=List[UserResponse], dependencies=[Depends(on_superuser)])
 async def read_users(offset: int = 0, limit: int = 100, session: AsyncSession = Depends(provide_session)):
@@ -33,7 +55,7 @@ async def read_users(offset: int = 0, limit: int = 100, session: AsyncSession =
 
 
 @users_router.post("/", response_model=UserResponse, dependencies=[Depends(on_superuser)])
-async def create_user(user_in: UserCreateSchema, session: AsyncSession = Depends(provide_session)):
+async def create_user(user_in: UserCreateSchema, session: AsyncSession = Depends(provide_primary_session)):
     existing_user = await crud_user.get(session, email=user_in.email)
     if existing_user:
         raise HTTPException(status_code=409, detail="The user with this email already exists in the system")
@@ -69,7 +91,7 @@ async def read_user(
 async def update_user(
     user_id: int,
     user_in: UserUpdateSchema,
-    session: AsyncSession = Depends(provide_session),
+    session: AsyncSession = Depends(provide_primary_session),
 ):
     user = await crud_user.get(session, id=user_id)
     if not user:
@@ -79,6 +101,7 @@ async def update_user(
         if user_in.password:
             update_data["hashed_password"] = hash_password(user_in.password)
         user = await crud_user.update(session, db_obj=user, obj_in=update_data)
+        await principal_cache.delete(str(user_id))
         try:
             await publish_user_event("updated", {"id": user.id, "email": user.email, "full_name": user.full_name, "is_active": user.is_active, "is_superuser": user.is_superuser})
         except Exception:
@@ -92,7 +115,7 @@ async def update_user(
 async def delete_user(
     user_id: int,
     current_user: User = Depends(on_superuser),
-    session: AsyncSession = Depends(provide_session),
+    session: AsyncSession = Depends(provide_primary_session),
 ):
     user = await crud_user.get(session, id=user_id)
     if not user:
@@ -100,6 +123,7 @@ async def delete_user(
     if current_user.id == user_id:
         raise HTTPException(status_code=403, detail="User can't delete itself")
     await crud_user.delete(session, db_obj=user)
+    await principal_cache.delete(str(user_id))
     try:
         await publish_user_event("deleted", {"id": user.id})
     except Exception:
@@ -0,0 +1,272 @@
+"""Two-tier cache: an in-process LRU (L1) in front of an optional shared backend (L2).
+
+With ``CACHE_BACKEND=redis`` every worker and pod reads and fills the same L2, so a value
+loaded by one process is a hit for all of them. Deletes are broadcast on a pub/sub channel,
+and each process's ``listen()`` task drops its L1 copy. ``memory`` is an in-process stand-in
+with the same interface (tests, single-process runs); ``none`` leaves the L1 alone.
+
+The cache never fails a request: a backend error is logged and the call carries on as if
+the entry were missing. Values must be JSON-serialisable.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.encoding import JSON, decode, encode
+
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    stored_at: float  # wall clock, so ages compare across processes
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+
+class MemoryBackend:
+    """In-process stand-in for a shared backend: ``get``/``set``/``add``/``delete`` plus pub/sub."""
+
+    def __init__(self) -> None:
+        self._data: Dict[str, Tuple[bytes, float]] = {}
+        self._channels: Dict[str, List[asyncio.Queue]] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None or item[1] <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return item[0]
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._data[key] = (value, time.monotonic() + ttl)
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        if await self.get(key) is not None:
+            return False
+        await self.set(key, value, ttl)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def publish(self, channel: str, message: str) -> None:
+        for queue in self._channels.get(channel, []):
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._channels.setdefault(channel, []).append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._channels[channel].remove(queue)
+
+
+class RedisBackend:
+    """Redis (or any Redis-compatible server) via ``redis.asyncio``."""
+
+    def __init__(self, url: str) -> None:
+        from redis import asyncio as aioredis
+
+        self._redis = aioredis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._redis.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def add(self, key: str, value: bytes, ttl: float) -> bool:
+        return bool(await self._redis.set(key, value, px=max(1, int(ttl * 1000)), nx=True))
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(key)
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._redis.publish(channel, message)
+
+    async def subscribe(self, channel: str) -> AsyncIterator[str]:
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") == "message":
+                    data = message["data"]
+                    yield data.decode() if isinstance(data, bytes) else data
+        finally:
+            await pubsub.unsubscribe(channel)
+            await pubsub.close()
+
+
+_memory_backend = MemoryBackend()
+
+
+def cache_backend_from_settings(settings):
+    """Shared backend named by CACHE_BACKEND ("none", "memory" or "redis"); None for L1 only."""
+    kind = settings.CACHE_BACKEND
+    if kind == "memory":
+        return _memory_backend
+    if kind == "redis":
+        try:
+            return RedisBackend(f"redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}/0")
+        except ImportError:
+            logger.warning("CACHE_BACKEND=redis but the redis package is not installed; using the in-process cache only")
+    return None
+
+
+class TieredCache:
+    """Named cache of JSON values with a per-process LRU and an optional shared backend.
+
+    ``get`` checks the LRU, then the backend, and copies backend hits into the LRU. Entries
+    are kept for ``ttl`` seconds, and callers decide from ``CacheEntry.age`` whether a value
+    is fresh enough. ``delete`` is broadcast to every process running ``listen()``.
+    ``on_invalidate(key)`` runs in each process for each broadcast delete, so derived caches
+    can follow. ``epoch`` counts the deletes seen here, local or broadcast: a loader reads it
+    before going to the database and passes it to ``set``, which then skips the write if a
+    delete landed in between (the loaded value may predate it).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        backend=None,
+        ttl: float = 300.0,
+        max_entries: int = 10000,
+        on_invalidate: Optional[Callable[[str], None]] = None,
+    ) -> None:
+        self.name = name
+        self.backend = backend
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.on_invalidate = on_invalidate
+        self._local: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.epoch = 0
+        self.channel = f"cache:{name}:invalidate"
+
+    def _key(self, key: str) -> str:
+        return f"cache:{self.name}:{key}"
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[CacheEntry]:
+        entry = self._local.get(key)
+        if entry is not None:
+            if entry.age < self.ttl:
+                self._local.move_to_end(key)
+                return entry
+            del self._local[key]
+        if self.backend is None:
+            return None
+        try:
+            raw = await self.backend.get(self._key(key))
+        except Exception as exc:
+            logger.warning("cache %s: backend get failed: %s", self.name, exc)
+            return None
+        if raw is None:
+            return None
+        value, stored_at = decode(raw, JSON)
+        entry = CacheEntry(value, stored_at)
+        if entry.age >= self.ttl:
+            return None
+        self._remember(key, entry)
+        return entry
+
+    async def set(self, key: str, value: Any, epoch: Optional[int] = None) -> CacheEntry:
+        """Store ``value``; with ``epoch``, only if no delete has been seen since it was read."""
+        entry = CacheEntry(value, time.time())
+        if epoch is not None and epoch != self.epoch:
+            return entry
+        self._remember(key, entry)
+        if self.backend is not None:
+            try:
+                await self.backend.set(self._key(key), encode([value, entry.stored_at], JSON), self.ttl)
+            except Exception as exc:
+                logger.warning("cache %s: backend set failed: %s", self.name, exc)
+        return entry
+
+    async def delete(self, key: str) -> None:
+        """Drop ``key`` here and in the backend, and tell every other process to drop it."""
+        self.epoch += 1
+        self._local.pop(key, None)
+        if self.on_invalidate is not None:
+            self.on_invalidate(key)
+        if self.backend is None:
+            return
+        try:
+            await self.backend.delete(self._key(key))
+            await self.backend.publish(self.channel, key)
+        except Exception as exc:
+            logger.warning("cache %s: backend delete failed: %s", self.name, exc)
+
+    async def claim(self, key: str, timeout: float) -> bool:
+        """Take the fleet-wide right to fill ``key`` for ``timeout`` seconds (always true without a backend)."""
+        if self.backend is None:
+            return True
+        try:
+            return await self.backend.add(self._key(key) + ":fill", b"1", timeout)
+        except Exception as exc:
+            logger.warning("cache %s: backend claim failed: %s", self.name, exc)
+            return True
+
+    async def release(self, key: str) -> None:
+        """Give up the right to fill ``key`` taken with ``claim``."""
+        if self.backend is None:
+            return
+        try:
+            await self.backend.delete(self._key(key) + ":fill")
+        except Exception as exc:
+            logger.warning("cache %s: backend release failed: %s", self.name, exc)
+
+    async def wait_for_fill(self, key: str, newer_than: float, timeout: float, poll: float = 0.02) -> Optional[CacheEntry]:
+        """Poll for an entry stored after ``newer_than`` (another process's fill) for up to ``timeout``."""
+        deadline = time.monotonic() + timeout
+        while True:
+            entry = await self.get(key)
+            if entry is not None and entry.stored_at >= newer_than:
+                return entry
+            if time.monotonic() >= deadline:
+                return None
+            self._local.pop(key, None)  # re-read the backend on the next poll
+            await asyncio.sleep(poll)
+
+    async def single_flight(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn()`` once per ``key`` in this process; concurrent callers share its result."""
+        flight = self._inflight.get(key)
+        if flight is not None:
+            return await asyncio.shield(flight)
+        # its own task, so a caller that gives up does not cancel it for the others
+        flight = asyncio.ensure_future(fn())
+        self._inflight[key] = flight
+        flight.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(flight)
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._local), "filling": len(self._inflight)}
+
+    async def listen(self, retry_seconds: float = 5.0) -> None:
+        """Apply deletes broadcast by other processes until cancelled (no-op without a backend)."""
+        if self.backend is None:
+            return
+        while True:
+            try:
+                async for key in self.backend.subscribe(self.channel):
+                    self.epoch += 1
+                    self._local.pop(key, None)
+                    if self.on_invalidate is not None:
+                        self.on_invalidate(key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("cache %s: invalidation listener failed, retrying: %s", self.name, exc)
+            await asyncio.sleep(retry_seconds)
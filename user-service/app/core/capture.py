@@ -0,0 +1,155 @@
+"""Opt-in traffic capture middleware.
+
+Samples incoming HTTP requests (method, path, query, body, status and timing) into a
+JSONL file that ``tools/replay.py`` can re-issue against a running service. Bodies longer
+than ``max_body_bytes`` are cut there and flagged ``body_truncated``. Records are
+buffered in memory and appended to disk from a worker thread so capture never blocks
+the event loop on file I/O.
+"""
+import asyncio
+import base64
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureWriter:
+    """Buffer capture records and append them to a JSONL file in batches."""
+
+    def __init__(self, path: str, flush_every: int = 50, flush_interval: float = 1.0) -> None:
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._buffer: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        self._file_lock = threading.Lock()
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        self._buffer.append(entry)
+        due = time.monotonic() - self._last_flush >= self.flush_interval
+        if len(self._buffer) >= self.flush_every or due:
+            batch = self._take()
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self._write(batch)
+                return
+            loop.run_in_executor(None, self._write, batch)
+
+    def flush(self) -> None:
+        """Synchronously write any buffered records (used at shutdown and in tests)."""
+        batch = self._take()
+        if batch:
+            self._write(batch)
+
+    def _take(self) -> List[Dict[str, Any]]:
+        batch, self._buffer = self._buffer, []
+        self._last_flush = time.monotonic()
+        return batch
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in batch)
+        try:
+            with self._file_lock, open(self.path, "a", encoding="utf-8") as fh:
+                fh.write(lines)
+        except OSError as exc:  # pragma: no cover - disk errors must not break requests
+            logger.warning("traffic capture write to %s failed: %s", self.path, exc)
+
+
+def _encode_body(body: bytes) -> Dict[str, Any]:
+    if not body:
+        return {"body": None}
+    try:
+        return {"body": body.decode("utf-8")}
+    except UnicodeDecodeError:
+        return {"body": base64.b64encode(body).decode("ascii"), "body_encoding": "base64"}
+
+
+class TrafficCaptureMiddleware:
+    """Pure ASGI middleware that samples requests into a :class:`CaptureWriter`."""
+
+    def __init__(
+        self,
+        app,
+        path: str,
+        sample_rate: float = 1.0,
+        max_body_bytes: int = 65536,
+        exclude_body_paths: Iterable[str] = (),
+        writer: Optional[CaptureWriter] = None,
+    ) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.max_body_bytes = max_body_bytes
+        self.exclude_body_paths = tuple(exclude_body_paths)
+        self.writer = writer or CaptureWriter(path)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self.app(scope, self._lifespan_receive(receive), send)
+            return
+        if scope["type"] != "http" or random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope.get("path", "")
+        keep_body = not any(path.startswith(prefix) for prefix in self.exclude_body_paths)
+        chunks: List[bytes] = []
+        size = 0
+        truncated = False
+
+        async def capture_receive():
+            nonlocal size, truncated
+            message = await receive()
+            if keep_body and message["type"] == "http.request":
+                body = message.get("body", b"")
+                room = self.max_body_bytes - size
+                if len(body) > room:
+                    truncated = True  # replaying the prefix would send a different request
+                chunk = body[:room]
+                chunks.append(chunk)
+                size += len(chunk)
+            return message
+
+        status = 500
+
+        async def capture_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started_at = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, capture_receive, capture_send)
+        finally:
+            headers = dict(scope.get("headers") or [])
+            entry: Dict[str, Any] = {
+                "ts": started_at,
+                "method": scope.get("method"),
+                "path": path,
+                "query": scope.get("query_string", b"").decode("latin-1"),
+                "content_type": headers.get(b"content-type", b"").decode("latin-1") or None,
+                "status": status,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            }
+            entry.update(_encode_body(b"".join(chunks)))
+            if not keep_body:
+                entry["body_redacted"] = True
+            elif truncated:
+                entry["body_truncated"] = True
+            self.writer.record(entry)
+
+    def _lifespan_receive(self, receive):
+        async def wrapped():
+            message = await receive()
+            if message["type"] == "lifespan.shutdown":
+                self.writer.flush()
+            return message
+
+        return wrapped
@@ -0,0 +1,34 @@
+"""Entity tags for conditional GETs (``ETag`` / ``If-None-Match``).
+
+Tags are weak (``W/"..."``): the representation is the same whether it goes out as JSON or
+msgpack, gzipped or not. Routes build them from the fields that make up a version of the
+resource, before rendering the body, so a matching ``If-None-Match`` gets an empty 304 and
+the response is never serialized.
+"""
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b("\x1f".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of ``etag`` against an ``If-None-Match`` header value."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Tag ``response`` with ``etag``; return a 304 to send instead if the client already has it."""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return None
@@ -0,0 +1,140 @@
+"""Event-loop lag monitor (LOOP_LAG_MONITOR_ENABLED).
+
+A heartbeat task sleeps ``interval`` seconds at a time and records how late it wakes.
+That delay is the time every other coroutine on the worker also waited, and it goes into
+a cumulative histogram. A watchdog thread watches the heartbeat. Once the loop has been
+stuck for more than ``threshold``, it grabs the loop thread's stack with
+``sys._current_frames()`` while the blocking call is still on it. Examples are a bcrypt
+hash, a large ``json.loads`` or a sync log handler. Stacks are aggregated by call site
+with a count and the worst lag seen, so repeat offenders rise to the top.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+BUCKETS_MS = (1.0, 5.0, 10.0, 25.0, 50.0, 100.0, 250.0, 500.0, 1000.0, 2500.0, 5000.0)
+
+
+class LagHistogram:
+    def __init__(self, buckets_ms: Tuple[float, ...] = BUCKETS_MS) -> None:
+        self.buckets_ms = buckets_ms
+        self.counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, lag_ms: float) -> None:
+        for i, bound in enumerate(self.buckets_ms):
+            if lag_ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum_ms += lag_ms
+        self.max_ms = max(self.max_ms, lag_ms)
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative, running = {}, 0
+        for bound, n in zip(self.buckets_ms + (float("inf"),), self.counts):
+            running += n
+            cumulative["+Inf" if bound == float("inf") else f"{bound:g}"] = running
+        return {
+            "buckets_ms": cumulative,
+            "count": self.count,
+            "sum_ms": round(self.sum_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, max_stacks: int = 50, stack_depth: int = 30) -> None:
+        self.interval = interval
+        self.threshold = threshold
+        self.max_stacks = max_stacks
+        self.stack_depth = stack_depth
+        self.histogram = LagHistogram()
+        self._blocking: Dict[Tuple[str, ...], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._beat = time.monotonic()
+        self._stalled_on: Optional[Tuple[str, ...]] = None
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_settings(cls, settings) -> "LoopLagMonitor":
+        return cls(settings.LOOP_LAG_INTERVAL_MS / 1000, settings.LOOP_LAG_THRESHOLD_MS / 1000)
+
+    def start(self) -> None:
+        """Start the heartbeat and the watchdog; call from the event loop."""
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _heartbeat(self) -> None:
+        while True:
+            self._beat = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._beat - self.interval)
+            self.histogram.observe(lag * 1000)
+            if self._stalled_on is not None:
+                with self._lock:
+                    report = self._blocking.get(self._stalled_on)
+                    if report is not None:
+                        report["max_lag_ms"] = max(report["max_lag_ms"], round(lag * 1000, 1))
+                self._stalled_on = None
+
+    def _watch(self) -> None:
+        poll = max(0.005, min(self.interval, self.threshold / 2))
+        while not self._stop.wait(poll):
+            stalled = time.monotonic() - self._beat - self.interval
+            if stalled > self.threshold and self._stalled_on is None:
+                self._capture(stalled)
+
+    def _capture(self, stalled: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return
+        stack = tuple(
+            f"{fs.filename}:{fs.lineno} in {fs.name}" for fs in traceback.extract_stack(frame)[-self.stack_depth:]
+        )
+        self._stalled_on = stack
+        with self._lock:
+            report = self._blocking.get(stack)
+            if report is None:
+                if len(self._blocking) >= self.max_stacks:
+                    # make room by forgetting the least frequent call site
+                    del self._blocking[min(self._blocking, key=lambda k: self._blocking[k]["count"])]
+                report = self._blocking[stack] = {"count": 0, "max_lag_ms": 0.0, "last_seen": 0.0}
+            report["count"] += 1
+            report["max_lag_ms"] = max(report["max_lag_ms"], round(stalled * 1000, 1))
+            report["last_seen"] = time.time()
+        logger.warning("event loop blocked for %.0f ms at %s", stalled * 1000, stack[-1])
+
+    def blocking_stacks(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            items = sorted(self._blocking.items(), key=lambda kv: (kv[1]["count"], kv[1]["max_lag_ms"]), reverse=True)
+            return [{"stack": list(stack), **report} for stack, report in items[:limit]]
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "interval_ms": self.interval * 1000,
+            "threshold_ms": self.threshold * 1000,
+            "lag": self.histogram.snapshot(),
+        }
@@ -1,7 +1,7 @@
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
-from passlib.context import CryptContext
 from app.core.jwt_helper import encode as jwt_encode
 
 from app.core.config import settings
@@ -9,24 +9,31 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-# Prefer bcrypt but be tolerant of environments where bcrypt's native bindings
-# may be unavailable or provide unexpected attributes (which can raise
-# AttributeError inside passlib). In that case, fall back to a pure-Python
-# algorithm to avoid crashing the application startup (suitable for dev/test).
-try:
-    password_manager = CryptContext(schemes=["bcrypt"], deprecated="auto")
-except Exception as exc:  # pragma: no cover - runtime resilience
-    logger.warning("bcrypt backend unavailable (%s); falling back to pbkdf2_sha256", exc)
-    password_manager = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 JWT_ALGO = "HS256"
 
 
+@lru_cache(maxsize=None)
+def get_password_manager():
+    """Build the passlib context on first use so importing the app stays cheap."""
+    from passlib.context import CryptContext
+
+    # Prefer bcrypt but be tolerant of environments where bcrypt's native bindings
+    # may be unavailable or provide unexpected attributes (which can raise
+    # AttributeError inside passlib). In that case, fall back to a pure-Python
+    # algorithm to avoid crashing the application startup (suitable for dev/test).
+    try:
+        return CryptContext(schemes=["bcrypt"], deprecated="auto")
+    except Exception as exc:  # pragma: no cover - runtime resilience
+        logger.warning("bcrypt backend unavailable (%s); falling back to pbkdf2_sha256", exc)
+        return CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+
+
 def hash_password(plain: str) -> str:
-    return password_manager.hash(plain)
+    return get_password_manager().hash(plain)
 
 
 def verify_password(plain: str, hashed: str) -> bool:
-    return password_manager.verify(plain, hashed)
+    return get_password_manager().verify(plain, hashed)
 
 
 def generate_token(user_id: int, minutes: Optional[int] = None) -> str:
@@ -0,0 +1,33 @@
+"""Startup phase timing.
+
+Each ``on_startup`` step runs inside ``timings.phase(name)`` so rollouts can see where
+boot time goes; the result is logged and kept on ``app.state.startup_timings``.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimings:
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round((time.perf_counter() - started) * 1000, 2)
+
+    def as_dict(self) -> dict:
+        return {"phases_ms": dict(self.phases), "total_ms": round((time.perf_counter() - self._started) * 1000, 2)}
+
+    def report(self, service: str) -> dict:
+        result = self.as_dict()
+        logger.info("%s startup finished in %.1f ms: %s", service, result["total_ms"], result["phases_ms"])
+        return result
@@ -1,14 +1,38 @@
+from typing import List
+
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 from app.models.user import User
-from app.core.security import hash_password
 
+# Alembic head this code expects; bump together with every new migration in alembic/versions.
+SCHEMA_REVISION = "0002_add_user_updated_at"
+
+
+def _stale_columns(sync_conn, metadata) -> List[str]:
+    # create_all only adds missing tables; columns added by later migrations stay missing
+    inspector = inspect(sync_conn)
+    missing = []
+    for table in metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing.extend(f"{table.name}.{column.name}" for column in table.columns if column.name not in existing)
+    return missing
+
+
+async def _create_tables(conn, metadata) -> None:
+    await conn.run_sync(metadata.create_all)
+    missing = await conn.run_sync(_stale_columns, metadata)
+    if missing:
+        raise RuntimeError(
+            f"database {conn.engine.url.render_as_string(hide_password=True)} predates the current models "
+            f"(missing {', '.join(missing)}); delete the dev database or run `alembic upgrade head`"
+        )
 
 
 async def init_db() -> None:
-    """Create database tables from metadata."""
+    """Create database tables from metadata and seed the first superuser."""
     from app.db.session import engine
     # simple convenience for dev: create tables
     # ensure all models are imported so their tables are registered with metadata
@@ -16,9 +40,15 @@ async def init_db() -> None:
     from app.db.base import Base
 
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await _create_tables(conn, Base.metadata)
+
+    await seed_first_superuser()
+
+
+async def seed_first_superuser() -> None:
+    """Seed initial superuser if configured and not already present."""
+    from app.db.session import engine
 
-    # Seed initial superuser if configured and not already present
     AsyncSessionLocal = sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
     async with AsyncSessionLocal() as session:
         # Check if a first user is configured
@@ -30,6 +60,9 @@ async def init_db() -> None:
                 User.__table__.select().where(User.email == email)
             )
             if existing.first() is None:
+                # hashing imports passlib and costs a bcrypt round; only pay it when seeding
+                from app.core.security import hash_password
+
                 # support SecretStr or plain string in tests/environments
                 if hasattr(password, "get_secret_value"):
                     raw_pw = password.get_secret_value()
@@ -41,3 +74,27 @@ async def init_db() -> None:
                     User.__table__.insert().values(full_name="Admin", email=email, hashed_password=hashed, is_active=True, is_superuser=True)
                 )
                 await session.commit()
+
+
+async def check_schema_revision() -> str:
+    """Production startup: confirm migrations are applied with one query instead of DDL."""
+    from app.db.session import engine
+
+    try:
+        async with engine.connect() as conn:
+            current = (await conn.execute(text("SELECT version_num FROM alembic_version"))).scalar()
+    except Exception as exc:
+        raise RuntimeError(f"cannot read alembic_version ({exc}); run `alembic upgrade head`") from exc
+    if current != SCHEMA_REVISION:
+        raise RuntimeError(
+            f"database schema is at revision {current!r}, expected {SCHEMA_REVISION!r}; "
+            "run `alembic upgrade head`"
+        )
+    return current
+
+
+if __name__ == "__main__":
+    # one-off seeding for STARTUP_MODE=production deployments: python -m app.db.init_db
+    import asyncio
+
+    asyncio.run(seed_first_superuser())
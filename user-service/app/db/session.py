@@ -3,7 +3,10 @@ from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.core import memory, tracing
 from app.core.config import settings
+from app.db.replicas import ReplicaSet, RoutingSession
+from app.db.sqlite import SerializedWriteSession, create_sqlite_engine, is_sqlite
 
 # Use configured POSTGRES_URI when available; fall back to a local sqlite async DB for dev/tests
 if not settings.POSTGRES_URI:
@@ -17,10 +20,43 @@ if not settings.POSTGRES_URI:
         )
 
 DATABASE_URL = settings.POSTGRES_URI or "sqlite+aiosqlite:///./user_dev.db"
-engine = create_async_engine(DATABASE_URL, echo=False)
-_async_session = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+if settings.TRACING_ENABLED:
+    # child spans for every SQL statement, on this and the replica/shard engines
+    tracing.instrument_sqlalchemy()
+if settings.MEMORY_DIAGNOSTICS_ENABLED:
+    # lets /admin/memory report identity map sizes
+    memory.track_sessions()
+
+
+def _create_engine(url: str):
+    if is_sqlite(url):
+        # single-node profile: pragmas, shared in-memory pool, serialised writers (app.db.sqlite)
+        return create_sqlite_engine(url, echo=False)
+    return create_async_engine(url, echo=False)
+
+
+engine = _create_engine(DATABASE_URL)
+_session_class = SerializedWriteSession if is_sqlite(DATABASE_URL) else AsyncSession
+# Primary-only sessions: background jobs, startup and write endpoints
+_async_session = sessionmaker(engine, class_=_session_class, expire_on_commit=False)
+
+# Optional read replicas (app.db.replicas); request sessions route plain reads to them
+replica_set = None
+_routing_session = _async_session
+if settings.POSTGRES_REPLICA_URIS:
+    replica_set = ReplicaSet([_create_engine(url) for url in settings.POSTGRES_REPLICA_URIS])
+    RoutingSession.primary, RoutingSession.replicas = engine, replica_set
+    _routing_session = sessionmaker(
+        class_=_session_class, sync_session_class=RoutingSession, expire_on_commit=False
+    )
 
 
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
+    async with _routing_session() as session:
+        yield session
+
+
+async def get_primary_session() -> AsyncGenerator[AsyncSession, None]:
     async with _async_session() as session:
         yield session
@@ -0,0 +1,186 @@
+"""SQLite engine profile for the single-node fallback (dev, edge and test instances).
+
+- pragmas set on every new connection: WAL journal, ``synchronous=NORMAL``, mmap, a larger
+  page cache and a busy timeout so a writer in another process is waited for, not failed
+- ``:memory:`` becomes a named in-memory database on SQLite's ``memdb`` VFS, so every pooled
+  connection sees the same data while keeping its own transactions (a normal pool would
+  hand each connection its own empty database; one shared ``StaticPool`` connection would
+  let one session's rollback undo another's writes). It uses rollback-journal locking:
+  nobody sees uncommitted rows, and a reader arriving during a write transaction waits
+  for its commit (up to the busy timeout) instead of failing
+- writers are serialised in-process: a session takes its database's writer lock before its
+  first write (flush, autoflush or DML statement) and keeps it until commit/rollback/close,
+  so two sessions never hold competing write transactions and hit SQLITE_BUSY on each
+  other. The lock is reentrant per task, so a task that nests a writing session inside
+  another gets SQLite's busy timeout rather than waiting on itself forever
+"""
+import asyncio
+import uuid
+import weakref
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.core.config import settings
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _is_memory(url: str) -> bool:
+    return ":memory:" in url or url.rstrip("/").endswith(":")
+
+
+def create_sqlite_engine(url: str, **kwargs) -> AsyncEngine:
+    memory = _is_memory(url)
+    if memory:
+        # lives as long as the pool holds at least one connection, i.e. the engine's lifetime
+        driver = url.split(":", 1)[0]
+        url = f"{driver}:///file:/memdb-{uuid.uuid4().hex}?vfs=memdb&uri=true"
+        kwargs.setdefault("poolclass", AsyncAdaptedQueuePool)
+    engine = create_async_engine(url, **kwargs)
+
+    pragmas = [
+        f"PRAGMA busy_timeout = {settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA cache_size = -{settings.SQLITE_CACHE_SIZE_KB}",
+        "PRAGMA temp_store = MEMORY",
+    ]
+    if not memory:  # memdb has no WAL (it needs a shared-memory file)
+        pragmas += [
+            "PRAGMA journal_mode = WAL",
+            "PRAGMA synchronous = NORMAL",
+            f"PRAGMA mmap_size = {settings.SQLITE_MMAP_SIZE}",
+        ]
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return engine
+
+
+class _WriterLock:
+    """``asyncio.Lock`` that the task holding it can take again; released when every hold ends."""
+
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+        self._owner: Optional[asyncio.Task] = None
+        self._depth = 0
+
+    async def acquire(self) -> None:
+        task = asyncio.current_task()
+        if task is not None and self._owner is task:
+            self._depth += 1
+            return
+        await self._lock.acquire()
+        self._owner, self._depth = task, 1
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            self._owner = None
+            self._lock.release()
+
+
+# one writer lock per database and event loop (tests and scripts run several loops in one process)
+_writer_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, _WriterLock]]" = weakref.WeakKeyDictionary()
+
+
+def _writer_lock(database: str) -> _WriterLock:
+    locks = _writer_locks.setdefault(asyncio.get_running_loop(), {})
+    lock = locks.get(database)
+    if lock is None:
+        lock = locks[database] = _WriterLock()
+    return lock
+
+
+class SerializedWriteSession(AsyncSession):
+    """AsyncSession that holds its SQLite database's writer lock while it has pending writes."""
+
+    _holds_writer = False
+
+    def _database(self) -> str:
+        return str(self.bind.url) if self.bind is not None else ""
+
+    def _has_changes(self) -> bool:
+        return bool(self.new or self.dirty or self.deleted)
+
+    async def _begin_write(self) -> None:
+        if not self._holds_writer:
+            await _writer_lock(self._database()).acquire()
+            self._holds_writer = True
+
+    def _end_write(self) -> None:
+        if self._holds_writer:
+            self._holds_writer = False
+            _writer_lock(self._database()).release()
+
+    async def _before(self, statement=None) -> None:
+        # DML, or pending ORM changes that autoflush is about to write
+        if isinstance(statement, UpdateBase) or (self.autoflush and self._has_changes()):
+            await self._begin_write()
+
+    async def execute(self, statement, *args, **kwargs):
+        await self._before(statement)
+        return await super().execute(statement, *args, **kwargs)
+
+    async def scalar(self, statement, *args, **kwargs):
+        await self._before(statement)
+        return await super().scalar(statement, *args, **kwargs)
+
+    async def scalars(self, statement, *args, **kwargs):
+        await self._before(statement)
+        return await super().scalars(statement, *args, **kwargs)
+
+    async def stream(self, statement, *args, **kwargs):
+        await self._before(statement)
+        return await super().stream(statement, *args, **kwargs)
+
+    async def stream_scalars(self, statement, *args, **kwargs):
+        await self._before(statement)
+        return await super().stream_scalars(statement, *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        await self._before()
+        return await super().get(*args, **kwargs)
+
+    async def merge(self, *args, **kwargs):
+        await self._before()
+        return await super().merge(*args, **kwargs)
+
+    async def refresh(self, *args, **kwargs):
+        await self._before()
+        return await super().refresh(*args, **kwargs)
+
+    async def flush(self, objects=None) -> None:
+        if self._has_changes():
+            await self._begin_write()
+        await super().flush(objects)
+
+    async def commit(self) -> None:
+        if not self._has_changes() and not self._holds_writer:
+            return await super().commit()
+        await self._begin_write()
+        try:
+            await super().commit()
+        finally:
+            self._end_write()
+
+    async def rollback(self) -> None:
+        try:
+            await super().rollback()
+        finally:
+            self._end_write()
+
+    async def close(self) -> None:
+        try:
+            await super().close()
+        finally:
+            self._end_write()
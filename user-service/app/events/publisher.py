@@ -1,15 +1,18 @@
-import json
-from typing import Any, Dict
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
 from app.core.config import settings
+from app.core.encoding import JSON, MSGPACK, encode, msgpack_available
+from app.core.tracing import tracer
 
+logger = logging.getLogger(__name__)
 
-async def publish_user_event(event_type: str, payload: Dict[str, Any]) -> None:
-    """Publish a user.{event_type} event with JSON payload to the configured RabbitMQ exchange.
+_Event = Tuple[str, Dict[str, Any]]
 
-    This function is best-effort: if aio-pika isn't installed or RabbitMQ is unavailable, it logs and returns
-    without raising so callers (e.g., user creation) do not fail.
-    """
+
+async def _publish_batch(events: List[_Event]) -> None:
+    """Publish ``(event_type, payload)`` pairs over one broker connection."""
     try:
         import aio_pika
     except Exception:
@@ -19,10 +22,99 @@ async def publish_user_event(event_type: str, payload: Dict[str, Any]) -> None:
     url = settings.RABBITMQ_URL
     exchange_name = settings.RABBITMQ_EXCHANGE
 
-    connection = await aio_pika.connect_robust(url)
-    async with connection:
-        channel = await connection.channel()
-        exchange = await channel.declare_exchange(exchange_name, aio_pika.ExchangeType.TOPIC, durable=True)
-        routing_key = f"user.{event_type}"
-        body = json.dumps(payload).encode()
-        await exchange.publish(aio_pika.Message(body=body), routing_key=routing_key)
+    with tracer.span("publish user events", kind="producer", attributes={"messaging.batch.size": len(events)}):
+        connection = await aio_pika.connect_robust(url)
+        async with connection:
+            channel = await connection.channel()
+            exchange = await channel.declare_exchange(exchange_name, aio_pika.ExchangeType.TOPIC, durable=True)
+            # consumers pick the decoder from content_type; JSON unless msgpack is configured and installed
+            content_type = MSGPACK if settings.EVENT_ENCODING == "msgpack" and msgpack_available() else JSON
+            # consumers continue the trace from the traceparent header
+            headers = tracer.inject({})
+            for event_type, payload in events:
+                body = encode(payload, content_type)
+                await exchange.publish(
+                    aio_pika.Message(body=body, content_type=content_type, headers=headers),
+                    routing_key=f"user.{event_type}",
+                )
+
+
+class EventCoalescer:
+    """Keep only the latest event per user id for ``window`` seconds, then publish them together.
+
+    Consumers apply user events as "set this user's state", so only the last one per user
+    matters: repeated updates collapse into one, a delete supersedes anything before it, and
+    an update to a user created in the same window stays a ``created`` event carrying the
+    latest payload. A flush is one broker connection for the whole batch. It happens when the
+    window closes or ``max_batch`` users are pending. Publishing stays best-effort: a failed
+    flush is logged and dropped.
+    """
+
+    def __init__(
+        self,
+        window: float = 0.2,
+        max_batch: int = 500,
+        send: Callable[[List[_Event]], Awaitable[None]] = _publish_batch,
+    ) -> None:
+        self.window = window
+        self.max_batch = max_batch
+        self._send = send
+        self._pending: Dict[Any, _Event] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushes: Set[asyncio.Task] = set()
+
+    def submit(self, event_type: str, payload: Dict[str, Any]) -> None:
+        user_id = payload["id"]
+        previous = self._pending.pop(user_id, None)
+        if previous is not None and previous[0] == "created" and event_type == "updated":
+            event_type = "created"
+        self._pending[user_id] = (event_type, payload)
+        if len(self._pending) >= self.max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        events, self._pending = list(self._pending.values()), {}
+        task = asyncio.ensure_future(self._publish(events))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def drain(self) -> None:
+        """Flush now and wait for in-flight publishes (shutdown)."""
+        self.flush()
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {"pending": len(self._pending), "flushing": len(self._flushes)}
+
+    async def _publish(self, events: List[_Event]) -> None:
+        try:
+            await self._send(events)
+        except Exception as exc:
+            logger.warning("dropping %d coalesced user events: %s", len(events), exc)
+
+
+event_coalescer = EventCoalescer(
+    window=settings.EVENT_COALESCE_WINDOW_MS / 1000,
+    max_batch=settings.EVENT_COALESCE_MAX_BATCH,
+)
+
+
+async def publish_user_event(event_type: str, payload: Dict[str, Any]) -> None:
+    """Publish a user.{event_type} event with JSON payload to the configured RabbitMQ exchange.
+
+    This function is best-effort: if aio-pika isn't installed or RabbitMQ is unavailable, it logs and returns
+    without raising so callers (e.g., user creation) do not fail. With EVENT_COALESCE_ENABLED the event is
+    handed to ``event_coalescer`` and published with the next batch.
+    """
+    if settings.EVENT_COALESCE_ENABLED:
+        event_coalescer.submit(event_type, payload)
+        return
+    await _publish_batch([(event_type, payload)])
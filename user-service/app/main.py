@@ -1,24 +1,112 @@
 import asyncio
+import logging
 
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
 
+from app.api.routes.admin import admin_router
 from app.api.routes.users import users_router
 from app.api.routes.auth import auth_router
-from app.db.init_db import init_db
+from app.api.deps import principal_cache
+from app.core import memory
+from app.core.admission import AdmissionController, AdmissionMiddleware
+from app.core.capture import TrafficCaptureMiddleware
+from app.core.config import settings
+from app.core.looplag import LoopLagMonitor
+from app.core.profiler import ProfileTagMiddleware
+from app.core.startup import StartupTimings
+from app.core.tracing import TracingMiddleware, tracer
+from app.db.init_db import check_schema_revision, init_db
+from app.db.session import engine, replica_set
+from app.db.warmup import warm_pool
+from app.events.publisher import event_coalescer
 
 
 def create_app() -> FastAPI:
     app = FastAPI(title="user-service")
     app.include_router(auth_router, prefix="/api/v1")
     app.include_router(users_router, prefix="/api/v1")
+    app.include_router(admin_router, prefix="/api/v1")
     from app.api.routes.internal import internal_router
 
     app.include_router(internal_router, prefix="/api/v1/internal")
+    if settings.CAPTURE_ENABLED:
+        app.add_middleware(
+            TrafficCaptureMiddleware,
+            path=settings.CAPTURE_PATH,
+            sample_rate=settings.CAPTURE_SAMPLE_RATE,
+            max_body_bytes=settings.CAPTURE_MAX_BODY_BYTES,
+            exclude_body_paths=settings.CAPTURE_EXCLUDE_BODY_PATHS,
+        )
+    if settings.GZIP_ENABLED:
+        # outside capture, so capture still records uncompressed bodies; small responses pass through
+        app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+    if settings.PRINCIPAL_CACHE_TTL_SECONDS > 0 and settings.CACHE_BACKEND != "redis":
+        logging.getLogger(__name__).warning(
+            "principal cache without CACHE_BACKEND=redis: user updates and deletes reach only the "
+            "worker handling them; other workers may serve the old principal for up to %ss",
+            settings.PRINCIPAL_CACHE_TTL_SECONDS,
+        )
+    if settings.MEMORY_DIAGNOSTICS_ENABLED:
+        memory.register_size("principal_cache", principal_cache.stats)
+        memory.register_size("event_coalescer", event_coalescer.stats)
+    if settings.PROFILER_ENABLED:
+        # marks requests matching a running profile's header filter
+        app.add_middleware(ProfileTagMiddleware)
+    if settings.TRACING_ENABLED:
+        app.add_middleware(TracingMiddleware)
+    # outermost: a shed request costs no more than the 503 itself
+    app.state.admission = AdmissionController.from_settings(settings) if settings.ADMISSION_ENABLED else None
+    if app.state.admission is not None:
+        app.add_middleware(AdmissionMiddleware, controller=app.state.admission)
+
+    app.state.loop_monitor = LoopLagMonitor.from_settings(settings) if settings.LOOP_LAG_MONITOR_ENABLED else None
+    app.state.startup_timings = None
+    app.state.ready = False
+    app.state._replica_health_task = None
+    app.state._cache_listener_task = None
 
     @app.on_event("startup")
     async def on_startup() -> None:
-        # Create tables on startup (development convenience)
-        await init_db()
+        timings = StartupTimings()
+        if app.state.loop_monitor is not None:
+            # first, so blocking work during startup is caught too
+            app.state.loop_monitor.start()
+        if settings.STARTUP_MODE == "production":
+            # Schema and seed data are owned by alembic; skip DDL, the seed query and bcrypt
+            with timings.phase("schema_check"):
+                await check_schema_revision()
+        else:
+            # Create tables on startup (development convenience)
+            with timings.phase("init_db"):
+                await init_db()
+        if principal_cache.backend is not None:
+            # principal deletes broadcast by other replicas
+            app.state._cache_listener_task = asyncio.create_task(principal_cache.listen())
+        if replica_set is not None:
+            app.state._replica_health_task = asyncio.create_task(
+                replica_set.run_health_checks(settings.REPLICA_HEALTH_INTERVAL_SECONDS)
+            )
+        # Warm pooled DB connections before /users/ready lets traffic in
+        with timings.phase("warmup"):
+            warmed = await warm_pool(engine, settings.WARMUP_DB_CONNECTIONS)
+            if replica_set is not None:
+                await asyncio.gather(*(warm_pool(r, settings.WARMUP_DB_CONNECTIONS) for r in replica_set.engines))
+        logging.getLogger(__name__).info("warm-up: %d db connections", warmed)
+        app.state.startup_timings = timings.report("user-service")
+        app.state.ready = True
+
+    @app.on_event("shutdown")
+    async def on_shutdown() -> None:
+        app.state.ready = False
+        if app.state.loop_monitor is not None:
+            app.state.loop_monitor.stop()
+        for task in (app.state._replica_health_task, app.state._cache_listener_task):
+            if task is not None:
+                task.cancel()
+        # publish whatever the coalescer is still holding
+        await event_coalescer.drain()
+        tracer.flush()
 
     return app
 
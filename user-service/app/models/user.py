@@ -1,4 +1,6 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Boolean
+from datetime import datetime
+
+from sqlalchemy import Column, ForeignKey, Integer, String, Boolean, DateTime, func
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -11,6 +13,15 @@ class User(Base):
     hashed_password = Column(String, nullable=False)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
+    # change-feed watermark for downstream replicas (see internal /users/changes)
+    updated_at = Column(
+        DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        server_default=func.now(),
+        index=True,
+    )
     items = relationship("Item", back_populates="owner", lazy="selectin")
 
 
@@ -1,4 +1,5 @@
-from typing import Optional, Literal
+from datetime import datetime
+from typing import List, Optional, Literal
 
 from pydantic import BaseModel, EmailStr, ConfigDict
 
@@ -39,3 +40,15 @@ class UserUpdateSchema(UserCore):
 
 class UserUpdateDBSchema(UserCore):
     hashed_password: str
+
+
+class UserChange(UserResponse):
+    updated_at: datetime
+
+
+class UserChangePage(BaseModel):
+    items: List[UserChange]
+    # cursor for the next page: pass back as ?since=...&after_id=...
+    next_since: Optional[datetime] = None
+    next_after_id: Optional[int] = None
+    has_more: bool = False
@@ -6,13 +6,21 @@ import httpx
 from fastapi import HTTPException
 
 from app.core.config import settings
+from app.core.tracing import tracer
+
+
+async def _get(url: str, timeout: float) -> httpx.Response:
+    with tracer.span("GET orders-service", kind="client", attributes={"http.url": url}) as span:
+        async with httpx.AsyncClient() as client:
+            resp = await client.get(url, timeout=timeout, headers=tracer.inject({}))
+        span.set_attribute("http.status_code", resp.status_code)
+        return resp
 
 
 async def get_order(order_id: int) -> dict:
     """Fetch order and raise on errors (used for validation or other immediate needs)."""
     url = f"{settings.ORDERS_SERVICE_URL}/orders/{order_id}/"
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, timeout=5.0)
+    resp = await _get(url, timeout=5.0)
     if resp.status_code == 404:
         raise HTTPException(status_code=400, detail="Order not found")
     if resp.status_code >= 400:
@@ -29,8 +37,7 @@ async def safe_get_order(order_id: int, retries: int = 1, timeout: float = 2.0)
     backoff = 0.5
     for attempt in range(retries + 1):
         try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.get(url, timeout=timeout)
+            resp = await _get(url, timeout=timeout)
             if resp.status_code == 200:
                 return resp.json()
             if resp.status_code == 404:
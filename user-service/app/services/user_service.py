@@ -1,8 +1,11 @@
 from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 
+from datetime import datetime
+
 from pydantic import BaseModel as PydanticBaseModel
-from sqlalchemy import select
+from sqlalchemy import and_, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import noload
 
 from app.models.user import User
 
@@ -86,3 +89,16 @@ class AsyncCRUD(Generic[TModel, TCreate, TUpdate]):
 # ----------------------------
 UserCRUD = AsyncCRUD[User, PydanticBaseModel, PydanticBaseModel]
 crud_user = UserCRUD(User)
+
+
+async def get_users_changed_since(
+    session: AsyncSession, since: Optional[datetime] = None, after_id: int = 0, limit: int = 500
+) -> List[User]:
+    """Keyset page of users ordered by (updated_at, id), strictly after the given cursor."""
+    query = select(User).options(noload(User.items)).order_by(User.updated_at, User.id).limit(limit)
+    if since is not None:
+        query = query.where(
+            or_(User.updated_at > since, and_(User.updated_at == since, User.id > after_id))
+        )
+    result = await session.execute(query)
+    return result.scalars().all()
@@ -0,0 +1,47 @@
+import asyncio
+import pathlib
+import sys
+
+
+def test_coalescer_keeps_latest_event_per_user():
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        from app.events.publisher import EventCoalescer
+
+        batches = []
+
+        async def send(events):
+            batches.append(events)
+
+        async def scenario():
+            coalescer = EventCoalescer(window=0.05, max_batch=100, send=send)
+            for n in range(5):
+                coalescer.submit("updated", {"id": 1, "full_name": f"v{n}"})
+            coalescer.submit("created", {"id": 2, "full_name": "new"})
+            coalescer.submit("updated", {"id": 2, "full_name": "renamed"})
+            coalescer.submit("updated", {"id": 3, "full_name": "gone soon"})
+            coalescer.submit("deleted", {"id": 3})
+            assert batches == []
+            await asyncio.sleep(0.1)
+            assert batches == [
+                [
+                    ("updated", {"id": 1, "full_name": "v4"}),
+                    ("created", {"id": 2, "full_name": "renamed"}),
+                    ("deleted", {"id": 3}),
+                ]
+            ]
+
+            # a full batch flushes without waiting for the window
+            small = EventCoalescer(window=10, max_batch=2, send=send)
+            small.submit("updated", {"id": 1})
+            small.submit("updated", {"id": 2})
+            await small.drain()
+            assert batches[-1] == [("updated", {"id": 1}), ("updated", {"id": 2})]
+
+        asyncio.run(scenario())
+    finally:
+        sys.path.remove(str(service_dir))
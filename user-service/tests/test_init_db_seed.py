@@ -19,14 +19,21 @@ if "jose" not in sys.modules:
     shim = types.SimpleNamespace(jwt=jwt_mod, JWTError=Exception)
     sys.modules["jose"] = shim
 
-from app.core.config import settings
-from app.db.init_db import init_db
-from app.models.user import User
-from app.core.security import verify_password
-
 
 def test_init_db_seeds_admin(monkeypatch, tmp_path):
     """Run the async init flow using asyncio.run so pytest doesn't require pytest-asyncio."""
+    # import this service's app now rather than at collection: other tests (of either
+    # service) purge and re-import the ``app`` package in between
+    if str(service_dir) not in sys.path:
+        sys.path.insert(0, str(service_dir))
+    for modname in list(sys.modules.keys()):
+        if modname == "app" or modname.startswith("app."):
+            del sys.modules[modname]
+    from app.core.config import settings
+    from app.db.init_db import init_db
+    from app.models.user import User
+    from app.core.security import verify_password
+
     try:
         async def runner():
             # Use a file-backed sqlite DB in tmp_path so table state is visible across connections
@@ -0,0 +1,65 @@
+import asyncio
+import pathlib
+import sys
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+
+def test_internal_endpoints_negotiate_msgpack(tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        cfg = importlib.import_module("app.core.config")
+        cfg.settings.POSTGRES_URI = f"sqlite+aiosqlite:///{tmp_path}/users_encoding.db"
+        main = importlib.import_module("app.main")
+        from app.core.encoding import MSGPACK, decode, msgpack_available
+        from app.db.base import Base
+        from app.db.session import engine
+        from app.models.user import User
+
+        async def seed():
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(
+                    User.__table__.insert(),
+                    [
+                        {"id": i, "email": f"u{i}@example.com", "full_name": f"User {i}", "hashed_password": "x", "updated_at": datetime(2026, 1, i)}
+                        for i in (1, 2, 3)
+                    ],
+                )
+
+        asyncio.run(seed())
+        app = main.app
+        app.router.on_startup.clear()
+        client = TestClient(app)
+
+        as_json = client.get("/api/v1/internal/users/1/")
+        assert as_json.headers["content-type"] == "application/json"
+        # JSON and msgpack share the URL and ETag: every answer tells caches to key on Accept
+        assert "Accept" in as_json.headers["vary"]
+        revalidated = client.get("/api/v1/internal/users/1/", headers={"If-None-Match": as_json.headers["etag"]})
+        assert revalidated.status_code == 304 and "Accept" in revalidated.headers["vary"]
+        page = client.get("/api/v1/internal/users/changes")
+        assert "Accept" in page.headers["vary"]
+        page_json = page.json()
+
+        if not msgpack_available():
+            # without msgpack installed the server keeps answering JSON
+            assert client.get("/api/v1/internal/users/1/", headers={"Accept": MSGPACK}).json() == as_json.json()
+            return
+
+        packed = client.get("/api/v1/internal/users/1/", headers={"Accept": MSGPACK})
+        assert packed.headers["content-type"] == MSGPACK
+        assert decode(packed.content, packed.headers["content-type"]) == as_json.json()
+
+        packed_page = client.get("/api/v1/internal/users/changes", headers={"Accept": MSGPACK})
+        assert decode(packed_page.content, packed_page.headers["content-type"]) == page_json
+        assert len(packed_page.content) < len(client.get("/api/v1/internal/users/changes").content)
+    finally:
+        sys.path.remove(str(service_dir))
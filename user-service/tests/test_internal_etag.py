@@ -0,0 +1,44 @@
+import asyncio
+import pathlib
+import sys
+
+from fastapi.testclient import TestClient
+
+
+def test_internal_user_lookup_revalidates_with_etag(tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        cfg = importlib.import_module("app.core.config")
+        cfg.settings.POSTGRES_URI = f"sqlite+aiosqlite:///{tmp_path}/users_etag.db"
+        main = importlib.import_module("app.main")
+        from app.db.base import Base
+        from app.db.session import engine
+        from app.models.user import User
+
+        async def run(stmt):
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(stmt)
+
+        asyncio.run(run(User.__table__.insert().values(id=1, email="a@example.com", full_name="A", hashed_password="x")))
+        app = main.app
+        app.router.on_startup.clear()
+        client = TestClient(app)
+
+        first = client.get("/api/v1/internal/users/1/")
+        etag = first.headers["etag"]
+        unchanged = client.get("/api/v1/internal/users/1/", headers={"If-None-Match": etag})
+        assert unchanged.status_code == 304 and unchanged.content == b""
+
+        asyncio.run(run(User.__table__.update().where(User.id == 1).values(full_name="Renamed")))
+        changed = client.get("/api/v1/internal/users/1/", headers={"If-None-Match": etag})
+        assert changed.status_code == 200 and changed.json()["full_name"] == "Renamed"
+        assert changed.headers["etag"] != etag
+    finally:
+        sys.path.remove(str(service_dir))
@@ -41,7 +41,7 @@ def test_get_order_and_safe_get(monkeypatch):
         async def __aexit__(self, exc_type, exc, tb):
             return False
 
-        async def get(self, url, timeout=0):
+        async def get(self, url, timeout=0, headers=None):
             return self.resp
 
     # Test get_order success
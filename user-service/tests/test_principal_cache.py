@@ -0,0 +1,53 @@
+import asyncio
+import pathlib
+import sys
+
+
+def test_principal_cached_until_user_changes(monkeypatch):
+    monkeypatch.setenv("PRINCIPAL_CACHE_TTL_SECONDS", "60")
+    monkeypatch.setenv("CACHE_BACKEND", "memory")
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        deps = importlib.import_module("app.api.deps")
+        from app.models.user import User
+
+        loads = []
+
+        async def get(session, **filter_by):
+            loads.append(filter_by["id"])
+            await asyncio.sleep(0.01)
+            return User(id=filter_by["id"], email="a@example.com", full_name="A", is_active=True, is_superuser=False, hashed_password="h")
+
+        monkeypatch.setattr(deps.crud_user, "get", get)
+
+        async def scenario():
+            users = await asyncio.gather(*(deps._cached_principal(1) for _ in range(5)))
+            assert {u.email for u in users} == {"a@example.com"}
+            assert (await deps._cached_principal(1)).is_superuser is False
+            assert loads == [1]
+            assert "hashed_password" not in (await deps.principal_cache.get("1")).value
+            await deps.principal_cache.delete("1")
+            await deps._cached_principal(1)
+            assert loads == [1, 1]
+
+            # a delete landing while a load is at the database keeps that load out of the cache
+            await deps.principal_cache.delete("1")
+            racing = asyncio.ensure_future(deps._cached_principal(1))
+            while len(loads) < 3:
+                await asyncio.sleep(0)
+            await deps.principal_cache.delete("1")
+            await racing
+            assert await deps.principal_cache.get("1") is None
+            await deps._cached_principal(1)
+            assert loads == [1, 1, 1, 1]
+            assert await deps.principal_cache.get("1") is not None
+
+        asyncio.run(scenario())
+    finally:
+        sys.path.remove(str(service_dir))
@@ -0,0 +1,57 @@
+import asyncio
+import pathlib
+import sys
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+
+def test_changes_feed_pages_by_watermark(tmp_path):
+    service_dir = pathlib.Path(__file__).resolve().parent.parent
+    sys.path.insert(0, str(service_dir))
+    try:
+        import importlib
+
+        for modname in list(sys.modules.keys()):
+            if modname == "app" or modname.startswith("app."):
+                del sys.modules[modname]
+        cfg = importlib.import_module("app.core.config")
+        cfg.settings.POSTGRES_URI = f"sqlite+aiosqlite:///{tmp_path}/users_feed.db"
+        main = importlib.import_module("app.main")
+        from app.db.base import Base
+        from app.db.session import engine
+        from app.models.user import User
+
+        async def seed():
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(
+                    User.__table__.insert(),
+                    [
+                        {"id": 1, "email": "a@example.com", "hashed_password": "x", "updated_at": datetime(2026, 1, 1)},
+                        {"id": 2, "email": "b@example.com", "hashed_password": "x", "updated_at": datetime(2026, 1, 2)},
+                        {"id": 3, "email": "c@example.com", "hashed_password": "x", "updated_at": datetime(2026, 1, 2)},
+                    ],
+                )
+
+        asyncio.run(seed())
+        app = main.app
+        app.router.on_startup.clear()
+        client = TestClient(app)
+
+        r = client.get("/api/v1/internal/users/changes", params={"limit": 2})
+        assert r.status_code == 200
+        page = r.json()
+        assert [u["id"] for u in page["items"]] == [1, 2]
+        assert page["has_more"] is True
+
+        r = client.get(
+            "/api/v1/internal/users/changes",
+            params={"since": page["next_since"], "after_id": page["next_after_id"], "limit": 2},
+        )
+        page = r.json()
+        assert [u["id"] for u in page["items"]] == [3]
+        assert page["has_more"] is False
+        assert page["items"][0]["email"] == "c@example.com"
+    finally:
+        sys.path.remove(str(service_dir))